@@ -20,7 +20,7 @@ interface Order {
   usuario_nome: string;
   status: string;
   created_at: string;
-  itens: string;
+  itens: { id: number; nome: string }[];
   dispositivo_nome: string;
 }
 
@@ -158,6 +158,7 @@ const OrderScreen: React.FC<OrderScreenProps> = ({ navigation, route }) => {
       case 'coletando': return '#7c3aed';
       case 'concluido': return '#16a34a';
       case 'cancelado': return '#dc2626';
+      case 'falha': return '#ea580c';
       default: return '#64748b';
     }
   };
@@ -201,7 +202,7 @@ const OrderScreen: React.FC<OrderScreenProps> = ({ navigation, route }) => {
         <Paragraph style={styles.orderUser}>{item.usuario_nome}</Paragraph>
         <Paragraph style={styles.orderDevice}>{item.dispositivo_nome}</Paragraph>
         <Paragraph style={styles.orderItems}>
-          Itens: {item.itens?.split(',').length || 0}
+          Itens: {item.itens?.length || 0}
         </Paragraph>
         <Paragraph style={styles.orderDate}>
           {new Date(item.created_at).toLocaleDateString('pt-BR')}
@@ -20,7 +20,7 @@ interface Order {
   usuario_nome: string;
   status: string;
   created_at: string;
-  itens: string;
+  itens: { id: number; nome: string }[];
   dispositivo_nome: string;
   dispositivo_id: number;
 }
@@ -89,6 +89,7 @@ const StatusScreen: React.FC<StatusScreenProps> = ({ navigation }) => {
       case 'coletando': return '#7c3aed';
       case 'concluido': return '#16a34a';
       case 'cancelado': return '#dc2626';
+      case 'falha': return '#ea580c';
       default: return '#64748b';
     }
   };
@@ -100,6 +101,7 @@ const StatusScreen: React.FC<StatusScreenProps> = ({ navigation }) => {
       case 'coletando': return 'Coletando';
       case 'concluido': return 'Concluído';
       case 'cancelado': return 'Cancelado';
+      case 'falha': return 'Falha';
       default: return status;
     }
   };
@@ -169,7 +171,7 @@ const StatusScreen: React.FC<StatusScreenProps> = ({ navigation }) => {
 
         <Paragraph style={styles.orderUser}>👤 {item.usuario_nome}</Paragraph>
         <Paragraph style={styles.orderItems}>
-          📦 Itens: {item.itens?.split(',').length || 0}
+          📦 Itens: {item.itens?.length || 0}
         </Paragraph>
         <Paragraph style={styles.orderDate}>
           📅 {new Date(item.created_at).toLocaleDateString('pt-BR')} às {new Date(item.created_at).toLocaleTimeString('pt-BR')}
@@ -1,93 +1,126 @@
-from picamera2 import Picamera2
-from pyzbar import pyzbar
 import cv2
 import os
 import requests  # Para conectar  API
 import time  # Para medir FPS
 
+from agv_camera import AGVCamera
+from config import VISION_CONFIG
+from qr_decoder import QRDecoder, draw_roi
+from qr_pipeline import QRPipeline
+from qr_tracker import create_tracker
+
 API_BASE_URL = "http://192.168.0.120:5000"  # Ajuste se a API estiver em outro host/porta
 
-picam2 = Picamera2(camera_num=0)  # Usando cmera 1 como no cdigo que funcionou melhor
-picam2.configure(picam2.create_preview_configuration(main={"format": 'XRGB8888', "size": (3280, 2464)}))
+# QR_FRAME_SOURCE=<diretorio ou video> reproduz frames gravados no lugar da camera
+FRAME_SOURCE = os.environ.get('QR_FRAME_SOURCE')
 
-picam2.start()
+# Captura em YUV420 entregando so o plano Y (cinza) em buffers pre-alocados: sem cvtColor e
+# sem alocar um frame de 3280x2464 a cada captura. Buffers em uso ao mesmo tempo: anel +
+# workers + fila de exibicao (2) + captura, resultados e exibicao (1 cada)
+qr_config = VISION_CONFIG['qr_code']
+camera = AGVCamera(camera_id=0, width=3280, height=2464, source=FRAME_SOURCE, gray=True,
+                   pool_size=qr_config['frame_ring_size'] + qr_config['decode_workers'] + 5,
+                   loop_source=False)  # Usando cmera 1 como no cdigo que funcionou melhor
+camera.initialize()
+if not camera.initialized:
+    # Sem camera a captura so devolveria None: abortar em vez de rodar o pipeline vazio
+    raise SystemExit("Camera nao inicializada; abortando")
 
 detected_qrs = set()  # Para evitar enviar duplicatas
-active_qrs = []  # Lista de QR codes ativos com posies para manter na tela
-frame_count = 0  # Contador de frames
-process_every_n_frames = 3  # Processar a cada 2 frames para mais FPS
 prev_time = 0
 fps = 0
 
+def processar_qr(data, obj):
+    """Roda na etapa de resultados do pipeline (consulta HTTP fora da thread de exibicao)"""
+    # Com rastreamento, chamado quando o codigo entra em vista (nao a cada frame)
+    if data in detected_qrs and pipeline.tracker is None:
+        return
+    detected_qrs.add(data)
+
+    # Diferenciar entre itens e localizaes
+
+    if "Corredor" in data or "_SubCorredor" in data:
+        # Trata como localizao (marcao de lugar no estoque)
+        print(f"Localizao detectada: {data}")
+        # Aqui voc pode adicionar lgica para navegao (ex: mover AGV para essa posio)
+        # Por exemplo, parsear corredor e sub-corredor
+        if "_SubCorredor" in data:
+            corredor, sub = data.split("_SubCorredor")
+            print(f"  Corredor: {corredor}, Sub-corredor: {sub}")
+        else:
+            print(f"  Corredor: {data}")
+    else:
+        # Trata como item
+        try:
+            response = requests.get(f"{API_BASE_URL}/itens/tag/{data}")
+            if response.status_code == 200:
+                item = response.json()
+                print(f"Item detectado: {item['nome']} - Posio: ({item['posicao_x']}, {item['posicao_y']})")
+                # Aqui voc pode adicionar lgica para pegar o item
+            else:
+                print(f"QR de item detectado mas no encontrado: {data}")
+        except Exception as e:
+            print(f"Erro ao conectar  API para item: {e}")
+
+# Captura, decodificacao (varios workers, so na area de deteccao do VISION_CONFIG) e consultas
+# em threads separadas; substitui o antigo process_every_n_frames
+pipeline = QRPipeline(
+    camera.capture_frame,
+    on_detection=processar_qr,
+    tracker=create_tracker(),
+    on_leave=lambda data: print(f"QR saiu de vista: {data}"),
+    decoder_factory=lambda: QRDecoder(clip_limit=1.5, tile_grid=(16, 16)),
+    release_frame=camera.release_frame
+)
+pipeline.start()
+
 while(True):
+    result = pipeline.get_result()
+    if result is None:
+        if pipeline.finished:
+            break  # Fim dos frames gravados
+        continue
+
     current_time = time.time()
     if prev_time > 0:
         fps = 1 / (current_time - prev_time)
     prev_time = current_time
 
-    frame = picam2.capture_array()
-    frame_count += 1
-
-    # Processar apenas a cada N frames para melhorar FPS
-    if frame_count % process_every_n_frames == 0:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # CLAHE otimizado para velocidade
-        clahe = cv2.createCLAHE(clipLimit=1.5, tileGridSize=(16,16))  # Menos processamento
-        enhanced = clahe.apply(gray)
-
-        decoded_objects = pyzbar.decode(enhanced)
-        
-        for obj in decoded_objects:
-            (x, y, w, h) = obj.rect
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+    # Copia colorida so para desenhar/exibir; o buffer volta ao pool em seguida
+    frame = cv2.cvtColor(result.frame, cv2.COLOR_GRAY2BGR)
+    pipeline.release(result)
+
+    for obj in result.decoded:
+        (x, y, w, h) = obj.rect
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
 
-            data = obj.data.decode('utf-8')
-            cv2.putText(frame, data, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-            # Adicionar  lista de ativos se novo
-            if data not in [qr['data'] for qr in active_qrs]:
-                active_qrs.append({'data': data, 'x': x, 'y': y, 'w': w, 'h': h})
-
-            # Diferenciar entre itens e localizaes
-            if data not in detected_qrs:
-                detected_qrs.add(data)
-                if "Corredor" in data or "_SubCorredor" in data:
-                    # Trata como localizao (marcao de lugar no estoque)
-                    print(f"Localizao detectada: {data}")
-                    # Aqui voc pode adicionar lgica para navegao (ex: mover AGV para essa posio)
-                    # Por exemplo, parsear corredor e sub-corredor
-                    if "_SubCorredor" in data:
-                        corredor, sub = data.split("_SubCorredor")
-                        print(f"  Corredor: {corredor}, Sub-corredor: {sub}")
-                    else:
-                        print(f"  Corredor: {data}")
-                else:
-                    # Trata como item
-                    try:
-                        response = requests.get(f"{API_BASE_URL}/itens/tag/{data}")
-                        if response.status_code == 200:
-                            item = response.json()
-                            print(f"Item detectado: {item['nome']} - Posio: ({item['posicao_x']}, {item['posicao_y']})")
-                            # Aqui voc pode adicionar lgica para pegar o item
-                        else:
-                            print(f"QR de item detectado mas no encontrado: {data}")
-                    except Exception as e:
-                        print(f"Erro ao conectar  API para item: {e}")
-
-    # Desenhar todos os QR ativos na tela (para manter marcados)
-    for qr in active_qrs:
-        cv2.rectangle(frame, (qr['x'], qr['y']), (qr['x'] + qr['w'], qr['y'] + qr['h']), (0, 255, 0), 2)
-        cv2.putText(frame, qr['data'], (qr['x'], qr['y'] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        data = obj.data.decode('utf-8')
+        cv2.putText(frame, data, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+    # Desenhar os QR codes em vista (rastreados), mesmo nos frames em que nao foram relidos
+    if pipeline.tracker:
+        for qr in pipeline.tracker.active_tracks():
+            (x, y, w, h) = qr['rect']
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            cv2.putText(frame, qr['data'], (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
 
     cv2.putText(frame, f"FPS: {fps:.1f}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    cv2.putText(frame, f"Decode: {result.decode_ms:.1f} ms  Latencia: {result.latency_ms:.0f} ms",
+                (10, 65), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    draw_roi(frame)
     cv2.imshow("Leitor de QR Code", frame)
 
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
-    elif cv2.waitKey(1) & 0xFF == ord('r'):
-        active_qrs.clear()
-        print("Lista de QR codes ativos resetada")
 
-picam2.stop()
+pipeline.stop()
+camera.release()
 cv2.destroyAllWindows()
+
+stats = pipeline.stats()
+if stats['decoded']:
+    print(f"Decodificacao: {stats['decode_fps']:.1f} frames/s com {stats['workers']} workers, "
+          f"{stats['avg_decode_ms']:.1f} ms/frame, latencia media {stats['avg_latency_ms']:.0f} ms")
+pool = camera.pool.stats()
+print(f"Pool de frames: {pool['size']} buffers de {pool['buffer_bytes'] // 1024} KB, "
+      f"{pool['misses']} alocacoes fora do pool")
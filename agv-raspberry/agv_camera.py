@@ -6,27 +6,71 @@ Suporte para múltiplas câmeras chinesas CSI
 
 import cv2
 import os
-from picamera2 import Picamera2
+import queue
+import threading
 import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from config import HARDWARE_CONFIG
+from frame_pool import FramePool
+
+# Frames por câmera aguardando par (cabe no pool junto com os pares na fila e em uso)
+MAX_PENDING_FRAMES = 4
+
+# Par estéreo: timestamps em segundos no relógio de capture_clock()
+StereoPair = namedtuple('StereoPair', 'frame1 frame2 timestamp1 timestamp2 skew_ms latency_ms')
+
+
+def capture_clock() -> float:
+    """Relógio dos timestamps de captura (o mesmo do SensorTimestamp do Picamera2)"""
+    if hasattr(time, 'CLOCK_BOOTTIME'):
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+    return time.monotonic()
+
 
 class AGVCamera:
-    def __init__(self, camera_id=0, width=640, height=480):
-        """Inicializar câmera AGV"""
+    def __init__(self, camera_id=0, width=640, height=480, source=None,
+                 gray=False, pool_size=4, loop_source=True):
+        """
+        Inicializar câmera AGV
+        source: diretório de imagens ou vídeo gravado no lugar da câmera
+        gray: capturar em YUV420 e entregar só o plano Y (tons de cinza), sem conversão de cor
+        pool_size: buffers pré-alocados; frames capturados são views nesses buffers e
+                   devem ser devolvidos com release_frame()
+        """
         self.camera_id = camera_id
         self.width = width
         self.height = height
+        self.source = source
+        self.gray = gray
+        self.loop_source = loop_source
         self.picam2 = None
         self.initialized = False
+        self.last_timestamp = None  # Instante de captura do último frame (capture_clock)
+
+        shape = (height, width) if gray else (height, width, 3)
+        self.pool = FramePool(shape, pool_size)
 
     def initialize(self):
         """Inicializar a câmera"""
         try:
             print(f"📷 Inicializando câmera {self.camera_id}...")
+            if self.source:
+                from frame_source import ReplayFrameSource
+                self.picam2 = ReplayFrameSource(self.source, loop=self.loop_source,
+                                                size=(self.width, self.height))
+                self.initialized = True
+                print(f"✅ Câmera {self.camera_id} reproduzindo frames gravados: {self.source}")
+                return
+
+            from picamera2 import Picamera2
             self.picam2 = Picamera2(camera_num=self.camera_id)
 
-            # Configuração para câmeras chinesas CSI
+            # Configuração para câmeras chinesas CSI; em YUV420 o plano Y já é a imagem em cinza
             config = self.picam2.create_preview_configuration(
-                main={"format": 'XRGB8888', "size": (self.width, self.height)}
+                main={"format": 'YUV420' if self.gray else 'XRGB8888', "size": (self.width, self.height)}
             )
             self.picam2.configure(config)
 
@@ -41,18 +85,53 @@ class AGVCamera:
             self.initialized = False
 
     def capture_frame(self):
-        """Capturar um frame da câmera"""
+        """
+        Capturar um frame da câmera para um buffer do pool.
+        O frame continua válido até ser devolvido com release_frame().
+        """
         if not self.initialized:
             return None
 
+        buffer = self.pool.allocate()
         try:
-            frame = self.picam2.capture_array()
-            frame_bgr = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            return frame_bgr
+            if self.source:
+                frame = self.picam2.capture_array()  # Frames gravados já estão em BGR
+                self.last_timestamp = capture_clock()
+                if self.gray:
+                    cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=buffer)
+                else:
+                    np.copyto(buffer, frame)
+                return buffer
+
+            # Ler direto do buffer DMA da câmera, sem o array intermediário do capture_array()
+            from picamera2 import MappedArray
+            request = self.picam2.capture_request()
+            try:
+                # Início da exposição (ns), no mesmo relógio de capture_clock()
+                sensor_ns = request.get_metadata().get('SensorTimestamp')
+                self.last_timestamp = sensor_ns / 1e9 if sensor_ns else capture_clock()
+                with MappedArray(request, 'main') as mapped:
+                    # Linhas podem ter padding (stride > largura): recortar só a área útil
+                    if self.gray:
+                        np.copyto(buffer, mapped.array[:self.height, :self.width])
+                    else:
+                        cv2.cvtColor(mapped.array[:self.height, :self.width], cv2.COLOR_BGR2RGB, dst=buffer)
+            finally:
+                request.release()
+            return buffer
+        except EOFError:
+            self.pool.release(buffer)
+            raise  # Fim dos frames gravados (loop_source=False)
         except Exception as e:
+            self.pool.release(buffer)
             print(f"❌ Erro ao capturar frame câmera {self.camera_id}: {e}")
             return None
 
+    def release_frame(self, frame):
+        """Devolver o buffer do frame ao pool"""
+        if frame is not None:
+            self.pool.release(frame)
+
     def release(self):
         """Liberar câmera"""
         if self.picam2:
@@ -61,10 +140,35 @@ class AGVCamera:
         self.initialized = False
 
 class AGVDualCamera:
-    """Sistema de duas câmeras para AGV"""
-    def __init__(self, width1=640, height1=480, width2=1280, height2=720):
-        self.camera1 = AGVCamera(camera_id=0, width=width1, height=height1)
-        self.camera2 = AGVCamera(camera_id=1, width=width2, height=height2)
+    """
+    Sistema de duas câmeras para AGV
+    Com start_streaming(), cada câmera captura na própria thread, no FPS nativo, e os
+    frames são pareados pelo timestamp mais próximo dentro de uma tolerância.
+    """
+    def __init__(self, width1=640, height1=480, width2=1280, height2=720, gray=False, pool_size=8,
+                 tolerance_ms=None):
+        self.camera1 = AGVCamera(camera_id=0, width=width1, height=height1, gray=gray, pool_size=pool_size)
+        self.camera2 = AGVCamera(camera_id=1, width=width2, height=height2, gray=gray, pool_size=pool_size)
+        # Diferença máxima entre os timestamps de um par (padrão: meio período de frame)
+        self.tolerance_ms = tolerance_ms or HARDWARE_CONFIG['camera'].get('stereo_tolerance_ms', 15)
+
+        self.streaming = False
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._recent = (deque(), deque())  # (timestamp, frame) ainda não pareados, por câmera
+        self._pairs = queue.Queue(maxsize=2)
+        self._reset_metrics()
+
+    def _reset_metrics(self):
+        self.frames_captured = [0, 0]
+        self.pairs = 0
+        self.unmatched = 0
+        self.dropped_pairs = 0
+        self._skew_total = 0.0
+        self.max_skew_ms = 0.0
+        self._latency_total = 0.0
+        self._started_at = None
 
     def initialize(self):
         """Inicializar ambas as câmeras"""
@@ -77,8 +181,138 @@ class AGVDualCamera:
         else:
             print("❌ Nenhuma câmera pôde ser inicializada")
 
+    def start_streaming(self):
+        """Inicia a captura paralela (uma thread por câmera) e o pareamento por timestamp"""
+        if self.streaming:
+            return
+        if not (self.camera1.initialized and self.camera2.initialized):
+            print("⚠️ Captura sincronizada requer as duas câmeras; usando captura sequencial")
+            return
+        self._stop_event.clear()
+        self._reset_metrics()
+        self._started_at = capture_clock()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, args=(index, camera),
+                             name=f'camera-{camera.camera_id}', daemon=True)
+            for index, camera in enumerate((self.camera1, self.camera2))
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.streaming = True
+
+    def stop_streaming(self):
+        """Para as threads de captura e devolve os frames pendentes aos pools"""
+        if not self.streaming:
+            return
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        self.streaming = False
+
+        with self._lock:
+            for index, camera in enumerate((self.camera1, self.camera2)):
+                while self._recent[index]:
+                    camera.release_frame(self._recent[index].popleft()[1])
+        while True:
+            try:
+                pair = self._pairs.get_nowait()
+            except queue.Empty:
+                break
+            self.release_frames(pair.frame1, pair.frame2)
+
+    def _capture_loop(self, index, camera):
+        while not self._stop_event.is_set():
+            try:
+                frame = camera.capture_frame()
+            except EOFError:
+                break
+            if frame is None:
+                time.sleep(0.01)
+                continue
+
+            with self._lock:
+                self._recent[index].append((camera.last_timestamp, frame))
+                self.frames_captured[index] += 1
+                self._match()
+
+    def _match(self):
+        """
+        Pareia frames pendentes (chamado com o lock). Para o frame mais antigo da câmera 1,
+        escolhe o frame da câmera 2 com timestamp mais próximo; só decide quando a câmera 2
+        já tem um frame posterior (senão um par melhor ainda pode chegar).
+        """
+        recent1, recent2 = self._recent
+        tolerance = self.tolerance_ms / 1000
+
+        while recent1 and recent2:
+            timestamp1, frame1 = recent1[0]
+            if recent2[-1][0] < timestamp1:
+                break  # Câmera 2 ainda não chegou a timestamp1: um par melhor pode chegar
+
+            best = min(range(len(recent2)), key=lambda i: abs(recent2[i][0] - timestamp1))
+            timestamp2, frame2 = recent2[best]
+
+            if abs(timestamp2 - timestamp1) > tolerance:
+                # Sem par possível: descartar o frame mais antigo dos dois
+                if timestamp1 < recent2[0][0]:
+                    self.camera1.release_frame(recent1.popleft()[1])
+                else:
+                    self.camera2.release_frame(recent2.popleft()[1])
+                self.unmatched += 1
+                continue
+
+            recent1.popleft()
+            for _ in range(best):
+                # Frames da câmera 2 anteriores ao par não serão mais usados
+                self.camera2.release_frame(recent2.popleft()[1])
+                self.unmatched += 1
+            recent2.popleft()
+            self._emit(frame1, frame2, timestamp1, timestamp2)
+
+        # Câmera atrasada ou parada: não acumular frames da outra
+        for index, camera in enumerate((self.camera1, self.camera2)):
+            while len(self._recent[index]) > MAX_PENDING_FRAMES:
+                camera.release_frame(self._recent[index].popleft()[1])
+                self.unmatched += 1
+
+    def _emit(self, frame1, frame2, timestamp1, timestamp2):
+        skew_ms = abs(timestamp2 - timestamp1) * 1000
+        latency_ms = (capture_clock() - min(timestamp1, timestamp2)) * 1000
+        self.pairs += 1
+        self._skew_total += skew_ms
+        self.max_skew_ms = max(self.max_skew_ms, skew_ms)
+        self._latency_total += latency_ms
+
+        pair = StereoPair(frame1, frame2, timestamp1, timestamp2, skew_ms, latency_ms)
+        try:
+            self._pairs.put_nowait(pair)
+        except queue.Full:
+            # Consumidor lento: o par mais antigo é descartado
+            try:
+                old = self._pairs.get_nowait()
+                self.release_frames(old.frame1, old.frame2)
+                self.dropped_pairs += 1
+            except queue.Empty:
+                pass
+            self._pairs.put_nowait(pair)
+
+    def get_pair(self, timeout=1.0):
+        """Próximo par sincronizado (StereoPair) ou None; devolver com release_frames()"""
+        try:
+            return self._pairs.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
     def capture_frames(self):
-        """Capturar frames de ambas as câmeras"""
+        """
+        Capturar frames de ambas as câmeras (buffers dos pools; devolver com release_frames).
+        Com streaming ativo, retorna o próximo par sincronizado.
+        """
+        if self.streaming:
+            pair = self.get_pair()
+            return (pair.frame1, pair.frame2) if pair else (None, None)
+
         frame1 = self.camera1.capture_frame() if self.camera1.initialized else None
         frame2 = self.camera2.capture_frame() if self.camera2.initialized else None
         return frame1, frame2
@@ -92,8 +326,28 @@ class AGVDualCamera:
             print("⚠️ Sistema estéreo incompleto")
             return frame1, frame2
 
+    def stats(self):
+        """FPS por câmera, pares formados, skew e latência dos pares"""
+        elapsed = capture_clock() - self._started_at if self._started_at else 0
+        return {
+            'camera_fps': [count / elapsed if elapsed else 0.0 for count in self.frames_captured],
+            'pair_fps': self.pairs / elapsed if elapsed else 0.0,
+            'pairs': self.pairs,
+            'unmatched_frames': self.unmatched,
+            'dropped_pairs': self.dropped_pairs,
+            'avg_skew_ms': self._skew_total / self.pairs if self.pairs else None,
+            'max_skew_ms': self.max_skew_ms,
+            'avg_latency_ms': self._latency_total / self.pairs if self.pairs else None
+        }
+
+    def release_frames(self, frame1, frame2):
+        """Devolver os buffers de um par de frames aos pools das câmeras"""
+        self.camera1.release_frame(frame1)
+        self.camera2.release_frame(frame2)
+
     def release(self):
         """Liberar ambas as câmeras"""
+        self.stop_streaming()
         self.camera1.release()
         self.camera2.release()
 
@@ -117,6 +371,7 @@ if __name__ == "__main__":
                 cv2.imwrite(f"camera2_test_{i+1}.jpg", frame2)
                 print(f"💾 Câmera 2: camera2_test_{i+1}.jpg")
 
+            dual_camera.release_frames(frame1, frame2)
             time.sleep(1)
 
         print("✅ Teste do sistema dual de câmeras concluído!")
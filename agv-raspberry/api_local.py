@@ -292,52 +292,26 @@ class RaspberryAPI:
             })
 
     def _execute_motor_command(self, direction, duration):
-        """Executa comando de movimento nos motores via ESP32"""
+        """Executa comando de movimento nos motores via sessão ESP32 já aberta"""
         try:
             logger.info(f"Executando movimento REAL: {direction} por {duration}s")
 
-            # Importar controlador ESP32
-            from esp32_control import ESP32Controller
-
-            # Criar controlador com porta específica
-            esp32 = ESP32Controller(port='/dev/ttyACM0')
-
-            # Conectar ao ESP32
-            logger.info("Conectando ao ESP32...")
-            if not esp32.connect():
-                logger.error("Falha ao conectar com ESP32")
-                return {
-                    'success': False,
-                    'message': 'Falha ao conectar com ESP32',
-                    'direction': direction,
-                    'duration': duration,
-                    'error': 'ESP32 não conectado',
-                    'timestamp': datetime.now().isoformat()
-                }
-
-            logger.info("ESP32 conectado, executando movimento...")
-
-            # Executar movimento baseado na direção
-            if direction == 'forward':
-                result = esp32.move_forward(duration)
-                logger.info(f"Movimento para frente executado: {result}")
-            elif direction == 'backward':
-                result = esp32.move_backward(duration)
-                logger.info(f"Movimento para trás executado: {result}")
-            else:
-                esp32.disconnect()
+            esp32 = getattr(self.agv_system, 'esp32', None)
+            if esp32 is None:
+                logger.error("Sessão ESP32 não inicializada")
                 return {
                     'success': False,
-                    'message': f'Direção inválida: {direction}',
+                    'message': 'Sessão ESP32 não inicializada',
                     'direction': direction,
                     'duration': duration,
-                    'error': 'Direção não suportada',
+                    'error': 'ESP32 desabilitado ou hardware não inicializado',
                     'timestamp': datetime.now().isoformat()
                 }
 
-            # Desconectar
-            esp32.disconnect()
-            logger.info("ESP32 desconectado")
+            # Porta já aberta: o comando vai direto para a serial
+            result = esp32.move(direction, duration)
+            result.setdefault('direction', direction)
+            result.setdefault('duration', duration)
 
             # Retornar resultado
             result['timestamp'] = datetime.now().isoformat()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark do planejamento de caminho
+Planeja da base até todas as posições de estante do layout (NAVIGATION_CONFIG)
+e entre pares aleatórios de posições, com A* comum e com jump point search.
+
+Uso: python benchmark_path.py [pares_aleatorios]
+"""
+
+import random
+import sys
+import time
+
+from config import NAVIGATION_CONFIG
+from path_planner import AStarPlanner, WarehouseLayout
+
+
+def posicoes_estante(layout):
+    """Todas as posições (corredor, sub_corredor, posicao_x) do layout, em cm"""
+    config = layout.layout
+    sub_corredores = config['aisle_length'] // config['sub_aisle_length']
+    por_sub = config['sub_aisle_length'] // config['slot_spacing']
+    return [layout.slot_position(corredor, sub, posicao)
+            for corredor in range(1, config['aisles'] + 1)
+            for sub in range(1, sub_corredores + 1)
+            for posicao in range(1, por_sub + 1)]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(int(round(p / 100 * (len(ordenados) - 1))), len(ordenados) - 1)]
+
+
+def executar(nome, planner, trechos):
+    tempos = []
+    expandidos = 0
+    comprimento = 0.0
+    for inicio, fim in trechos:
+        t0 = time.perf_counter()
+        caminho = planner.plan(inicio, fim)
+        tempos.append((time.perf_counter() - t0) * 1000)
+        expandidos += planner.expanded
+        if caminho:
+            comprimento += planner.path_length(caminho)
+
+    print(f"{nome:<8} médio {sum(tempos) / len(tempos):>7.2f} ms   p99 {percentil(tempos, 99):>7.2f} ms   "
+          f"máx {max(tempos):>7.2f} ms   {expandidos / len(trechos):>7.0f} nós/caminho   "
+          f"{comprimento / 100:.0f} m no total")
+    return comprimento
+
+
+def main():
+    pares = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    layout = WarehouseLayout()
+    t0 = time.perf_counter()
+    grid = layout.build_grid().inflated()
+    t1 = time.perf_counter()
+    astar = AStarPlanner(grid)
+    jps = AStarPlanner(grid, use_jps=True)
+    t2 = time.perf_counter()
+
+    ocupadas = grid.cells.mean() * 100
+    print(f"🧪 Planejamento de caminho: mapa {NAVIGATION_CONFIG['map_size']} cm, "
+          f"grade {grid.width}x{grid.height} ({ocupadas:.0f}% bloqueada após margem de "
+          f"{NAVIGATION_CONFIG['safety_margin']} cm)")
+    print(f"   Grade + inflação: {(t1 - t0) * 1000:.1f} ms; planejadores (com tabelas JPS): "
+          f"{(t2 - t1) * 1000:.1f} ms")
+
+    posicoes = posicoes_estante(layout)
+    rng = random.Random(42)
+    cenarios = [
+        ('Base -> cada posição', [(layout.base, posicao) for posicao in posicoes]),
+        (f'{pares} pares aleatórios', [tuple(rng.sample(posicoes, 2)) for _ in range(pares)]),
+    ]
+
+    for titulo, trechos in cenarios:
+        print(f"\n📍 {titulo} ({len(trechos)} caminhos)")
+        total_astar = executar('A*', astar, trechos)
+        total_jps = executar('JPS', jps, trechos)
+        if abs(total_astar - total_jps) > 1e-6 * max(total_astar, 1):
+            print("⚠️ Comprimentos diferentes entre A* e JPS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Benchmark da decodificação de QR codes sem câmera
+Roda o QRDecoder sobre frames sintéticos (QR codes gerados com conteúdo conhecido)
+ou gravados (diretório de imagens/vídeo) e compara resoluções, ajustes de CLAHE e
+estratégias de ROI: frames/s, latência p50/p90/p99 e taxa de acerto.
+
+Uso: python benchmark_qr.py [fonte] [--frames N] [--json arquivo]
+  fonte: diretório de imagens ou vídeo; sem fonte, gera frames sintéticos.
+         Para medir acerto com frames gravados, coloque um labels.json no
+         diretório ({"arquivo.jpg": ["TAG001", ...]}).
+"""
+
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from config import VISION_CONFIG
+from frame_source import ReplayFrameSource
+from qr_decoder import QRDecoder, roi_bounds
+from qr_tracker import QRTracker
+
+RESOLUCOES = [(640, 480), (1280, 720), (1920, 1080)]
+
+# (nome, clip_limit, tile_grid, contrast_threshold); clip_limit None = sem CLAHE,
+# contrast_threshold 0 = CLAHE em todo frame, None = só em baixo contraste (VISION_CONFIG)
+AJUSTES_CLAHE = [
+    ('clahe 2.0/8x8', 2.0, (8, 8), 0),
+    ('clahe adaptativo', 2.0, (8, 8), None),
+    ('clahe 1.5/16x16', 1.5, (16, 16), 0),
+    ('sem clahe', None, None, 0),
+]
+
+# full: frame inteiro em resolução total; roi: área de detecção + redução de escala;
+# roi+tracking: como roi, mas relendo só as janelas dos códigos em vista
+ESTRATEGIAS = ['full', 'roi', 'roi+tracking']
+
+
+def gerar_frames_sinteticos(largura, altura, quantidade, semente=42):
+    """
+    Frames com um QR code que atravessa a área de detecção, com ruído, iluminação
+    irregular e desfoque; 1 em cada 4 frames é escuro/de baixo contraste.
+    Retorna [(frame, [conteúdos esperados])].
+    """
+    rng = np.random.default_rng(semente)
+    encoder = cv2.QRCodeEncoder.create()
+    x1, y1, x2, y2 = roi_bounds((altura, largura))
+
+    # Gradiente de iluminação fixo (CLAHE tem efeito visível)
+    gradiente = np.linspace(0.55, 1.0, largura, dtype=np.float32)[None, :]
+
+    frames = []
+    tag = None
+    lado = 0
+    for indice in range(quantidade):
+        # Um código novo a cada 20 frames; 1 em cada 10 frames sem código
+        if indice % 20 == 0:
+            tag = f"ITEM{indice // 20:03d}"
+            modulos = encoder.encode(tag)
+            lado = int(rng.uniform(0.12, 0.25) * altura)
+            qr = cv2.resize(modulos, (lado, lado), interpolation=cv2.INTER_NEAREST)
+
+        fundo = rng.normal(150, 20, (altura, largura)).clip(0, 255).astype(np.float32)
+        esperado = []
+        if indice % 10 != 9:
+            progresso = (indice % 20) / 20
+            x = int(x1 + progresso * max(x2 - x1 - lado, 0))
+            y = int(y1 + (y2 - y1 - lado) / 2 + 0.1 * (y2 - y1) * np.sin(indice / 3))
+            y = min(max(y, y1), max(y2 - lado, y1))
+            fundo[y:y + lado, x:x + lado] = qr
+            esperado = [tag]
+
+        imagem = fundo * gradiente
+        if indice % 4 == 3:
+            imagem = imagem * 0.25 + 10  # Subexposto
+        cinza = cv2.GaussianBlur(imagem, (3, 3), 0).clip(0, 255).astype(np.uint8)
+        frames.append((cv2.cvtColor(cinza, cv2.COLOR_GRAY2BGR), esperado))
+    return frames
+
+
+def carregar_frames_gravados(caminho, largura, altura, quantidade):
+    """Frames de um diretório/vídeo redimensionados; esperado vem do labels.json (se houver)"""
+    rotulos = None
+    arquivo_rotulos = os.path.join(caminho, 'labels.json') if os.path.isdir(caminho) else None
+    if arquivo_rotulos and os.path.exists(arquivo_rotulos):
+        with open(arquivo_rotulos) as f:
+            rotulos = json.load(f)
+
+    fonte = ReplayFrameSource(caminho, size=(largura, altura))
+    frames = []
+    while len(frames) < quantidade:
+        ok, frame = fonte.read()
+        if not ok:
+            break
+        esperado = rotulos.get(fonte.current_name, []) if rotulos is not None else None
+        frames.append((frame, esperado))
+    fonte.release()
+    return frames
+
+
+def criar_decodificador(estrategia, clip_limit, tile_grid, contrast_threshold):
+    if estrategia == 'full':
+        decoder = QRDecoder(detection_area=(0.0, 1.0, 0.0, 1.0), clip_limit=clip_limit,
+                            tile_grid=tile_grid or (8, 8), contrast_threshold=contrast_threshold)
+        decoder.scale = 1.0
+        return decoder
+    return QRDecoder(clip_limit=clip_limit, tile_grid=tile_grid or (8, 8),
+                     contrast_threshold=contrast_threshold)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(int(round(p / 100 * (len(ordenados) - 1))), len(ordenados) - 1)]
+
+
+def executar(frames, estrategia, clip_limit, tile_grid, contrast_threshold):
+    """Decodifica os frames em sequência e mede latência, acerto e custo do pré-processamento"""
+    decoder = criar_decodificador(estrategia, clip_limit, tile_grid, contrast_threshold)
+    tracker = QRTracker() if estrategia == 'roi+tracking' else None
+
+    latencias = []
+    preprocess_ms = 0.0
+    esperados = encontrados = falsos = 0
+    inicio = time.perf_counter()
+    for seq, (frame, esperado) in enumerate(frames):
+        t0 = time.perf_counter()
+        if tracker and not tracker.needs_full_scan(seq):
+            decoded = decoder.decode_regions(frame, tracker.search_regions())
+        else:
+            decoded = decoder.decode(frame)
+        if tracker:
+            tracker.update(seq, decoded)
+        latencias.append((time.perf_counter() - t0) * 1000)
+        preprocess_ms += decoder.last_timing['preprocess_ms']
+
+        if esperado is not None:
+            lidos = {obj.data.decode('utf-8') for obj in decoded}
+            esperados += len(esperado)
+            encontrados += len(lidos & set(esperado))
+            falsos += len(lidos - set(esperado))
+    duracao = time.perf_counter() - inicio
+
+    return {
+        'fps': len(frames) / duracao if duracao else 0.0,
+        'p50_ms': percentil(latencias, 50),
+        'p90_ms': percentil(latencias, 90),
+        'p99_ms': percentil(latencias, 99),
+        'hit_rate': encontrados / esperados if esperados else None,
+        'false_positives': falsos,
+        'escalations': decoder.escalations,
+        'preprocess_ms': preprocess_ms / len(frames),
+        'enhanced': decoder.preprocessor.enhanced
+    }
+
+
+def main():
+    args = sys.argv[1:]
+    quantidade = 100
+    saida_json = None
+    fonte = None
+    while args:
+        arg = args.pop(0)
+        if arg == '--frames':
+            quantidade = int(args.pop(0))
+        elif arg == '--json':
+            saida_json = args.pop(0)
+        else:
+            fonte = arg
+
+    area = VISION_CONFIG['qr_code'].get('detection_area')
+    print(f"🧪 Benchmark de QR: {quantidade} frames {'de ' + fonte if fonte else 'sintéticos'}, "
+          f"área de detecção {area}")
+    print(f"{'resolução':<11} {'clahe':<16} {'estratégia':<13} {'fps':>8} {'p50':>7} {'p90':>7} "
+          f"{'p99':>7} {'acerto':>7} {'pré-proc':>9}")
+
+    resultados = []
+    for largura, altura in RESOLUCOES:
+        if fonte:
+            frames = carregar_frames_gravados(fonte, largura, altura, quantidade)
+        else:
+            frames = gerar_frames_sinteticos(largura, altura, quantidade)
+        if not frames:
+            print(f"❌ Nenhum frame lido de {fonte}")
+            return 1
+
+        preprocess_sempre = {}
+        for nome_clahe, clip_limit, tile_grid, contrast_threshold in AJUSTES_CLAHE:
+            for estrategia in ESTRATEGIAS:
+                r = executar(frames, estrategia, clip_limit, tile_grid, contrast_threshold)
+                acerto = f"{r['hit_rate'] * 100:.0f}%" if r['hit_rate'] is not None else '-'
+                print(f"{largura}x{altura:<6} {nome_clahe:<16} {estrategia:<13} {r['fps']:>8.1f} "
+                      f"{r['p50_ms']:>6.1f}ms {r['p90_ms']:>5.1f}ms {r['p99_ms']:>5.1f}ms {acerto:>7} "
+                      f"{r['preprocess_ms']:>7.2f}ms")
+
+                # CPU economizada pelo CLAHE adaptativo em relação a aplicar em todo frame
+                if contrast_threshold == 0 and clip_limit == 2.0:
+                    preprocess_sempre[estrategia] = r['preprocess_ms']
+                elif contrast_threshold is None and estrategia in preprocess_sempre:
+                    r['preprocess_saved_ms'] = preprocess_sempre[estrategia] - r['preprocess_ms']
+                    print(f"{'':<31} ↳ CLAHE em {r['enhanced']}/{len(frames)} frames, "
+                          f"{r['preprocess_saved_ms']:.2f} ms/frame economizados")
+                r.update({'resolution': f"{largura}x{altura}", 'clahe': nome_clahe,
+                          'strategy': estrategia, 'frames': len(frames)})
+                resultados.append(r)
+
+    if saida_json:
+        with open(saida_json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+        print(f"💾 Resultados salvos em {saida_json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
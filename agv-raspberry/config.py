@@ -23,13 +23,16 @@ HARDWARE_CONFIG = {
         'resolution': (640, 480),
         'fps': 30,
         'qr_detection': True,
-        'device': 0  # /dev/video0
+        'device': 0,  # /dev/video0
+        'stereo_tolerance_ms': 15  # Diferença máxima de timestamp num par estéreo (meio frame a 30 FPS)
     },
     'esp32': {
         'enabled': True,
-        'port': '/dev/ttyUSB0',  # Porta USB do ESP32
+        'port': os.getenv('ESP32_PORT'),  # Porta USB do ESP32 (sem valor: cache/auto-detecção)
         'baudrate': 115200,
-        'timeout': 1
+        'timeout': 1,
+        'health_interval': 5,  # Ping de saúde da sessão serial (segundos)
+        'protocol': os.getenv('ESP32_PROTOCOL', 'auto')  # 'auto' (binário se suportado) ou 'json'
     },
     'motors': {
         'max_speed': 100,  # Velocidade máxima (%)
@@ -58,7 +61,12 @@ SYSTEM_CONFIG = {
     'backup_interval': 3600,  # Backup a cada hora
     'heartbeat_interval': 10,  # Heartbeat a cada 10 segundos
     'status_update_interval': 5,  # Atualização de status a cada 5 segundos
-    'command_poll_interval': 2,  # Verificação de comandos a cada 2 segundos
+    'command_poll_interval': 2,  # Espera antes de tentar novamente após erro de comunicação
+    'command_long_poll_timeout': 25,  # Long-polling: PC segura a requisição até haver comando
+    'agv_code': os.getenv('AGV_CODE', 'AGV001'),  # Código do dispositivo no backend
+    # Buscar pedidos no PC: desligado até a coleta estar implementada, senão o AGV
+    # assume pedidos que não consegue executar
+    'command_consumer_enabled': os.getenv('AGV_COMMAND_CONSUMER', '0') == '1',
     'data_sync_interval': 60  # Sincronização de dados a cada minuto
 }
 
@@ -69,7 +77,18 @@ NAVIGATION_CONFIG = {
     'safety_margin': 20,  # Margem de segurança em cm
     'max_path_length': 500,  # Comprimento máximo do caminho em cm
     'path_planning_algorithm': 'astar',  # Algoritmo de planejamento de caminho
-    'obstacle_detection_range': 50  # Alcance de detecção de obstáculos em cm
+    'jump_point_search': True,  # A* com jump point search (mesmo custo, menos nós expandidos)
+    'obstacle_detection_range': 50,  # Alcance de detecção de obstáculos em cm
+    'layout': {
+        'base': (50, 50),  # Posição da base de recarga/entrega em cm
+        'aisle_origin': (150, 100),  # Centro do corredor 1 (x) e início das estantes (y) em cm
+        'aisles': 4,  # Quantidade de corredores
+        'aisle_spacing': 200,  # Distância entre centros de corredores em cm
+        'lane_width': 100,  # Largura livre de cada corredor em cm
+        'aisle_length': 800,  # Comprimento das estantes em cm
+        'sub_aisle_length': 250,  # Comprimento de cada sub-corredor em cm
+        'slot_spacing': 50  # Distância entre posições (posicao_x) de um sub-corredor em cm
+    }
 }
 
 # Configurações de visão computacional
@@ -79,7 +98,19 @@ VISION_CONFIG = {
         'detection_area': (0.2, 0.8, 0.2, 0.8),  # Área de detecção (x1, x2, y1, y2)
         'min_size': 50,  # Tamanho mínimo do QR code em pixels
         'max_size': 300,  # Tamanho máximo do QR code em pixels
-        'confidence_threshold': 0.7  # Limite de confiança para detecção
+        'confidence_threshold': 0.7,  # Limite de confiança para detecção
+        'decode_workers': 3,  # Threads de decodificação (uma fica para captura/exibição)
+        'frame_ring_size': 4,  # Frames aguardando decodificação (excedentes são descartados)
+        'preprocessing': {
+            'contrast_threshold': 96,  # CLAHE só abaixo desta faixa dinâmica (níveis de cinza); 0 = sempre
+            'sample_step': 4  # Amostragem de 1 a cada N pixels por eixo no teste de histograma
+        },
+        'tracking': {
+            'enabled': True,
+            'full_scan_interval': 5,  # Varredura completa a cada N frames (códigos novos)
+            'max_misses': 5,  # Frames sem leitura até considerar que o código saiu de vista
+            'search_margin': 0.5  # Folga da janela de busca (fração do tamanho do código)
+        }
     },
     'obstacle_detection': {
         'enabled': True,
@@ -5,20 +5,21 @@ Script para detectar automaticamente portas USB do ESP32
 
 import serial
 import serial.tools.list_ports
-import time
 import sys
 
+import esp32_discovery
+
 def list_usb_ports():
     """Lista todas as portas USB disponíveis"""
-    ports = serial.tools.list_ports.comports()
     usb_ports = []
 
     print("🔍 Procurando portas USB disponíveis...")
 
-    for port in ports:
-        if 'USB' in port.device or 'ACM' in port.device:
-            usb_ports.append(port.device)
-            print(f"   📡 Porta encontrada: {port.device} - {port.description}")
+    for port in esp32_discovery.list_candidates():
+        usb_ports.append(port.device)
+        conhecido = esp32_discovery.KNOWN_USB_IDS.get((port.vid, port.pid))
+        marcador = f" [{conhecido}]" if conhecido else ""
+        print(f"   📡 Porta encontrada: {port.device} - {port.description}{marcador}")
 
     if not usb_ports:
         print("   ❌ Nenhuma porta USB encontrada")
@@ -26,41 +27,6 @@ def list_usb_ports():
 
     return usb_ports
 
-def test_port(port, baudrate=115200, timeout=2):
-    """Testa se uma porta específica responde como ESP32"""
-    try:
-        print(f"   🧪 Testando porta {port}...")
-
-        # Tentar abrir a porta
-        ser = serial.Serial(port, baudrate, timeout=timeout)
-
-        # Aguardar um pouco para estabilizar
-        time.sleep(1)
-
-        # Enviar comando de ping
-        ping_command = '{"command": "ping", "timestamp": ' + str(time.time()) + '}\n'
-        ser.write(ping_command.encode('utf-8'))
-        ser.flush()
-
-        # Aguardar resposta
-        response = ser.readline().decode('utf-8').strip()
-
-        ser.close()
-
-        if response:
-            print(f"   ✅ Resposta recebida: {response}")
-            return True
-        else:
-            print(f"   ⚠️  Porta responde mas sem dados JSON")
-            return False
-
-    except serial.SerialException as e:
-        print(f"   ❌ Erro na porta {port}: {e}")
-        return False
-    except Exception as e:
-        print(f"   ❌ Erro inesperado na porta {port}: {e}")
-        return False
-
 def find_esp32_port():
     """Procura automaticamente pela porta do ESP32"""
     print("🤖 Procurando ESP32 conectado...\n")
@@ -72,14 +38,13 @@ def find_esp32_port():
         print("💡 Verifique se o ESP32 está conectado e ligado")
         return None
 
-    print(f"\n🧪 Testando {len(usb_ports)} porta(s) encontrada(s)...\n")
-
-    for port in usb_ports:
-        if test_port(port):
-            print(f"\n🎉 ESP32 encontrado na porta: {port}")
-            return port
+    print(f"\n🧪 Testando {len(usb_ports)} porta(s) encontrada(s) em paralelo...\n")
 
-        print()  # Linha em branco entre testes
+    # Adaptadores conhecidos primeiro, depois as demais portas (sempre testando de verdade)
+    port = esp32_discovery.find_port(use_cache=False)
+    if port:
+        print(f"🎉 ESP32 encontrado na porta: {port}")
+        return port
 
     print("❌ ESP32 não encontrado em nenhuma porta USB")
     print("💡 Possíveis causas:")
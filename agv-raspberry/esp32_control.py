@@ -8,67 +8,72 @@ import serial
 import time
 import logging
 import json
-from typing import Optional, Dict, Any
+import threading
+import itertools
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Optional, Dict, Any, Callable, List
+
+import esp32_discovery
+from esp32_protocol import BINARY_PROTOCOL_VERSION, FrameDecoder, encode_command
 
 logger = logging.getLogger(__name__)
 
 class ESP32Controller:
     """Controlador para comunicação com ESP32 via serial"""
 
-    def __init__(self, port: str = None, baudrate: int = 115200, timeout: float = 2.0):
-        self.default_port = port or '/dev/ttyUSB0'
-        self.port = self.default_port
+    def __init__(self, port: str = None, baudrate: int = 115200, timeout: float = 2.0,
+                 protocol: str = 'auto'):
+        """
+        Protocolo: JSON por linha; se o firmware ecoar o campo "id", ativa o modo com id.
+        Com protocol='auto', usa frames binários (esp32_protocol) quando o firmware anuncia
+        suporte; protocol='json' força JSON.
+        """
+        # Porta configurada é respeitada; sem porta, usa cache/auto-detecção a partir da padrão
+        self.port_was_explicit = port is not None
+        self.port = port or '/dev/ttyUSB0'
         self.baudrate = baudrate
         self.timeout = timeout
+        self.protocol = protocol
         self.serial_connection: Optional[serial.Serial] = None
         self.connected = False
 
-        logger.info(f"ESP32 Controller inicializado - Porta: {self.port}, Baudrate: {baudrate}")
+        # Protocolo com id de requisição (negociado no connect): várias requisições
+        # em voo, respostas despachadas por uma thread leitora
+        self.pipelined = False
+        self.binary = False
+        self._decoder = FrameDecoder()
+        self._sequence = itertools.count()
+        self._pending: Dict[int, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._reader_thread: Optional[threading.Thread] = None
+        self._telemetry_callbacks: List[Callable[[Dict[str, Any]], None]] = []
+        self.last_telemetry: Optional[Dict[str, Any]] = None
 
-    def _auto_detect_port(self) -> Optional[str]:
-        """Tenta detectar automaticamente a porta do ESP32"""
-        import serial.tools.list_ports
+        logger.info(f"ESP32 Controller inicializado - Porta: {self.port}, Baudrate: {baudrate}")
 
+    def _auto_detect_port(self, use_cache: bool = True) -> Optional[str]:
+        """Tenta detectar automaticamente a porta do ESP32 (cache, depois teste paralelo)"""
         logger.info("🔍 Procurando ESP32 automaticamente...")
 
-        ports = serial.tools.list_ports.comports()
-        usb_ports = [port.device for port in ports if 'USB' in port.device or 'ACM' in port.device]
-
-        for port in usb_ports:
-            logger.debug(f"Testando porta: {port}")
-            try:
-                # Tentar conectar rapidamente
-                test_serial = serial.Serial(port, self.baudrate, timeout=1)
-
-                # Enviar ping
-                ping_cmd = {'command': 'ping', 'timestamp': time.time()}
-                test_serial.write((json.dumps(ping_cmd) + '\n').encode('utf-8'))
-                test_serial.flush()
-
-                # Aguardar resposta
-                response = test_serial.readline().decode('utf-8').strip()
-                test_serial.close()
-
-                if response:
-                    try:
-                        response_data = json.loads(response)
-                        if response_data.get('status') in ['ok', 'success']:
-                            logger.info(f"✅ ESP32 encontrado na porta: {port}")
-                            return port
-                    except json.JSONDecodeError:
-                        pass
-
-            except (serial.SerialException, OSError):
-                continue
+        port = esp32_discovery.find_port(self.baudrate, timeout=self.timeout, use_cache=use_cache)
+        if port:
+            logger.info(f"✅ ESP32 encontrado na porta: {port}")
+        else:
+            logger.warning("❌ ESP32 não encontrado automaticamente")
+        return port
 
-        logger.warning("❌ ESP32 não encontrado automaticamente")
-        return None
+    def set_port(self, port: str):
+        """Fixa a porta serial: connect() passa a usá-la sem auto-detecção"""
+        self.port = port
+        self.port_was_explicit = True
 
     def connect(self) -> bool:
         """Estabelece conexão serial com ESP32"""
         try:
             # Se porta foi especificada explicitamente, não fazer auto-detecção
-            if self.port != self.default_port:
+            auto_detect = not self.port_was_explicit
+            if not auto_detect:
                 # Porta específica fornecida - tentar conectar diretamente
                 try:
                     self.serial_connection = serial.Serial(
@@ -81,7 +86,11 @@ class ESP32Controller:
                     logger.error(f"❌ Porta especificada {self.port} não disponível: {e}")
                     return False
             else:
-                # Porta padrão - tentar auto-detecção
+                # Sem porta configurada - usar a última porta válida (cache por número de série), se houver
+                cached = esp32_discovery.cached_port()
+                if cached:
+                    self.port = cached
+
                 try:
                     self.serial_connection = serial.Serial(
                         port=self.port,
@@ -93,7 +102,7 @@ class ESP32Controller:
                     logger.warning(f"❌ Porta padrão {self.port} não disponível: {e}")
 
                     # Tentar auto-detecção
-                    auto_port = self._auto_detect_port()
+                    auto_port = self._auto_detect_port(use_cache=False)
                     if auto_port:
                         logger.info(f"🔄 Tentando porta detectada automaticamente: {auto_port}")
                         self.port = auto_port
@@ -115,11 +124,23 @@ class ESP32Controller:
             # Testar conexão enviando comando de status
             if self._test_connection():
                 self.connected = True
-                logger.info(f"✅ Conectado ao ESP32 na porta {self.port}")
+                esp32_discovery.remember_port(self.port)
+                if self.pipelined:
+                    self._start_reader()
+                logger.info(f"✅ Conectado ao ESP32 na porta {self.port} "
+                            f"(protocolo {self.protocol_name})")
                 return True
             else:
                 logger.warning(f"❌ ESP32 não respondeu na porta {self.port}")
                 self.serial_connection.close()
+
+                if auto_detect:
+                    # Porta do cache/padrão não é o ESP32: procurar nas demais
+                    esp32_discovery.forget_port()
+                    auto_port = self._auto_detect_port(use_cache=False)
+                    if auto_port and auto_port != self.port:
+                        self.port = auto_port
+                        return self.connect()
                 return False
 
         except serial.SerialException as e:
@@ -132,18 +153,27 @@ class ESP32Controller:
     def disconnect(self):
         """Desconecta do ESP32"""
         if self.serial_connection and self.serial_connection.is_open:
-            self.serial_connection.close()
             self.connected = False
+            self.serial_connection.close()
             logger.info("🔌 Desconectado do ESP32")
 
+        reader = self._reader_thread
+        if reader and reader is not threading.current_thread():
+            reader.join(timeout=self.timeout + 1)
+        self._reader_thread = None
+        self._fail_pending()
+
     def _test_connection(self) -> bool:
         """Testa se a conexão com ESP32 está funcionando"""
+        self.pipelined = False
+        self.binary = False
+
         try:
             # Aguardar ESP32 estabilizar
             time.sleep(2)
 
-            # Enviar comando de teste simples (igual ao debug_serial.py)
-            test_command = {'command': 'ping'}
+            # Ping com id: firmware que devolve o id suporta o protocolo com id
+            test_command = {'command': 'ping', 'id': 0}
             command_json = json.dumps(test_command) + '\n'
 
             # Enviar comando
@@ -157,6 +187,9 @@ class ESP32Controller:
                 try:
                     response = json.loads(response_line)
                     if response.get('status') == 'ok':
+                        self.pipelined = response.get('id') == 0
+                        self.binary = (self.pipelined and self.protocol == 'auto'
+                                       and response.get('binary') == BINARY_PROTOCOL_VERSION)
                         return True
                 except json.JSONDecodeError:
                     pass
@@ -167,12 +200,165 @@ class ESP32Controller:
             logger.debug(f"Erro no teste de conexão: {e}")
             return False
 
-    def _send_command(self, command: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    @property
+    def protocol_name(self) -> str:
+        if self.binary:
+            return 'binário'
+        return 'com id' if self.pipelined else 'simples'
+
+    def _start_reader(self):
+        """Inicia a thread que lê a serial e despacha respostas/telemetria"""
+        self._decoder = FrameDecoder()
+        self._reader_thread = threading.Thread(target=self._reader_loop, name='esp32-reader', daemon=True)
+        self._reader_thread.start()
+
+    def _reader_loop(self):
+        """Lê linhas da serial: respostas (com id) vão para o Future, o resto é telemetria"""
+        try:
+            while self.connected and self.serial_connection and self.serial_connection.is_open:
+                try:
+                    messages = self._read_messages()
+                except (serial.SerialException, OSError, TypeError) as e:
+                    if self.connected:
+                        logger.error(f"Porta serial perdida: {e}")
+                    self.connected = False
+                    break
+
+                for message in messages:
+                    try:
+                        self._dispatch_message(message)
+                    except Exception as e:
+                        # Mensagem malformada não pode derrubar a thread leitora
+                        logger.error(f"Erro ao processar mensagem do ESP32 {message!r}: {e}")
+        finally:
+            self._fail_pending()
+
+    def _read_messages(self) -> List[Dict[str, Any]]:
+        """Lê o que chegou na serial (frames binários ou uma linha JSON)"""
+        if self.binary:
+            data = self.serial_connection.read(self.serial_connection.in_waiting or 1)
+            return self._decoder.feed(data) if data else []
+
+        line = self.serial_connection.readline()
+        if not line:
+            return []
+
+        try:
+            return [json.loads(line.decode('utf-8').strip())]
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            logger.warning(f"Linha inválida do ESP32: {line!r}")
+            return []
+
+    def _dispatch_message(self, message: Dict[str, Any]):
+        """Entrega a resposta ao Future do comando; mensagem sem id é telemetria"""
+        if not isinstance(message, dict):
+            logger.warning(f"Mensagem inválida do ESP32 (esperado objeto JSON): {message!r}")
+            return
+
+        message_id = message.get('id')
+        if message_id is None:
+            self._handle_telemetry(message)
+            return
+
+        with self._pending_lock:
+            future = self._pending.pop(message_id, None)
+
+        if future:
+            future.set_result(message)
+        else:
+            logger.debug(f"Resposta sem requisição pendente (atrasada?): {message}")
+
+    def _fail_pending(self):
+        """Libera quem está esperando resposta (conexão caiu)"""
+        with self._pending_lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+
+        for future in pending:
+            if not future.done():
+                future.set_result(None)
+
+    def _handle_telemetry(self, message: Dict[str, Any]):
+        """Mensagem não solicitada (telemetria, aviso de boot, ...)"""
+        self.last_telemetry = message
+        for callback in self._telemetry_callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(f"Erro no callback de telemetria: {e}")
+
+    def add_telemetry_callback(self, callback: Callable[[Dict[str, Any]], None]):
+        """Registra função chamada a cada frame de telemetria do ESP32"""
+        self._telemetry_callbacks.append(callback)
+
+    def pending_count(self) -> int:
+        """Quantidade de comandos aguardando resposta"""
+        with self._pending_lock:
+            return len(self._pending)
+
+    def send_command_async(self, command: Dict[str, Any]) -> Optional[Future]:
+        """Envia comando com id sem bloquear; o Future recebe a resposta (ou None)"""
+        if not self.connected or not self.serial_connection or not self.pipelined:
+            return None
+
+        # Ids de 1 a 65535 (cabem no SEQ do frame binário); 0 fica para o handshake
+        command_id = next(self._sequence) % 0xFFFF + 1
+        future = Future()
+        future.command_id = command_id
+
+        # Codificar antes de registrar: valor inválido não deixa entrada órfã em _pending
+        try:
+            # Comandos sem opcode binário seguem em JSON (o firmware aceita os dois)
+            data = encode_command(command_id, command) if self.binary else None
+            if data is None:
+                data = (json.dumps(dict(command, id=command_id)) + '\n').encode('utf-8')
+        except (ValueError, TypeError, KeyError) as e:
+            logger.error(f"Comando inválido {command}: {e}")
+            future.set_result({'status': 'error', 'message': str(e), 'error': str(e), 'id': command_id})
+            return future
+
+        with self._pending_lock:
+            self._pending[command_id] = future
+
+        try:
+            with self._write_lock:
+                self.serial_connection.write(data)
+                self.serial_connection.flush()
+            logger.debug(f"📤 Comando {command_id} enviado: {command}")
+        except (serial.SerialException, OSError) as e:
+            logger.error(f"Porta serial perdida: {e}")
+            self.connected = False
+            with self._pending_lock:
+                self._pending.pop(command_id, None)
+            # _fail_pending (thread leitora) pode já ter liberado este Future
+            if not future.done():
+                future.set_result(None)
+
+        return future
+
+    def _send_command(self, command: Dict[str, Any], timeout: float = None) -> Optional[Dict[str, Any]]:
         """Envia comando para ESP32 e aguarda resposta"""
         if not self.connected or not self.serial_connection:
             logger.error("ESP32 não está conectado")
             return None
 
+        if self.pipelined:
+            future = self.send_command_async(command)
+            if future is None:
+                # A thread de leitura marcou a conexão como perdida entre as verificações
+                logger.error("ESP32 desconectado antes do envio")
+                return None
+            try:
+                response = future.result(timeout or self.timeout)
+                logger.debug(f"📥 Resposta recebida: {response}")
+                return response
+            except FutureTimeoutError:
+                # Só este comando perde a resposta; os demais em voo seguem normalmente
+                with self._pending_lock:
+                    self._pending.pop(future.command_id, None)
+                logger.warning(f"Nenhuma resposta do ESP32 para: {command}")
+                return None
+
         try:
             # Converter comando para JSON
             command_json = json.dumps(command) + '\n'
@@ -201,10 +387,20 @@ class ESP32Controller:
         except serial.SerialTimeoutException:
             logger.error("Timeout na comunicação serial")
             return None
+        except (serial.SerialException, OSError) as e:
+            # Porta caiu (cabo USB, reset do ESP32): sessão precisa reconectar
+            logger.error(f"Porta serial perdida: {e}")
+            self.connected = False
+            return None
         except Exception as e:
             logger.error(f"Erro na comunicação serial: {e}")
             return None
 
+    def ping(self) -> bool:
+        """Verifica se o ESP32 responde na conexão já aberta"""
+        response = self._send_command({'command': 'ping'})
+        return bool(response and response.get('status') in ['ok', 'success'])
+
     def move_forward(self, duration: float = 1.0) -> Dict[str, Any]:
         """Move o AGV para frente por determinado tempo"""
         command = {
@@ -216,7 +412,8 @@ class ESP32Controller:
 
         logger.info(f"🚗 Movendo para frente por {duration}s")
 
-        response = self._send_command(command)
+        # ESP32 só responde após concluir o movimento
+        response = self._send_command(command, timeout=self.timeout + duration)
 
         if response and response.get('status') == 'success':
             logger.info("✅ Movimento para frente concluído")
@@ -247,7 +444,8 @@ class ESP32Controller:
 
         logger.info(f"🚗 Movendo para trás por {duration}s")
 
-        response = self._send_command(command)
+        # ESP32 só responde após concluir o movimento
+        response = self._send_command(command, timeout=self.timeout + duration)
 
         if response and response.get('status') == 'success':
             logger.info("✅ Movimento para trás concluído")
@@ -312,6 +510,31 @@ class ESP32Controller:
                 'message': 'Falha ao obter status do ESP32'
             }
 
+    def drive(self, left_angle: int, right_angle: int) -> Dict[str, Any]:
+        """
+        Define os ângulos dos servos sem bloquear (controle em malha fechada).
+        O ESP32 responde imediatamente e mantém os servos até o próximo comando.
+        """
+        response = self._send_command({
+            'command': 'drive',
+            'left_angle': left_angle,
+            'right_angle': right_angle
+        })
+
+        if response and response.get('status') == 'success':
+            return {'success': True, 'left_angle': left_angle, 'right_angle': right_angle}
+
+        error_msg = response.get('error', 'Erro desconhecido') if response else 'Sem resposta'
+        return {'success': False, 'message': f'Falha ao acionar servos: {error_msg}'}
+
+    def enable_telemetry(self, interval_ms: int = 1000) -> bool:
+        """Pede ao ESP32 frames periódicos de telemetria (apenas protocolo com id)"""
+        if not self.pipelined:
+            return False
+
+        response = self._send_command({'command': 'telemetry', 'interval_ms': interval_ms})
+        return bool(response and response.get('status') == 'success')
+
     def set_speed(self, speed: int) -> Dict[str, Any]:
         """Define velocidade dos motores (não suportado para servo motores)"""
         logger.warning("⚠️ Controle de velocidade não disponível para servo motores")
@@ -322,6 +545,140 @@ class ESP32Controller:
             'note': 'Servo motors operate at fixed speed'
         }
 
+class ESP32Session:
+    """
+    Sessão serial persistente com o ESP32, supervisionada por uma thread que
+    conecta (e reconecta) automaticamente e envia pings periódicos de saúde.
+    Comandos de movimento vão direto para a porta já aberta.
+    """
+
+    def __init__(self, port: str = None, baudrate: int = 115200, timeout: float = 2.0,
+                 health_interval: float = 5.0, reconnect_delay: float = 2.0,
+                 protocol: str = 'auto'):
+        self.controller = ESP32Controller(port=port, baudrate=baudrate, timeout=timeout,
+                                          protocol=protocol)
+        self.health_interval = health_interval
+        self.reconnect_delay = reconnect_delay
+        self.reconnects = 0
+        self.last_ping: Optional[float] = None
+
+        self._lock = threading.Lock()  # Um comando por vez na serial
+        self._stop_event = threading.Event()
+        self._connected_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def connected(self) -> bool:
+        return self.controller.connected
+
+    def start(self):
+        """Inicia a thread de supervisão (conexão em segundo plano)"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._supervise, name='esp32-session', daemon=True)
+        self._thread.start()
+        logger.info("🔁 Sessão ESP32 iniciada")
+
+    def stop(self):
+        """Para a supervisão, os motores e fecha a porta"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.controller.timeout + 5)
+
+        with self._lock:
+            if self.controller.connected:
+                self.controller.stop()
+            self.controller.disconnect()
+        self._connected_event.clear()
+        logger.info("🔌 Sessão ESP32 encerrada")
+
+    def wait_connected(self, timeout: float = None) -> bool:
+        """Aguarda a sessão ficar conectada"""
+        return self._connected_event.wait(timeout)
+
+    def _supervise(self):
+        """Mantém a conexão viva: reconecta quando cai e faz ping periódico"""
+        while not self._stop_event.is_set():
+            if not self.controller.connected:
+                self._connected_event.clear()
+
+                with self._lock:
+                    self.controller.disconnect()
+                    connected = self.controller.connect()
+
+                if connected:
+                    self.last_ping = time.time()
+                    self._connected_event.set()
+                else:
+                    self.reconnects += 1
+                    self._stop_event.wait(self.reconnect_delay)
+                continue
+
+            self._stop_event.wait(self.health_interval)
+            if self._stop_event.is_set():
+                break
+
+            # Comando em andamento já prova que a porta está viva; não enfileirar ping
+            if self.controller.pipelined:
+                if self.controller.pending_count() > 0:
+                    continue
+                alive = self.controller.ping()
+            else:
+                if not self._lock.acquire(blocking=False):
+                    continue
+                try:
+                    alive = self.controller.ping()
+                finally:
+                    self._lock.release()
+
+            if alive:
+                self.last_ping = time.time()
+            else:
+                logger.warning("⚠️ ESP32 não respondeu ao ping, reconectando...")
+                self.controller.connected = False
+                self.reconnects += 1
+
+    def execute(self, method: str, *args, wait: float = 0) -> Dict[str, Any]:
+        """Executa um método do controlador na sessão aberta"""
+        if not self.controller.connected and not self.wait_connected(wait):
+            return {
+                'success': False,
+                'message': 'ESP32 não conectado',
+                'error': 'ESP32 não conectado'
+            }
+
+        # Protocolo com id aceita vários comandos em voo; o simples exige um por vez
+        if self.controller.pipelined:
+            return getattr(self.controller, method)(*args)
+
+        with self._lock:
+            return getattr(self.controller, method)(*args)
+
+    def move(self, direction: str, duration: float = 1.0) -> Dict[str, Any]:
+        """Move o AGV na direção indicada ('forward' ou 'backward')"""
+        if direction == 'forward':
+            return self.execute('move_forward', duration)
+        elif direction == 'backward':
+            return self.execute('move_backward', duration)
+
+        return {
+            'success': False,
+            'message': f'Direção inválida: {direction}',
+            'error': 'Direção não suportada'
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        """Status da sessão (para a API local)"""
+        return {
+            'connected': self.controller.connected,
+            'port': self.controller.port,
+            'protocol': self.controller.protocol_name,
+            'reconnects': self.reconnects,
+            'last_ping': self.last_ping
+        }
+
 # Instância global do controlador
 esp32_controller = ESP32Controller()
 
@@ -333,7 +690,7 @@ def get_esp32_controller() -> ESP32Controller:
 def connect_esp32(port: str = '/dev/ttyUSB0') -> bool:
     """Conecta ao ESP32"""
     controller = get_esp32_controller()
-    controller.port = port
+    controller.set_port(port)
     return controller.connect()
 
 def move_forward_esp32(duration: float = 1.0) -> Dict[str, Any]:
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Descoberta da porta serial do ESP32
+Testa as portas USB candidatas em paralelo (adaptadores USB-serial conhecidos
+primeiro) e guarda a última porta válida, identificada pelo número de série do
+dispositivo, para que um reinício conecte direto sem testar porta nenhuma
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List
+
+import serial
+import serial.tools.list_ports
+
+logger = logging.getLogger(__name__)
+
+# VID/PID dos adaptadores USB-serial usados em placas ESP32
+KNOWN_USB_IDS = {
+    (0x10C4, 0xEA60): 'CP210x',
+    (0x1A86, 0x7523): 'CH340',
+    (0x1A86, 0x55D4): 'CH9102',
+    (0x0403, 0x6001): 'FT232',
+    (0x303A, 0x1001): 'ESP32 USB nativo',
+}
+
+CACHE_FILE = os.getenv(
+    'ESP32_PORT_CACHE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.esp32_port_cache.json')
+)
+
+# Respostas do firmware que identificam o ESP32 (pong ou mensagem de boot)
+VALID_STATUS = ('ok', 'success', 'ready')
+
+
+def is_known_device(info) -> bool:
+    """Indica se a porta pertence a um adaptador USB-serial de ESP32 conhecido"""
+    return (info.vid, info.pid) in KNOWN_USB_IDS
+
+
+def device_key(info) -> str:
+    """Identificador estável do dispositivo (não muda se ttyUSB0 virar ttyUSB1)"""
+    if info.serial_number:
+        return info.serial_number
+    if info.vid is not None:
+        return f"{info.vid:04x}:{info.pid:04x}@{info.location}"
+    return info.device
+
+
+def list_candidates() -> List[Any]:
+    """Portas USB/ACM, com os adaptadores conhecidos primeiro"""
+    ports = [info for info in serial.tools.list_ports.comports()
+             if 'USB' in info.device or 'ACM' in info.device]
+    return sorted(ports, key=lambda info: (not is_known_device(info), info.device))
+
+
+def _load_cache() -> Dict[str, Any]:
+    try:
+        with open(CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache: Dict[str, Any]):
+    try:
+        with open(CACHE_FILE, 'w') as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        logger.debug(f"Não foi possível salvar cache da porta: {e}")
+
+
+def cached_port(candidates: List[Any] = None) -> Optional[str]:
+    """Porta atual do último ESP32 válido, sem abrir nenhuma porta"""
+    key = _load_cache().get('last')
+    if not key:
+        return None
+
+    for info in candidates if candidates is not None else list_candidates():
+        if device_key(info) == key:
+            return info.device
+    return None
+
+
+def remember_port(port: str):
+    """Guarda a porta em que o ESP32 respondeu"""
+    for info in list_candidates():
+        if info.device == port:
+            cache = _load_cache()
+            key = device_key(info)
+            cache['last'] = key
+            cache.setdefault('devices', {})[key] = {
+                'port': port,
+                'vid': info.vid,
+                'pid': info.pid,
+                'description': info.description,
+                'last_seen': time.time()
+            }
+            _save_cache(cache)
+            return
+
+
+def forget_port():
+    """Invalida o cache (ESP32 não respondeu na porta guardada)"""
+    cache = _load_cache()
+    if cache.pop('last', None):
+        _save_cache(cache)
+
+
+def probe_port(port: str, baudrate: int = 115200, timeout: float = 2.0) -> bool:
+    """Abre a porta, envia ping e aguarda uma resposta do firmware do AGV"""
+    try:
+        with serial.Serial(port, baudrate, timeout=0.2, write_timeout=timeout) as conn:
+            # Abrir a porta reinicia o ESP32: a mensagem de boot também serve como resposta
+            time.sleep(0.5)
+            conn.write((json.dumps({'command': 'ping'}) + '\n').encode('utf-8'))
+            conn.flush()
+
+            deadline = time.time() + timeout
+            while time.time() < deadline:
+                line = conn.readline()
+                if not line:
+                    continue
+                try:
+                    response = json.loads(line.decode('utf-8').strip())
+                except (UnicodeDecodeError, ValueError):
+                    continue
+                if isinstance(response, dict) and response.get('status') in VALID_STATUS:
+                    return True
+    except (serial.SerialException, OSError) as e:
+        logger.debug(f"Porta {port} indisponível: {e}")
+
+    return False
+
+
+def probe_ports(ports: List[str], baudrate: int = 115200, timeout: float = 2.0) -> Optional[str]:
+    """Testa as portas em paralelo e retorna a primeira que responder"""
+    if not ports:
+        return None
+
+    executor = ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix='esp32-probe')
+    try:
+        futures = {executor.submit(probe_port, port, baudrate, timeout): port for port in ports}
+        for future in as_completed(futures):
+            if future.result():
+                return futures[future]
+    finally:
+        # Testes ainda em andamento fecham a própria porta ao terminar
+        executor.shutdown(wait=False)
+
+    return None
+
+
+def find_port(baudrate: int = 115200, timeout: float = 2.0, use_cache: bool = True) -> Optional[str]:
+    """
+    Procura o ESP32: cache por número de série (sem testar), depois teste paralelo
+    dos adaptadores conhecidos e, por último, das demais portas USB/ACM.
+    """
+    candidates = list_candidates()
+
+    if use_cache:
+        port = cached_port(candidates)
+        if port:
+            logger.info(f"⚡ ESP32 em cache na porta {port}")
+            return port
+
+    known = [info.device for info in candidates if is_known_device(info)]
+    others = [info.device for info in candidates if not is_known_device(info)]
+
+    for group in (known, others):
+        port = probe_ports(group, baudrate, timeout)
+        if port:
+            remember_port(port)
+            return port
+
+    return None
@@ -1,7 +1,7 @@
 /*
  * Controle de Servo Motores AGV - ESP32
  * Recebe comandos via Serial do Raspberry Pi
- * Protocolo: JSON via Serial (115200 baud)
+ * Protocolo: JSON via Serial (115200 baud) ou frames binários (ver abaixo)
  *
  * Comandos suportados:
  * {"command": "ping"} - Teste de conectividade
@@ -9,11 +9,22 @@
  * {"command": "move", "direction": "backward", "duration": 1.0}
  * {"command": "stop"}
  * {"command": "status"}
+ * {"command": "telemetry", "interval_ms": 1000} - Telemetria periódica (0 desliga)
+ * {"command": "drive", "left_angle": 45, "right_angle": 135} - Sem bloquear (malha fechada)
  *
  * Respostas:
  * {"status": "ok"} - Comando executado com sucesso
  * {"status": "error", "message": "descrição do erro"}
  *
+ * Campo opcional "id": se o comando trouxer "id", a resposta devolve o mesmo
+ * "id" (permite vários comandos em voo no Raspberry). Mensagens sem "id"
+ * são não solicitadas: {"type": "telemetry", ...}
+ *
+ * Frames binários (anunciados no pong como "binary": 1, ver esp32_protocol.py):
+ * 0xA5 | LEN | SEQ (u16 LE) | OPCODE | PAYLOAD[LEN] | CRC16-CCITT (u16 LE)
+ * A resposta usa OPCODE | 0x80 e o primeiro byte do payload é o resultado (0 = ok).
+ * Cada comando é respondido no mesmo formato em que chegou.
+ *
  * Servo esquerdo (GPIO 1): 0°=frente, 180°=trás, 90°=parado
  * Servo direito (GPIO 3): 180°=frente, 0°=trás, 90°=parado
  */
@@ -43,6 +54,37 @@ Servo motorDir;  // Servo direito
 // Variáveis globais
 bool motorsEnabled = true;
 
+// Id do comando em processamento (-1 = comando sem id, protocolo antigo)
+long currentCommandId = -1;
+
+// Telemetria periódica (desligada até o Raspberry pedir)
+unsigned long telemetryIntervalMs = 0;
+unsigned long lastTelemetryMs = 0;
+
+// Protocolo binário
+#define BINARY_PROTOCOL_VERSION 1
+#define FRAME_SYNC       0xA5
+#define FRAME_HEADER     5     // SYNC, LEN, SEQ (2), OPCODE
+#define FRAME_MAX_PAYLOAD 32
+#define REPLY_FLAG       0x80
+
+#define OP_PING          0x01
+#define OP_MOVE          0x02
+#define OP_STOP          0x03
+#define OP_STATUS        0x04
+#define OP_TELEMETRY     0x05
+#define OP_DRIVE         0x06
+#define OP_TELEMETRY_FRAME 0x7F
+
+#define RESULT_OK            0
+#define RESULT_UNKNOWN_OP    2
+#define RESULT_BAD_PAYLOAD   3
+#define RESULT_BAD_DIRECTION 4
+
+uint8_t frameBuffer[FRAME_HEADER + FRAME_MAX_PAYLOAD + 2];
+int frameIndex = 0;           // 0 = fora de um frame binário
+bool telemetryBinary = false; // Formato da telemetria (o mesmo do comando que a ligou)
+
 // Buffer para dados JSON
 const size_t JSON_BUFFER_SIZE = 256;
 char jsonBuffer[JSON_BUFFER_SIZE];
@@ -74,6 +116,12 @@ void loop() {
   while (Serial.available() > 0) {
     char receivedChar = Serial.read();
 
+    // Frame binário: começa com o byte de sync fora de uma linha JSON
+    if (frameIndex > 0 || (bufferIndex == 0 && (uint8_t)receivedChar == FRAME_SYNC)) {
+      receiveFrameByte((uint8_t)receivedChar);
+      continue;
+    }
+
     // Verificar fim da mensagem (newline)
     if (receivedChar == '\n') {
       jsonBuffer[bufferIndex] = '\0';  // Null terminate
@@ -92,8 +140,14 @@ void loop() {
     }
   }
 
-  // Pequena pausa para não sobrecarregar CPU
-  delay(10);
+  // Telemetria periódica não solicitada
+  if (telemetryIntervalMs > 0 && millis() - lastTelemetryMs >= telemetryIntervalMs) {
+    lastTelemetryMs = millis();
+    sendTelemetry();
+  }
+
+  // Pequena pausa para não sobrecarregar CPU (curta: controle em malha fechada a 100 Hz)
+  delay(1);
 }
 
 void processCommand(const char* jsonString) {
@@ -103,11 +157,15 @@ void processCommand(const char* jsonString) {
   DeserializationError error = deserializeJson(doc, jsonString);
 
   if (error) {
+    currentCommandId = -1;
     String errorMsg = "JSON parse error: " + String(error.c_str());
     sendError(errorMsg.c_str());
     return;
   }
 
+  // Guardar id para ecoar na resposta
+  currentCommandId = doc.containsKey("id") ? doc["id"].as<long>() : -1;
+
   // Verificar se tem campo "command"
   if (!doc.containsKey("command")) {
     sendError("Missing 'command' field");
@@ -118,8 +176,8 @@ void processCommand(const char* jsonString) {
 
   // Processar comando
   if (command == "ping") {
-    // Comando de teste
-    sendResponse("ok", "pong");
+    // Comando de teste (anuncia suporte a frames binários)
+    sendPong();
 
   } else if (command == "move") {
     // Comando de movimento
@@ -175,6 +233,22 @@ void processCommand(const char* jsonString) {
     // Retornar status
     sendStatus();
 
+  } else if (command == "drive") {
+    // Ângulos diretos, sem bloquear
+    if (doc.containsKey("left_angle") && doc.containsKey("right_angle")) {
+      drive(doc["left_angle"], doc["right_angle"]);
+      sendResponse("success", "Drive set");
+    } else {
+      sendError("Missing 'left_angle' or 'right_angle' fields");
+    }
+
+  } else if (command == "telemetry") {
+    // Ligar/desligar telemetria periódica
+    telemetryIntervalMs = doc["interval_ms"] | 0;
+    telemetryBinary = false;
+    lastTelemetryMs = millis();
+    sendResponse("success", telemetryIntervalMs > 0 ? "Telemetry enabled" : "Telemetry disabled");
+
   } else {
     String errorMsg = "Unknown command: " + command;
     sendError(errorMsg.c_str());
@@ -238,6 +312,13 @@ void moveBackward(float duration) {
   stopMotors();
 }
 
+void drive(int leftAngle, int rightAngle) {
+  if (!motorsEnabled) return;
+
+  motorEsq.write(constrain(leftAngle, 0, 180));
+  motorDir.write(constrain(rightAngle, 0, 180));
+}
+
 void stopMotors() {
   // Posição neutra para ambos os servos (parado)
   motorEsq.write(SERVO_PARADO);
@@ -249,6 +330,7 @@ void sendResponse(const char* status, const char* message) {
   response["status"] = status;
   response["message"] = message;
   response["timestamp"] = millis();
+  if (currentCommandId >= 0) response["id"] = currentCommandId;
 
   serializeJson(response, Serial);
   Serial.println();
@@ -259,6 +341,19 @@ void sendError(const String& message) {
   response["status"] = "error";
   response["message"] = message;
   response["timestamp"] = millis();
+  if (currentCommandId >= 0) response["id"] = currentCommandId;
+
+  serializeJson(response, Serial);
+  Serial.println();
+}
+
+void sendPong() {
+  DynamicJsonDocument response(128);
+  response["status"] = "ok";
+  response["message"] = "pong";
+  response["binary"] = BINARY_PROTOCOL_VERSION;
+  response["timestamp"] = millis();
+  if (currentCommandId >= 0) response["id"] = currentCommandId;
 
   serializeJson(response, Serial);
   Serial.println();
@@ -267,6 +362,7 @@ void sendError(const String& message) {
 void sendStatus() {
   DynamicJsonDocument response(256);
   response["status"] = "ok";
+  if (currentCommandId >= 0) response["id"] = currentCommandId;
   response["motor_type"] = "servo";
   response["motors_enabled"] = motorsEnabled;
   response["uptime_ms"] = millis();
@@ -281,6 +377,149 @@ void sendStatus() {
   Serial.println();
 }
 
+void sendTelemetry() {
+  if (telemetryBinary) {
+    uint8_t state[7];
+    fillState(state);
+    sendFrame(0, OP_TELEMETRY_FRAME, state, sizeof(state));
+    return;
+  }
+
+  DynamicJsonDocument response(192);
+  response["type"] = "telemetry";
+  response["uptime_ms"] = millis();
+  response["motors_enabled"] = motorsEnabled;
+  response["servos"]["left_angle"] = motorEsq.read();
+  response["servos"]["right_angle"] = motorDir.read();
+
+  serializeJson(response, Serial);
+  Serial.println();
+}
+
+// ---------------------------------------------------------------------------
+// Protocolo binário
+// ---------------------------------------------------------------------------
+
+uint16_t crc16(const uint8_t* data, size_t length) {
+  // CRC16-CCITT (polinômio 0x1021, valor inicial 0xFFFF)
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < length; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+void receiveFrameByte(uint8_t byte) {
+  frameBuffer[frameIndex++] = byte;
+
+  if (frameIndex < FRAME_HEADER) return;
+
+  uint8_t length = frameBuffer[1];
+  if (length > FRAME_MAX_PAYLOAD) {
+    // Sync falso: descartar
+    frameIndex = 0;
+    return;
+  }
+
+  int total = FRAME_HEADER + length + 2;
+  if (frameIndex < total) return;
+
+  frameIndex = 0;
+
+  uint16_t received = frameBuffer[total - 2] | (frameBuffer[total - 1] << 8);
+  if (received != crc16(frameBuffer + 1, total - 3)) {
+    // CRC inválido: o Raspberry reenvia após o timeout
+    return;
+  }
+
+  uint16_t seq = frameBuffer[2] | (frameBuffer[3] << 8);
+  processFrame(seq, frameBuffer[4], frameBuffer + FRAME_HEADER, length);
+}
+
+void processFrame(uint16_t seq, uint8_t opcode, const uint8_t* payload, uint8_t length) {
+  switch (opcode) {
+    case OP_PING:
+    case OP_STOP:
+      if (opcode == OP_STOP) stopMotors();
+      sendResult(seq, opcode, RESULT_OK);
+      break;
+
+    case OP_MOVE: {
+      if (length < 3) { sendResult(seq, opcode, RESULT_BAD_PAYLOAD); break; }
+      float duration = (payload[1] | (payload[2] << 8)) / 1000.0;
+      if (payload[0] == 0) {
+        moveForward(duration);
+      } else if (payload[0] == 1) {
+        moveBackward(duration);
+      } else {
+        sendResult(seq, opcode, RESULT_BAD_DIRECTION);
+        break;
+      }
+      sendResult(seq, opcode, RESULT_OK);
+      break;
+    }
+
+    case OP_DRIVE:
+      if (length < 2) { sendResult(seq, opcode, RESULT_BAD_PAYLOAD); break; }
+      drive(payload[0], payload[1]);
+      sendResult(seq, opcode, RESULT_OK);
+      break;
+
+    case OP_STATUS: {
+      uint8_t reply[8];
+      reply[0] = RESULT_OK;
+      fillState(reply + 1);
+      sendFrame(seq, OP_STATUS | REPLY_FLAG, reply, sizeof(reply));
+      break;
+    }
+
+    case OP_TELEMETRY:
+      if (length < 2) { sendResult(seq, opcode, RESULT_BAD_PAYLOAD); break; }
+      telemetryIntervalMs = payload[0] | (payload[1] << 8);
+      telemetryBinary = true;
+      lastTelemetryMs = millis();
+      sendResult(seq, opcode, RESULT_OK);
+      break;
+
+    default:
+      sendResult(seq, opcode, RESULT_UNKNOWN_OP);
+  }
+}
+
+void fillState(uint8_t* state) {
+  // motores habilitados, ângulo esq., ângulo dir., uptime (u32 LE)
+  unsigned long uptime = millis();
+  state[0] = motorsEnabled ? 1 : 0;
+  state[1] = motorEsq.read();
+  state[2] = motorDir.read();
+  for (int i = 0; i < 4; i++) {
+    state[3 + i] = (uptime >> (8 * i)) & 0xFF;
+  }
+}
+
+void sendResult(uint16_t seq, uint8_t opcode, uint8_t result) {
+  sendFrame(seq, opcode | REPLY_FLAG, &result, 1);
+}
+
+void sendFrame(uint16_t seq, uint8_t opcode, const uint8_t* payload, uint8_t length) {
+  uint8_t frame[FRAME_HEADER + FRAME_MAX_PAYLOAD + 2];
+  frame[0] = FRAME_SYNC;
+  frame[1] = length;
+  frame[2] = seq & 0xFF;
+  frame[3] = seq >> 8;
+  frame[4] = opcode;
+  memcpy(frame + FRAME_HEADER, payload, length);
+
+  uint16_t crc = crc16(frame + 1, FRAME_HEADER - 1 + length);
+  frame[FRAME_HEADER + length] = crc & 0xFF;
+  frame[FRAME_HEADER + length + 1] = crc >> 8;
+
+  Serial.write(frame, FRAME_HEADER + length + 2);
+}
+
 void blinkLED(int times, int delayMs) {
   for (int i = 0; i < times; i++) {
     digitalWrite(LED_STATUS, HIGH);
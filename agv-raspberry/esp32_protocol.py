@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Protocolo binário Raspberry Pi <-> ESP32
+Frames compactos com cabeçalho fixo, opcode, payload e CRC, usados no lugar do
+JSON quando o firmware anuncia suporte no ping ("binary": versão)
+
+Formato do frame (inteiros little-endian):
+    SYNC (0xA5) | LEN (payload) | SEQ (u16) | OPCODE | PAYLOAD | CRC16 (u16)
+O CRC16-CCITT cobre LEN, SEQ, OPCODE e PAYLOAD.
+
+Respostas usam o opcode do comando com o bit 0x80 ligado e começam com um byte
+de resultado (0 = ok). O decodificador também aceita linhas JSON no meio do
+fluxo (mensagem de boot, comandos sem opcode binário).
+"""
+
+import json
+import struct
+from typing import Optional, Dict, Any, List
+
+BINARY_PROTOCOL_VERSION = 1
+
+FRAME_SYNC = 0xA5
+HEADER = struct.Struct('<BBHB')  # SYNC, LEN, SEQ, OPCODE
+CRC = struct.Struct('<H')
+MAX_PAYLOAD = 32
+
+# Opcodes dos comandos
+OP_PING = 0x01
+OP_MOVE = 0x02       # direção (u8), duração em ms (u16)
+OP_STOP = 0x03
+OP_STATUS = 0x04
+OP_TELEMETRY = 0x05  # intervalo em ms (u16), 0 desliga
+OP_DRIVE = 0x06      # ângulo esquerdo (u8), ângulo direito (u8), sem bloquear
+
+# Mensagens do ESP32
+REPLY_FLAG = 0x80
+OP_TELEMETRY_FRAME = 0x7F  # não solicitada, SEQ = 0
+
+RESULT_OK = 0
+
+MAX_MOVE_MS = 0xFFFF  # Duração máxima de um OP_MOVE (~65,5 s)
+
+DIRECTIONS = {'forward': 0, 'backward': 1}
+
+ERROR_MESSAGES = {
+    1: 'CRC inválido',
+    2: 'Opcode desconhecido',
+    3: 'Payload inválido',
+    4: 'Direção inválida',
+}
+
+# Status (u8 motores habilitados, u8 ângulo esq., u8 ângulo dir., u32 uptime)
+STATE = struct.Struct('<BBBI')
+
+
+def crc16_ccitt(data: bytes, crc: int = 0xFFFF) -> int:
+    """CRC16-CCITT (polinômio 0x1021, valor inicial 0xFFFF)"""
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+            crc &= 0xFFFF
+    return crc
+
+
+def encode_frame(seq: int, opcode: int, payload: bytes = b'') -> bytes:
+    """Monta um frame completo (cabeçalho + payload + CRC)"""
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"Payload muito grande: {len(payload)} bytes")
+
+    body = HEADER.pack(FRAME_SYNC, len(payload), seq & 0xFFFF, opcode) + payload
+    return body + CRC.pack(crc16_ccitt(body[1:]))
+
+
+def _checked(value: Any, maximum: int, field: str) -> int:
+    """Converte para int e valida o intervalo do campo (0 a maximum); ValueError se fora"""
+    number = int(value)
+    if not 0 <= number <= maximum:
+        raise ValueError(f"{field} fora do intervalo 0-{maximum}: {value}")
+    return number
+
+
+def encode_command(seq: int, command: Dict[str, Any]) -> Optional[bytes]:
+    """
+    Converte um comando no formato JSON do controlador para frame binário.
+    Retorna None se o comando não tiver opcode binário (enviar em JSON).
+    ValueError se algum valor não couber no campo do frame.
+    """
+    name = command.get('command')
+
+    if name == 'ping':
+        return encode_frame(seq, OP_PING)
+    if name == 'stop':
+        return encode_frame(seq, OP_STOP)
+    if name == 'status':
+        return encode_frame(seq, OP_STATUS)
+    if name == 'telemetry':
+        interval_ms = _checked(command.get('interval_ms', 0), 0xFFFF, 'Intervalo de telemetria (ms)')
+        return encode_frame(seq, OP_TELEMETRY, struct.pack('<H', interval_ms))
+    if name == 'move' and command.get('direction') in DIRECTIONS:
+        # Duração além do u16 é recusada: cortar em 65,5 s mudaria o movimento sem aviso
+        duration_ms = _checked(round(float(command.get('duration', 1.0)) * 1000), MAX_MOVE_MS, 'Duração (ms)')
+        return encode_frame(seq, OP_MOVE, struct.pack('<BH', DIRECTIONS[command['direction']], duration_ms))
+    if name == 'drive':
+        left_angle = _checked(command['left_angle'], 0xFF, 'Ângulo esquerdo')
+        right_angle = _checked(command['right_angle'], 0xFF, 'Ângulo direito')
+        return encode_frame(seq, OP_DRIVE, struct.pack('<BB', left_angle, right_angle))
+    return None
+
+
+def _state(payload: bytes) -> Dict[str, Any]:
+    motors_enabled, left_angle, right_angle, uptime_ms = STATE.unpack_from(payload)
+    return {
+        'motors_enabled': bool(motors_enabled),
+        'uptime_ms': uptime_ms,
+        'servos': {'left_angle': left_angle, 'right_angle': right_angle}
+    }
+
+
+def decode_message(seq: int, opcode: int, payload: bytes) -> Dict[str, Any]:
+    """Converte um frame recebido para o mesmo formato das respostas JSON"""
+    unexpected = {'status': 'error', 'message': f'Frame inesperado: opcode {opcode:#04x}', 'id': seq}
+
+    if opcode == OP_TELEMETRY_FRAME:
+        if len(payload) < STATE.size:
+            # Sem id: telemetria não responde a nenhuma requisição pendente
+            return {key: value for key, value in unexpected.items() if key != 'id'}
+        return dict(type='telemetry', **_state(payload))
+
+    if not opcode & REPLY_FLAG or not payload:
+        return unexpected
+
+    result = payload[0]
+    if result != RESULT_OK:
+        message = ERROR_MESSAGES.get(result, f'Erro {result}')
+        return {'status': 'error', 'message': message, 'error': message, 'id': seq}
+
+    command = opcode & ~REPLY_FLAG
+    if command == OP_PING:
+        return {'status': 'ok', 'message': 'pong', 'id': seq}
+    if command == OP_STATUS:
+        # Resposta truncada não tem o estado completo (STATE.size bytes após o resultado)
+        if len(payload) - 1 < STATE.size:
+            return unexpected
+        return dict(status='ok', id=seq, motor_type='servo', **_state(payload[1:]))
+    return {'status': 'success', 'id': seq}
+
+
+class FrameDecoder:
+    """Decodificador incremental: recebe bytes da serial e devolve mensagens completas"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.crc_errors = 0
+        self.discarded_bytes = 0
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """Acrescenta bytes recebidos e retorna as mensagens decodificadas"""
+        self._buffer.extend(data)
+        messages = []
+
+        while self._buffer:
+            first = self._buffer[0]
+
+            if first == FRAME_SYNC:
+                if len(self._buffer) < HEADER.size:
+                    break
+
+                _, length, seq, opcode = HEADER.unpack_from(self._buffer)
+                if length > MAX_PAYLOAD:
+                    # Byte de sync falso: descartar e procurar o próximo
+                    self._discard(1)
+                    continue
+
+                total = HEADER.size + length + CRC.size
+                if len(self._buffer) < total:
+                    break
+
+                frame = bytes(self._buffer[:total])
+                (crc,) = CRC.unpack_from(frame, total - CRC.size)
+                if crc != crc16_ccitt(frame[1:total - CRC.size]):
+                    self.crc_errors += 1
+                    self._discard(1)
+                    continue
+
+                del self._buffer[:total]
+                messages.append(decode_message(seq, opcode, frame[HEADER.size:total - CRC.size]))
+
+            elif first == ord('{'):
+                end = self._buffer.find(b'\n')
+                if end < 0:
+                    if len(self._buffer) > 1024:
+                        self._discard(len(self._buffer))
+                    break
+
+                line = bytes(self._buffer[:end])
+                del self._buffer[:end + 1]
+                try:
+                    messages.append(json.loads(line.decode('utf-8')))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    self.discarded_bytes += len(line)
+
+            else:
+                # Ruído ou '\r\n' entre mensagens
+                self._discard(1)
+
+        return messages
+
+    def _discard(self, count: int):
+        del self._buffer[:count]
+        self.discarded_bytes += count
+
+
+if __name__ == "__main__":
+    # Comparação de tamanho JSON x binário para os comandos mais comuns
+    exemplos = [
+        {'command': 'move', 'direction': 'forward', 'duration': 0.5, 'timestamp': 1700000000.123456},
+        {'command': 'drive', 'left_angle': 45, 'right_angle': 135},
+        {'command': 'status', 'timestamp': 1700000000.123456},
+    ]
+    for exemplo in exemplos:
+        json_bytes = len(json.dumps(dict(exemplo, id=1)) + '\n')
+        frame = encode_command(1, exemplo)
+        print(f"{exemplo['command']:<8} JSON: {json_bytes:>3} bytes   binário: {len(frame):>2} bytes")
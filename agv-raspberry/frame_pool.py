@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Pool de buffers de frame pré-alocados
+A captura copia o frame (ou só o plano Y, em tons de cinza) direto para um buffer
+livre do pool, sem alocar um array novo a cada frame; quem consome o frame o
+devolve com release() quando termina. Pool esgotado não trava a captura: o frame
+é alocado normalmente e contado em misses (sinal de que o pool é pequeno).
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+
+class FramePool:
+    """Buffers de mesmo formato reaproveitados entre capturas"""
+
+    def __init__(self, shape: Tuple[int, ...], size: int, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self._buffers = [np.empty(self.shape, dtype=dtype) for _ in range(size)]
+        self._owned = {id(buffer) for buffer in self._buffers}
+        self._free = deque(self._buffers)
+        self._free_ids = set(self._owned)
+        self._lock = threading.Lock()
+        self.misses = 0
+
+    def acquire(self) -> Optional[np.ndarray]:
+        """Buffer livre, ou None se todos estão em uso"""
+        with self._lock:
+            if not self._free:
+                self.misses += 1
+                return None
+            buffer = self._free.popleft()
+            self._free_ids.discard(id(buffer))
+            return buffer
+
+    def allocate(self) -> np.ndarray:
+        """Buffer livre ou, com o pool esgotado, um array novo (fora do pool)"""
+        buffer = self.acquire()
+        return buffer if buffer is not None else np.empty(self.shape, dtype=self.dtype)
+
+    def release(self, buffer):
+        """Devolve o buffer ao pool (arrays que não são do pool são ignorados)"""
+        key = id(buffer)
+        with self._lock:
+            if key in self._owned and key not in self._free_ids:
+                self._free.append(buffer)
+                self._free_ids.add(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'size': len(self._buffers),
+                'free': len(self._free),
+                'misses': self.misses,
+                'buffer_bytes': int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+            }
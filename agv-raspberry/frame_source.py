@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Fonte de frames gravados (diretório de imagens ou arquivo de vídeo)
+Substitui a câmera nos leitores de QR e no benchmark: expõe a mesma interface
+do Picamera2 (capture_array/start/stop) e do cv2.VideoCapture (read/isOpened/release)
+"""
+
+import os
+import time
+from typing import List, Optional
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+
+class ReplayFrameSource:
+    """Reproduz frames de um diretório de imagens ou de um vídeo"""
+
+    def __init__(self, path: str, loop: bool = False, fps: float = None, size=None):
+        self.path = path
+        self.loop = loop
+        self.fps = fps      # None = o mais rápido possível; valor = ritmo de câmera real
+        self.size = size    # (largura, altura) para redimensionar, se informado
+        self.exhausted = False
+        self.current_name: Optional[str] = None
+        self.frames_read = 0
+
+        self._files: List[str] = []
+        self._index = 0
+        self._video = None
+        self._next_frame_at = 0.0
+
+        if os.path.isdir(path):
+            self._files = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        elif os.path.isfile(path):
+            self._video = cv2.VideoCapture(path)
+        else:
+            raise FileNotFoundError(f"Fonte de frames não encontrada: {path}")
+
+    # Interface do cv2.VideoCapture
+
+    def isOpened(self) -> bool:
+        if self._video is not None:
+            return self._video.isOpened()
+        return bool(self._files)
+
+    def read(self):
+        """Retorna (ok, frame) como o cv2.VideoCapture"""
+        frame = self._next()
+        return frame is not None, frame
+
+    def set(self, prop, value):
+        # Resolução/FPS vêm do arquivo gravado
+        return False
+
+    def release(self):
+        if self._video is not None:
+            self._video.release()
+
+    # Interface do Picamera2
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self.release()
+
+    def capture_array(self):
+        """Próximo frame; EOFError quando a gravação termina (e loop=False)"""
+        frame = self._next()
+        if frame is None:
+            raise EOFError(f"Fim da fonte de frames: {self.path}")
+        return frame
+
+    def _next(self):
+        if self.exhausted:
+            return None
+
+        frame = self._read_raw()
+        if frame is None and self.loop and self.frames_read:
+            self._rewind()
+            frame = self._read_raw()
+
+        if frame is None:
+            self.exhausted = True
+            return None
+
+        if self.size and (frame.shape[1], frame.shape[0]) != tuple(self.size):
+            frame = cv2.resize(frame, tuple(self.size), interpolation=cv2.INTER_AREA)
+
+        if self.fps:
+            # Simular o ritmo da câmera
+            now = time.perf_counter()
+            if self._next_frame_at > now:
+                time.sleep(self._next_frame_at - now)
+            self._next_frame_at = max(now, self._next_frame_at) + 1.0 / self.fps
+
+        self.frames_read += 1
+        return frame
+
+    def _read_raw(self):
+        if self._video is not None:
+            ok, frame = self._video.read()
+            self.current_name = f"{os.path.basename(self.path)}#{self.frames_read}"
+            return frame if ok else None
+
+        while self._index < len(self._files):
+            file_path = self._files[self._index]
+            self._index += 1
+            frame = cv2.imread(file_path)
+            if frame is not None:
+                self.current_name = os.path.basename(file_path)
+                return frame
+        return None
+
+    def _rewind(self):
+        if self._video is not None:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._index = 0
@@ -26,10 +26,16 @@ logger = logging.getLogger(__name__)
 class AGVSystem:
     """Sistema principal do AGV no Raspberry Pi"""
 
+    # Comandos da fila do PC que o AGV já executa (coleta ainda não implementada)
+    EXECUTABLE_COMMANDS = frozenset()
+
     def __init__(self):
         self.running = False
         self.pc_connected = False
         self.current_task = None
+        self.esp32 = None  # Sessão serial persistente (ESP32Session)
+        self.path_planner = None  # Planejador A*/JPS sobre o layout do armazém
+        self.current_path = []  # Pontos (cm) do caminho em execução
         self.status = {
             'battery': 100,
             'position': {'x': 0, 'y': 0, 'orientation': 0},
@@ -55,9 +61,26 @@ class AGVSystem:
             logger.info("Inicializando componentes de hardware...")
 
             # TODO: Inicializar câmera
-            # TODO: Inicializar comunicação ESP32
             # TODO: Inicializar sensores
 
+            # Sessão com ESP32 aberta uma vez e supervisionada em segundo plano
+            from config import HARDWARE_CONFIG
+            esp32_config = HARDWARE_CONFIG['esp32']
+            if esp32_config.get('enabled', True):
+                from esp32_control import ESP32Session
+                self.esp32 = ESP32Session(
+                    port=esp32_config.get('port'),
+                    baudrate=esp32_config.get('baudrate', 115200),
+                    timeout=esp32_config.get('timeout', 2.0),
+                    health_interval=esp32_config.get('health_interval', 5.0),
+                    protocol=esp32_config.get('protocol', 'auto')
+                )
+                self.esp32.start()
+
+            # Grade de ocupação e tabelas de salto montadas uma vez
+            from path_planner import PathPlanner
+            self.path_planner = PathPlanner()
+
             logger.info("Hardware inicializado com sucesso")
             return True
         except Exception as e:
@@ -73,21 +96,135 @@ class AGVSystem:
         except Exception as e:
             logger.error(f"Erro ao iniciar servidor API: {e}")
 
+    def fetch_next_command(self):
+        """Long-polling no PC: bloqueia até existir comando ou o timeout expirar"""
+        import requests
+        from config import SYSTEM_CONFIG
+
+        wait = SYSTEM_CONFIG['command_long_poll_timeout']
+
+        response = requests.get(
+            f"{self._pc_base_url()}/agv/next_command",
+            params={'codigo': SYSTEM_CONFIG['agv_code'], 'wait': wait},
+            timeout=wait + 5
+        )
+        response.raise_for_status()
+        return response.json().get('command')
+
+    def _pc_base_url(self):
+        from config import NETWORK_CONFIG
+        return f"http://{NETWORK_CONFIG['pc_ip']}:{NETWORK_CONFIG['pc_port']}"
+
+    def send_command_ack(self, command_id, success, result=None):
+        """
+        Confirma ao PC o fim da execução do comando (success=True encerra o lease do pedido;
+        success=False devolve o pedido à fila). Retorna True se o PC aceitou a confirmação.
+        """
+        import requests
+
+        try:
+            response = requests.post(
+                f"{self._pc_base_url()}/agv/command_ack",
+                json={'command_id': command_id, 'success': success, 'result': result or {}},
+                timeout=5
+            )
+            response.raise_for_status()
+            return True
+        except requests.RequestException as e:
+            logger.error(f"Falha ao confirmar comando {command_id}: {e}")
+            return False
+
+    def renew_command_lease(self, command_id):
+        """Estende o lease do comando em execução; retorna False se o PC recusou a renovação"""
+        import requests
+
+        try:
+            response = requests.post(
+                f"{self._pc_base_url()}/agv/command_lease",
+                json={'command_id': command_id},
+                timeout=5
+            )
+            response.raise_for_status()
+            return True
+        except requests.RequestException as e:
+            logger.error(f"Falha ao renovar lease do comando {command_id}: {e}")
+            return False
+
+    async def keep_command_lease(self, command):
+        """Renova o lease enquanto o comando executa; se o AGV cair, o lease expira e o pedido volta à fila"""
+        loop = asyncio.get_running_loop()
+        interval = command.get('lease_seconds', 60) / 3
+
+        while True:
+            await asyncio.sleep(interval)
+            await loop.run_in_executor(None, self.renew_command_lease, command['id'])
+
+    def report_order_result(self, order_id, result):
+        """Informa ao PC o resultado do pedido: 'concluido' em caso de sucesso, senão 'falha'"""
+        import requests
+
+        success = isinstance(result, dict) and result.get('success') is True
+        if not success:
+            error = result.get('error') if isinstance(result, dict) else result
+            logger.error(f"Pedido {order_id} não concluído: {error}")
+
+        try:
+            response = requests.put(
+                f"{self._pc_base_url()}/pedidos/{order_id}/status",
+                json={'status': 'concluido' if success else 'falha'},
+                timeout=5
+            )
+            response.raise_for_status()
+            return True
+        except requests.RequestException as e:
+            logger.error(f"Falha ao informar resultado do pedido {order_id}: {e}")
+            return False
+
     async def wifi_communication_loop(self):
         """Loop principal de comunicação WiFi com PC"""
+        from config import SYSTEM_CONFIG
+
+        if not SYSTEM_CONFIG['command_consumer_enabled']:
+            logger.info("Busca de pedidos desligada (AGV_COMMAND_CONSUMER=1 para ligar)")
+            return
+
+        loop = asyncio.get_running_loop()
+
         while self.running:
             try:
-                # TODO: Implementar comunicação com PC
-                # - Verificar conexão
-                # - Receber comandos
-                # - Enviar status
-                # - Sincronizar dados
-
-                await asyncio.sleep(1)  # Verificar a cada segundo
+                # Sem intervalo fixo: o PC responde assim que um pedido é criado
+                command = await loop.run_in_executor(None, self.fetch_next_command)
+                self.pc_connected = True
+
+                if not command:
+                    continue
+
+                if command.get('type') not in self.EXECUTABLE_COMMANDS:
+                    # Sem execução possível: não confirmar, marcar o pedido como falha
+                    result = {'success': False, 'error': f"Comando {command.get('type')} não suportado"}
+                else:
+                    # O lease só é renovado enquanto o comando executa: sem confirmação
+                    # antecipada, uma queda do AGV devolve o pedido à fila
+                    renewal = asyncio.create_task(self.keep_command_lease(command))
+                    try:
+                        result = await self.execute_command(command)
+                    finally:
+                        renewal.cancel()
+
+                    if isinstance(result, dict) and result.get('success') is True:
+                        await loop.run_in_executor(
+                            None, self.send_command_ack, command['id'], True, result
+                        )
+
+                if command.get('order_id') is not None:
+                    await loop.run_in_executor(
+                        None, self.report_order_result, command['order_id'], result
+                    )
 
             except Exception as e:
+                self.pc_connected = False
                 logger.error(f"Erro no loop de comunicação WiFi: {e}")
-                await asyncio.sleep(5)  # Aguardar antes de tentar novamente
+                await asyncio.sleep(SYSTEM_CONFIG['command_poll_interval'])
 
     async def motor_control_loop(self):
         """Loop de controle de motores"""
@@ -152,7 +289,10 @@ class AGVSystem:
 
     def get_status(self):
         """Retorna status atual do sistema"""
-        return self.status.copy()
+        status = self.status.copy()
+        if self.esp32:
+            status['esp32'] = self.esp32.get_status()
+        return status
 
     async def execute_command(self, command):
         """Executa um comando recebido do PC"""
@@ -163,11 +303,15 @@ class AGVSystem:
             command_data = command.get('data', {})
 
             if command_type == 'move':
-                await self.execute_move_command(command_data)
+                return await self.execute_move_command(command_data)
             elif command_type == 'scan_qr':
                 await self.execute_qr_scan_command(command_data)
             elif command_type == 'pickup_item':
-                await self.execute_pickup_command(command_data)
+                return await self.execute_pickup_command(command_data)
+            elif command_type == 'pickup_order':
+                # Comando vindo da fila de pedidos do PC (/agv/next_command)
+                result = await self.execute_pickup_command(command)
+                return dict(result, order_id=command.get('order_id'))
             elif command_type == 'status':
                 return self.get_status()
             else:
@@ -178,10 +322,35 @@ class AGVSystem:
             return {'success': False, 'error': str(e)}
 
     async def execute_move_command(self, data):
-        """Executa comando de movimento"""
-        # TODO: Implementar movimento
+        """
+        Executa comando de movimento: destino em cm ('x', 'y') ou posição de estante
+        ('corredor', 'sub_corredor', 'posicao_x'); planeja o caminho a partir da posição atual
+        (ainda sem execução: retorna success=False com planned=True e o caminho)
+        """
         logger.info(f"Executando movimento: {data}")
-        pass
+        if not self.path_planner:
+            return {'success': False, 'error': 'Planejador de caminho não inicializado'}
+
+        position = self.status['position']
+        start = (position['x'], position['y'])
+        if 'corredor' in data:
+            goal = self.path_planner.layout.slot_position(
+                data['corredor'], data.get('sub_corredor', 1), data.get('posicao_x', 1)
+            )
+        else:
+            goal = (data['x'], data['y'])
+
+        path = self.path_planner.plan(start, goal)
+        if path is None:
+            logger.warning(f"Sem caminho de {start} até {goal}")
+            return {'success': False, 'error': 'Destino inalcançável'}
+
+        self.current_path = path
+        length = self.path_planner.astar.path_length(path)
+        logger.info(f"Caminho planejado: {len(path)} pontos, {length:.0f} cm")
+        # Só o planejamento existe: o AGV não percorre o caminho, então o movimento não é sucesso
+        return {'success': False, 'planned': True, 'error': 'Execução do caminho não implementada',
+                'path': path, 'length_cm': length}
 
     async def execute_qr_scan_command(self, data):
         """Executa comando de escaneamento QR"""
@@ -193,7 +362,7 @@ class AGVSystem:
         """Executa comando de coleta de item"""
         # TODO: Implementar coleta
         logger.info(f"Executando coleta: {data}")
-        pass
+        return {'success': False, 'error': 'Coleta não implementada'}
 
     async def run(self):
         """Loop principal do sistema"""
@@ -227,7 +396,9 @@ class AGVSystem:
     def cleanup(self):
         """Limpeza de recursos"""
         logger.info("Executando limpeza de recursos...")
-        # TODO: Parar motores, fechar conexões, etc.
+        if self.esp32:
+            self.esp32.stop()
+        # TODO: Fechar demais conexões
 
 async def main():
     """Função principal"""
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Planejamento de caminho do AGV no armazém
+Grade de ocupação (NumPy) gerada a partir do layout de NAVIGATION_CONFIG, com os
+obstáculos inflados pela margem de segurança, e busca A* (opcionalmente com
+jump point search) entre a base e as posições corredor/sub_corredor/posicao_x.
+Coordenadas públicas em cm; internamente a busca usa células da grade.
+"""
+
+import heapq
+import math
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from config import NAVIGATION_CONFIG
+
+SQRT2 = math.sqrt(2)
+
+# Movimentos 8-conectados (dx, dy, custo em células)
+MOVES = [(1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+         (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2)]
+
+Point = Tuple[float, float]
+
+
+class OccupancyGrid:
+    """Grade de ocupação: True = célula bloqueada. Índices [linha (y), coluna (x)]"""
+
+    def __init__(self, size_cm: Tuple[int, int] = None, resolution_cm: int = None):
+        self.size_cm = tuple(size_cm or NAVIGATION_CONFIG['map_size'])
+        self.resolution = resolution_cm or NAVIGATION_CONFIG['grid_resolution']
+        self.width = math.ceil(self.size_cm[0] / self.resolution)
+        self.height = math.ceil(self.size_cm[1] / self.resolution)
+        self.cells = np.zeros((self.height, self.width), dtype=bool)
+
+    def to_cell(self, x_cm: float, y_cm: float) -> Tuple[int, int]:
+        col = min(max(int(x_cm // self.resolution), 0), self.width - 1)
+        row = min(max(int(y_cm // self.resolution), 0), self.height - 1)
+        return col, row
+
+    def to_cm(self, col: int, row: int) -> Point:
+        """Centro da célula em cm"""
+        return ((col + 0.5) * self.resolution, (row + 0.5) * self.resolution)
+
+    def add_obstacle(self, x1_cm: float, y1_cm: float, x2_cm: float, y2_cm: float):
+        """Bloqueia o retângulo (x1, y1)-(x2, y2) em cm"""
+        col1, row1 = self.to_cell(x1_cm, y1_cm)
+        col2, row2 = self.to_cell(max(x2_cm - 1e-6, x1_cm), max(y2_cm - 1e-6, y1_cm))
+        self.cells[row1:row2 + 1, col1:col2 + 1] = True
+
+    def is_free(self, col: int, row: int) -> bool:
+        return 0 <= col < self.width and 0 <= row < self.height and not self.cells[row, col]
+
+    def inflated(self, margin_cm: float = None) -> 'OccupancyGrid':
+        """
+        Cópia com os obstáculos dilatados pela margem de segurança (disco de raio margin_cm),
+        para que o centro do AGV possa ser planejado como um ponto
+        """
+        margin_cm = NAVIGATION_CONFIG['safety_margin'] if margin_cm is None else margin_cm
+        radius = math.ceil(margin_cm / self.resolution)
+
+        grid = OccupancyGrid(self.size_cm, self.resolution)
+        grid.cells = self.cells.copy()
+        if radius <= 0:
+            return grid
+
+        # Dilatação por deslocamentos: um OR da grade por célula do disco (poucas dezenas)
+        padded = np.pad(self.cells, radius, constant_values=False)
+        for dy in range(-radius, radius + 1):
+            for dx in range(-radius, radius + 1):
+                if dx * dx + dy * dy > radius * radius:
+                    continue
+                grid.cells |= padded[radius + dy:radius + dy + self.height,
+                                     radius + dx:radius + dx + self.width]
+        return grid
+
+
+class WarehouseLayout:
+    """
+    Geometria do armazém (NAVIGATION_CONFIG['layout']): corredores verticais lado a lado,
+    separados por estantes, divididos em sub-corredores ao longo do eixo y; posicao_x é o
+    índice da posição dentro do sub-corredor. Acima e abaixo das estantes ficam os
+    corredores de circulação, onde está a base.
+    """
+
+    def __init__(self, layout: Dict[str, Any] = None):
+        self.layout = layout or NAVIGATION_CONFIG['layout']
+
+    @property
+    def base(self) -> Point:
+        return tuple(self.layout['base'])
+
+    def aisle_x(self, corredor) -> float:
+        """Centro do corredor (em cm) onde o AGV trafega"""
+        origin_x = self.layout['aisle_origin'][0]
+        return origin_x + (int(corredor) - 1) * self.layout['aisle_spacing']
+
+    def slot_position(self, corredor, sub_corredor, posicao_x) -> Point:
+        """Ponto (cm) em frente à posição de estante de um item"""
+        origin_y = self.layout['aisle_origin'][1]
+        sub_start = origin_y + (int(sub_corredor) - 1) * self.layout['sub_aisle_length']
+        y = sub_start + int(posicao_x or 1) * self.layout['slot_spacing']
+        return (self.aisle_x(corredor), min(y, origin_y + self.layout['aisle_length']))
+
+    def build_grid(self, size_cm=None, resolution_cm=None) -> OccupancyGrid:
+        """Grade de ocupação com as estantes como obstáculos (sem inflar)"""
+        grid = OccupancyGrid(size_cm, resolution_cm)
+        origin_y = self.layout['aisle_origin'][1]
+        end_y = origin_y + self.layout['aisle_length']
+        half_lane = self.layout['lane_width'] / 2
+
+        # Estantes à esquerda de cada corredor e à direita do último
+        for corredor in range(1, self.layout['aisles'] + 1):
+            lane_x = self.aisle_x(corredor)
+            left_limit = lane_x - self.layout['aisle_spacing'] + half_lane
+            grid.add_obstacle(max(left_limit, 0), origin_y, lane_x - half_lane, end_y)
+        last_x = self.aisle_x(self.layout['aisles'])
+        grid.add_obstacle(last_x + half_lane, origin_y,
+                          last_x + self.layout['aisle_spacing'] - half_lane, end_y)
+        return grid
+
+
+class AStarPlanner:
+    """
+    A* 8-conectado sobre a grade inflada (sem cortar quinas de obstáculos), heurística
+    octil. Com use_jps=True usa jump point search, que expande só os pontos de salto;
+    as distâncias dos saltos retos são pré-calculadas por célula (JPS+), então cada
+    salto custa O(1) e o caminho tem o mesmo custo do A* comum.
+    """
+
+    def __init__(self, grid: OccupancyGrid, use_jps: bool = False):
+        self.grid = grid
+        self.use_jps = use_jps
+        self.width = grid.width
+        self.height = grid.height
+
+        # Busca em Python puro sobre bytes planos (bem mais rápido que indexar o array NumPy),
+        # com uma borda bloqueada em volta para dispensar testes de limite
+        self.stride = grid.width + 2
+        self._free = bytes(np.pad(~grid.cells, 1, constant_values=False).astype(np.uint8).ravel())
+        self._moves = [(dx + dy * self.stride, dx, dy, cost) for dx, dy, cost in MOVES]
+        self._straight = self._build_jump_table() if use_jps else None
+        self.expanded = 0
+
+    def _index(self, x: int, y: int) -> int:
+        return (y + 1) * self.stride + x + 1
+
+    def _coords(self, index: int) -> Tuple[int, int]:
+        y, x = divmod(index, self.stride)
+        return x - 1, y - 1
+
+    def _octile(self, index1: int, index2: int) -> float:
+        y1, x1 = divmod(index1, self.stride)
+        y2, x2 = divmod(index2, self.stride)
+        dx, dy = abs(x1 - x2), abs(y1 - y2)
+        return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+
+    def plan(self, start_cm: Point, goal_cm: Point) -> Optional[List[Point]]:
+        """
+        Caminho de start a goal como lista de pontos (cm) nas mudanças de direção,
+        ou None se não há caminho
+        """
+        start = self._index(*self.grid.to_cell(*start_cm))
+        goal = self._index(*self.grid.to_cell(*goal_cm))
+        if not self._free[start] or not self._free[goal]:
+            return None
+
+        cells = self._search(start, goal)
+        if cells is None:
+            return None
+        return [self.grid.to_cm(x, y) for x, y in self._corners(cells)]
+
+    def path_length(self, path: List[Point]) -> float:
+        """Comprimento do caminho em cm"""
+        return sum(math.dist(a, b) for a, b in zip(path, path[1:]))
+
+    def distance_field(self, goal_cm: Point) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Dijkstra a partir do objetivo sobre a grade inteira. Retorna (distância em cm até o
+        objetivo, próxima célula no caminho até ele), ambos com o formato da grade; células
+        inalcançáveis ficam com distância inf e próxima célula -1. Os movimentos são
+        simétricos, então a distância de ida é a mesma da volta.
+        """
+        goal = self._index(*self.grid.to_cell(*goal_cm))
+        distances = np.full(self.width * self.height, np.inf, dtype=np.float32)
+        next_cell = np.full(self.width * self.height, -1, dtype=np.int32)
+        if not self._free[goal]:
+            return distances.reshape(self.height, self.width), next_cell.reshape(self.height, self.width)
+
+        def cell(index):
+            x, y = self._coords(index)
+            return y * self.width + x
+
+        best = {goal: 0.0}
+        heap = [(0.0, goal)]
+        closed = set()
+        while heap:
+            g, index = heapq.heappop(heap)
+            if index in closed:
+                continue
+            closed.add(index)
+            distances[cell(index)] = g * self.grid.resolution
+            for neighbor, cost in self._neighbors(index):
+                new_g = g + cost
+                if neighbor not in closed and new_g < best.get(neighbor, math.inf):
+                    best[neighbor] = new_g
+                    next_cell[cell(neighbor)] = cell(index)
+                    heapq.heappush(heap, (new_g, neighbor))
+
+        return distances.reshape(self.height, self.width), next_cell.reshape(self.height, self.width)
+
+    def _search(self, start: int, goal: int) -> Optional[List[Tuple[int, int]]]:
+        g_score = {start: 0.0}
+        parent = {start: None}
+        closed = set()
+        heap = [(self._octile(start, goal), 0.0, start)]
+        self.expanded = 0
+
+        while heap:
+            _, g, index = heapq.heappop(heap)
+            if index in closed:
+                continue
+            if index == goal:
+                return self._reconstruct(parent, index)
+            closed.add(index)
+            self.expanded += 1
+
+            if self.use_jps:
+                successors = self._jump_successors(index, parent[index], goal)
+            else:
+                successors = self._neighbors(index)
+
+            for neighbor, cost in successors:
+                if neighbor in closed:
+                    continue
+                new_g = g + cost
+                if new_g < g_score.get(neighbor, math.inf):
+                    g_score[neighbor] = new_g
+                    parent[neighbor] = index
+                    heapq.heappush(heap, (new_g + self._octile(neighbor, goal), new_g, neighbor))
+        return None
+
+    def _neighbors(self, index):
+        free = self._free
+        stride = self.stride
+        for offset, dx, dy, cost in self._moves:
+            if not free[index + offset]:
+                continue
+            # Diagonal só com as duas células ortogonais livres (não corta quina)
+            if dx and dy and not (free[index + dx] and free[index + dy * stride]):
+                continue
+            yield index + offset, cost
+
+    # Jump point search (variante que não corta quinas)
+
+    def _build_jump_table(self) -> Dict[int, List[int]]:
+        """
+        Para cada célula livre e direção reta: d > 0 se o próximo ponto de salto está a d
+        células; -d se há d - 1 células livres e depois um bloqueio (sem ponto de salto)
+        """
+        free = self._free
+        size = len(free)
+        tables = {}
+        for step, side in ((1, self.stride), (-1, self.stride), (self.stride, 1), (-self.stride, 1)):
+            distance = [0] * size
+            # A célula seguinte na direção do salto é calculada antes
+            for index in (range(size - 1, -1, -1) if step > 0 else range(size)):
+                if not free[index]:
+                    continue
+                following = index + step
+                if not free[following]:
+                    distance[index] = -1
+                elif ((free[following + side] and not free[index + side])
+                        or (free[following - side] and not free[index - side])):
+                    # Vizinho forçado: obstáculo que acabou atrás, abrindo uma passagem lateral
+                    distance[index] = 1
+                else:
+                    after = distance[following]
+                    distance[index] = after + 1 if after > 0 else after - 1
+            tables[step] = distance
+        return tables
+
+    def _jump_straight(self, index: int, step: int, goal: int) -> Optional[int]:
+        """Ponto de salto a partir de index na direção reta step (sem contar index)"""
+        distance = self._straight[step][index]
+        reach = distance if distance > 0 else -distance - 1
+
+        # Objetivo na mesma linha/coluna, antes do ponto de salto ou do bloqueio
+        delta = goal - index
+        if delta and reach:
+            if abs(step) == 1:
+                on_line = goal // self.stride == index // self.stride
+            else:
+                on_line = delta % self.stride == 0
+            steps = delta // step
+            if on_line and steps * step == delta and 0 < steps <= reach:
+                return goal
+
+        return index + distance * step if distance > 0 else None
+
+    def _jump_diagonal(self, index: int, dx: int, dy: int, goal: int) -> Optional[int]:
+        """Avança na diagonal até um ponto de salto, o objetivo ou um bloqueio"""
+        free = self._free
+        vertical = dy * self.stride
+        while True:
+            if not free[index]:
+                return None
+            if index == goal:
+                return index
+            # Para se algum salto reto a partir daqui encontra algo
+            if (self._jump_straight(index, dx, goal) is not None
+                    or self._jump_straight(index, vertical, goal) is not None):
+                return index
+            if not (free[index + dx] and free[index + vertical]):
+                return None
+            index += dx + vertical
+
+    def _jump_successors(self, index, parent_index, goal):
+        for dx, dy in self._pruned_directions(index, parent_index):
+            if dx and dy:
+                point = self._jump_diagonal(index + dx + dy * self.stride, dx, dy, goal)
+            else:
+                point = self._jump_straight(index, dx + dy * self.stride, goal)
+            if point is not None:
+                yield point, self._octile(index, point)
+
+    def _pruned_directions(self, index, parent_index):
+        if parent_index is None:
+            return [(dx, dy) for offset, dx, dy, _ in self._moves
+                    if self._free[index + offset]
+                    and not (dx and dy and not (self._free[index + dx] and self._free[index + dy * self.stride]))]
+
+        free = self._free
+        stride = self.stride
+        x, y = self._coords(index)
+        px, py = self._coords(parent_index)
+        dx = (x > px) - (x < px)
+        dy = (y > py) - (y < py)
+
+        directions = []
+        if dx and dy:
+            vertical_free = free[index + dy * stride]
+            horizontal_free = free[index + dx]
+            if vertical_free:
+                directions.append((0, dy))
+            if horizontal_free:
+                directions.append((dx, 0))
+            if vertical_free and horizontal_free:
+                directions.append((dx, dy))
+        elif dx:
+            down, up = free[index + stride], free[index - stride]
+            if free[index + dx]:
+                directions.append((dx, 0))
+                if down:
+                    directions.append((dx, 1))
+                if up:
+                    directions.append((dx, -1))
+            if down:
+                directions.append((0, 1))
+            if up:
+                directions.append((0, -1))
+        else:
+            right, left = free[index + 1], free[index - 1]
+            if free[index + dy * stride]:
+                directions.append((0, dy))
+                if right:
+                    directions.append((1, dy))
+                if left:
+                    directions.append((-1, dy))
+            if right:
+                directions.append((1, 0))
+            if left:
+                directions.append((-1, 0))
+        return directions
+
+    def _reconstruct(self, parent, index) -> List[Tuple[int, int]]:
+        """Células do caminho; saltos do JPS são preenchidos com as células intermediárias"""
+        points = []
+        while index is not None:
+            points.append(self._coords(index))
+            index = parent[index]
+        points.reverse()
+
+        cells = [points[0]]
+        for x2, y2 in points[1:]:
+            x, y = cells[-1]
+            dx = (x2 > x) - (x2 < x)
+            dy = (y2 > y) - (y2 < y)
+            while (x, y) != (x2, y2):
+                x, y = x + dx, y + dy
+                cells.append((x, y))
+        return cells
+
+    @staticmethod
+    def _corners(cells):
+        """Só os pontos onde o caminho muda de direção (mais o início e o fim)"""
+        if len(cells) <= 2:
+            return cells
+        corners = [cells[0]]
+        for previous, current, following in zip(cells, cells[1:], cells[2:]):
+            if (current[0] - previous[0], current[1] - previous[1]) != \
+                    (following[0] - current[0], following[1] - current[1]):
+                corners.append(current)
+        corners.append(cells[-1])
+        return corners
+
+
+class PathPlanner:
+    """Planejador do armazém: layout -> grade inflada -> A*/JPS, em coordenadas de cm"""
+
+    def __init__(self, layout: WarehouseLayout = None, use_jps: bool = None):
+        self.layout = layout or WarehouseLayout()
+        if use_jps is None:
+            use_jps = NAVIGATION_CONFIG.get('jump_point_search', False)
+        self.grid = self.layout.build_grid().inflated()
+        self.astar = AStarPlanner(self.grid, use_jps=use_jps)
+
+    def plan(self, start_cm: Point, goal_cm: Point) -> Optional[List[Point]]:
+        return self.astar.plan(start_cm, goal_cm)
+
+    def plan_to_slot(self, start_cm: Point, corredor, sub_corredor, posicao_x) -> Optional[List[Point]]:
+        """Caminho até a posição de estante de um item"""
+        return self.plan(start_cm, self.layout.slot_position(corredor, sub_corredor, posicao_x))
+
+    def plan_route(self, waypoints: List[Point]) -> Optional[List[Point]]:
+        """Caminho passando pelos pontos na ordem dada (None se algum trecho é inviável)"""
+        route = [waypoints[0]] if waypoints else []
+        for start, goal in zip(waypoints, waypoints[1:]):
+            leg = self.plan(start, goal)
+            if leg is None:
+                return None
+            route += leg[1:]
+        return route
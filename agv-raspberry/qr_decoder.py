@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Decodificação de QR codes por região de interesse
+Recorta a área de detecção configurada (VISION_CONFIG['qr_code']), reduz a
+resolução de acordo com o tamanho esperado dos códigos e só decodifica em
+resolução total quando um padrão de QR é localizado mas não foi lido
+"""
+
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import cv2
+from pyzbar import pyzbar
+from pyzbar.locations import Rect, Point
+
+from config import VISION_CONFIG
+from qr_preprocess import Preprocessor
+
+# Tamanho (em pixels) em que o zbar ainda lê com folga um QR de 21 módulos (~2 px por módulo)
+MIN_DECODE_SIZE = 42
+# Acima disso não há ganho de leitura, só custo de processamento
+MAX_DECODE_SIZE = 160
+
+# Margem ao redor do QR localizado ao decodificar em resolução total
+ESCALATION_MARGIN = 0.15
+
+
+def roi_bounds(frame_shape, detection_area=None) -> Tuple[int, int, int, int]:
+    """Retorna (x1, y1, x2, y2) da área de detecção em pixels"""
+    height, width = frame_shape[:2]
+    x1, x2, y1, y2 = detection_area or VISION_CONFIG['qr_code'].get('detection_area', (0.0, 1.0, 0.0, 1.0))
+    return int(x1 * width), int(y1 * height), int(x2 * width), int(y2 * height)
+
+
+def draw_roi(frame, detection_area=None, color=(255, 255, 0)):
+    """Desenha a área de detecção no frame"""
+    x1, y1, x2, y2 = roi_bounds(frame.shape, detection_area)
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 1)
+
+
+class QRDecoder:
+    """Decodificador de QR codes com recorte (ROI), redução de escala e escalonamento"""
+
+    def __init__(self, detection_area: Tuple[float, float, float, float] = None,
+                 min_size: int = None, max_size: int = None,
+                 clip_limit: Optional[float] = 2.0, tile_grid: Tuple[int, int] = (8, 8),
+                 contrast_threshold: int = None):
+        qr_config = VISION_CONFIG['qr_code']
+        self.detection_area = detection_area or qr_config.get('detection_area', (0.0, 1.0, 0.0, 1.0))
+        self.min_size = min_size or qr_config.get('min_size', 50)
+        self.max_size = max_size or qr_config.get('max_size', 300)
+
+        # Menor QR esperado deve continuar legível; o maior não precisa passar de MAX_DECODE_SIZE
+        self.scale = min(1.0, max(MIN_DECODE_SIZE / self.min_size,
+                                  min(1.0, MAX_DECODE_SIZE / self.max_size)))
+
+        # CLAHE criado uma vez e aplicado só em imagens de baixo contraste (clip_limit=None desliga,
+        # contrast_threshold=0 aplica sempre); roda depois da redução de escala
+        self.preprocessor = Preprocessor(clip_limit, tile_grid, contrast_threshold)
+        self.locator = cv2.QRCodeDetector()
+
+        # Métricas de tempo (ms) do último frame e acumuladas
+        self.last_timing: Dict[str, Any] = {}
+        self.frames = 0
+        self.escalations = 0
+        self._total_ms = 0.0
+
+    def roi_bounds(self, frame_shape) -> Tuple[int, int, int, int]:
+        """Retorna (x1, y1, x2, y2) da área de detecção em pixels"""
+        return roi_bounds(frame_shape, self.detection_area)
+
+    def _to_gray(self, image):
+        if image.ndim == 2:
+            return image
+        if image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    def _enhance(self, gray):
+        return self.preprocessor.apply(gray)
+
+    def _decode(self, gray):
+        return pyzbar.decode(gray, symbols=[pyzbar.ZBarSymbol.QRCODE])
+
+    def _to_frame(self, obj, offset_x: int, offset_y: int, scale: float):
+        """Converte as coordenadas do resultado para o frame completo"""
+        left, top, width, height = obj.rect
+        rect = Rect(int(left / scale) + offset_x, int(top / scale) + offset_y,
+                    int(width / scale), int(height / scale))
+        polygon = [Point(int(p.x / scale) + offset_x, int(p.y / scale) + offset_y) for p in obj.polygon]
+        return obj._replace(rect=rect, polygon=polygon)
+
+    def _escalate(self, roi_gray, points) -> List[Any]:
+        """Decodifica em resolução total só a região onde o padrão de QR foi localizado"""
+        xs = points[..., 0] / self.scale
+        ys = points[..., 1] / self.scale
+        margin = ESCALATION_MARGIN * max(xs.max() - xs.min(), ys.max() - ys.min())
+
+        height, width = roi_gray.shape[:2]
+        x1 = max(int(xs.min() - margin), 0)
+        y1 = max(int(ys.min() - margin), 0)
+        x2 = min(int(xs.max() + margin), width)
+        y2 = min(int(ys.max() + margin), height)
+        if x2 <= x1 or y2 <= y1:
+            return []
+
+        region = self._enhance(roi_gray[y1:y2, x1:x2])
+        return [self._to_frame(obj, x1, y1, 1.0) for obj in self._decode(region)]
+
+    def decode(self, frame) -> List[Any]:
+        """
+        Decodifica os QR codes do frame. Retorna objetos no formato do pyzbar
+        (data, rect, polygon...) com coordenadas do frame completo.
+        """
+        start = time.perf_counter()
+
+        x1, y1, x2, y2 = self.roi_bounds(frame.shape)
+        roi_gray = self._to_gray(frame[y1:y2, x1:x2])
+
+        if self.scale < 1.0:
+            small = cv2.resize(roi_gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        else:
+            small = roi_gray
+        enhanced = self._enhance(small)
+        preprocess_done = time.perf_counter()
+
+        decoded = [self._to_frame(obj, x1, y1, self.scale) for obj in self._decode(enhanced)]
+
+        escalated = False
+        if not decoded:
+            # Padrão localizado mas não lido (código pequeno/borrado): tentar em resolução total
+            found, points = self.locator.detect(enhanced)
+            if found and points is not None:
+                escalated = True
+                self.escalations += 1
+                decoded = [self._to_frame(obj, x1, y1, 1.0) for obj in self._escalate(roi_gray, points)]
+
+        end = time.perf_counter()
+        self.frames += 1
+        self._total_ms += (end - start) * 1000
+        self.last_timing = {
+            'total_ms': (end - start) * 1000,
+            'preprocess_ms': (preprocess_done - start) * 1000,
+            'decode_ms': (end - preprocess_done) * 1000,
+            'escalated': escalated
+        }
+
+        return decoded
+
+    def decode_regions(self, frame, regions) -> List[Any]:
+        """
+        Decodifica só as janelas (x, y, w, h) indicadas, em resolução total.
+        Usado pelo rastreamento para reler códigos já em vista sem varrer o frame.
+        """
+        start = time.perf_counter()
+        height, width = frame.shape[:2]
+
+        decoded = []
+        preprocess_ms = 0.0
+        for left, top, region_width, region_height in regions:
+            x1, y1 = max(left, 0), max(top, 0)
+            x2, y2 = min(left + region_width, width), min(top + region_height, height)
+            if x2 <= x1 or y2 <= y1:
+                continue
+
+            region_start = time.perf_counter()
+            enhanced = self._enhance(self._to_gray(frame[y1:y2, x1:x2]))
+            preprocess_ms += (time.perf_counter() - region_start) * 1000
+            decoded += [self._to_frame(obj, x1, y1, 1.0) for obj in self._decode(enhanced)]
+
+        end = time.perf_counter()
+        self.frames += 1
+        self._total_ms += (end - start) * 1000
+        self.last_timing = {
+            'total_ms': (end - start) * 1000,
+            'preprocess_ms': preprocess_ms,
+            'decode_ms': (end - start) * 1000 - preprocess_ms,
+            'escalated': False,
+            'regions': len(regions)
+        }
+
+        return decoded
+
+    @property
+    def average_ms(self) -> Optional[float]:
+        """Tempo médio de decodificação por frame"""
+        return self._total_ms / self.frames if self.frames else None
+
+    def draw_roi(self, frame, color=(255, 255, 0)):
+        """Desenha a área de detecção no frame"""
+        draw_roi(frame, self.detection_area, color)
+
+    def timing_text(self) -> str:
+        """Texto com o tempo de decodificação do último frame (para exibir na tela)"""
+        if not self.last_timing:
+            return ""
+        text = f"Decode: {self.last_timing['total_ms']:.1f} ms"
+        if self.last_timing['escalated']:
+            text += " (full)"
+        elif 'regions' in self.last_timing:
+            text += f" ({self.last_timing['regions']} janelas)"
+        return text
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Pipeline de captura/decodificação de QR codes em várias threads
+Captura -> anel de frames limitado (descarta os antigos) -> workers de
+decodificação (pyzbar/OpenCV liberam o GIL) -> etapa de resultados, onde rodam
+as consultas (API/banco) sem travar a decodificação. Com um QRTracker, os
+workers releem só as janelas dos códigos em vista e on_detection passa a ser
+chamado apenas quando um código entra no campo de visão.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from typing import Any, Callable, Dict, Optional
+
+from config import VISION_CONFIG
+from qr_decoder import QRDecoder
+from qr_tracker import QRTracker
+
+PipelineResult = namedtuple('PipelineResult', 'seq timestamp frame decoded decode_ms latency_ms')
+
+
+class FrameRing:
+    """Fila limitada de frames: quando cheia, o frame mais antigo é descartado"""
+
+    def __init__(self, size: int, on_drop: Callable[[Any], None] = None):
+        self._frames = deque(maxlen=size)
+        self._condition = threading.Condition()
+        self._closed = False
+        self.on_drop = on_drop  # Recebe o item descartado (ex.: devolver o buffer ao pool)
+        self.dropped = 0
+        self._in_flight = 0  # Itens retirados por get() ainda sem task_done()
+
+    def put(self, item):
+        evicted = None
+        with self._condition:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+                evicted = self._frames[0]
+            self._frames.append(item)
+            self._condition.notify()
+        if evicted is not None and self.on_drop:
+            self.on_drop(evicted)
+
+    def get(self, timeout: float = None):
+        """
+        Retira o frame mais antigo ainda no anel (None se fechado ou timeout). O item conta
+        como em processamento no mesmo lock da retirada, até o task_done() de quem o pegou
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._frames or self._closed, timeout):
+                return None
+            if not self._frames:
+                return None
+            self._in_flight += 1
+            return self._frames.popleft()
+
+    def task_done(self):
+        """Marca como concluído um item retirado por get()"""
+        with self._condition:
+            self._in_flight -= 1
+
+    def empty(self) -> bool:
+        with self._condition:
+            return not self._frames
+
+    def idle(self) -> bool:
+        """Anel vazio e nenhum item retirado ainda em processamento (verificados juntos)"""
+        with self._condition:
+            return not self._frames and self._in_flight == 0
+
+    def drain(self):
+        """Retira todos os itens ainda no anel"""
+        with self._condition:
+            items = list(self._frames)
+            self._frames.clear()
+            return items
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class QRPipeline:
+    """
+    Executa captura, decodificação e consultas em threads separadas.
+    capture: função que retorna um frame (ex.: picam2.capture_array)
+    on_detection: chamada na etapa de resultados para cada QR lido (data, obj);
+                  com tracker, só quando o código entra em vista
+    on_leave: chamada com o conteúdo do QR quando ele sai de vista (só com tracker)
+    release_frame: devolve o buffer de um frame que saiu do pipeline (ex.: AGVCamera.release_frame);
+                   frames entregues por get_result() são devolvidos com release(result)
+    """
+
+    def __init__(self, capture: Callable[[], Any], on_detection: Callable[[str, Any], None] = None,
+                 workers: int = None, ring_size: int = None,
+                 decoder_factory: Callable[[], QRDecoder] = QRDecoder,
+                 tracker: QRTracker = None, on_leave: Callable[[str], None] = None,
+                 release_frame: Callable[[Any], None] = None):
+        qr_config = VISION_CONFIG['qr_code']
+        self.capture = capture
+        self.on_detection = on_detection
+        self.on_leave = on_leave
+        self.tracker = tracker
+        # Um núcleo fica para a captura/exibição
+        self.workers = workers or qr_config.get('decode_workers') or max(1, (os.cpu_count() or 2) - 1)
+        self.decoder_factory = decoder_factory
+        self.release_frame = release_frame
+
+        self.ring = FrameRing(ring_size or qr_config.get('frame_ring_size', 4),
+                              on_drop=lambda item: self._release(item[2]))
+        self._decoded = queue.Queue()
+        self._display = queue.Queue(maxsize=2)
+        self._stop_event = threading.Event()
+        self._threads = []
+
+        self.captured = 0
+        self.decoded_frames = 0
+        self.capture_done = False  # Fonte gravada chegou ao fim
+        self._last_display_seq = -1
+        self._latency_total = 0.0
+        self._decode_total = 0.0
+        self.max_latency_ms = 0.0
+        self._started_at = None
+
+    def start(self):
+        """Inicia as threads de captura, decodificação e resultados"""
+        self._stop_event.clear()
+        self._started_at = time.time()
+
+        self._threads = [threading.Thread(target=self._capture_loop, name='qr-capture', daemon=True)]
+        self._threads += [threading.Thread(target=self._decode_loop, name=f'qr-decode-{n}', daemon=True)
+                          for n in range(self.workers)]
+        self._threads.append(threading.Thread(target=self._result_loop, name='qr-results', daemon=True))
+
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Para todas as etapas e aguarda as threads"""
+        self._stop_event.set()
+        self.ring.close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+
+        # Devolver os buffers dos frames que ficaram no caminho
+        for item in self.ring.drain():
+            self._release(item[2])
+        while True:
+            try:
+                self._release(self._display.get_nowait().frame)
+            except queue.Empty:
+                break
+
+    def _capture_loop(self):
+        seq = 0
+        while not self._stop_event.is_set():
+            try:
+                frame = self.capture()
+            except EOFError:
+                # Fim de uma fonte gravada (frame_source.ReplayFrameSource)
+                self.capture_done = True
+                break
+            except Exception as e:
+                print(f"❌ Erro na captura: {e}")
+                time.sleep(0.1)
+                continue
+
+            if frame is None:
+                # Câmera sem frame novo: esperar em vez de girar a CPU que os workers usam
+                time.sleep(0.01)
+                continue
+
+            self.ring.put((seq, time.time(), frame))
+            self.captured += 1
+            seq += 1
+
+    def _decode_loop(self):
+        # Cada worker tem o próprio decodificador (CLAHE/QRCodeDetector não são compartilhados)
+        decoder = self.decoder_factory()
+
+        while not self._stop_event.is_set():
+            item = self.ring.get(timeout=0.5)
+            if item is None:
+                continue
+
+            seq, timestamp, frame = item
+            try:
+                if self.tracker and not self.tracker.needs_full_scan(seq):
+                    # Códigos já em vista: reler só as janelas ao redor da última posição
+                    decoded = decoder.decode_regions(frame, self.tracker.search_regions())
+                else:
+                    decoded = decoder.decode(frame)
+                # Entra em _decoded antes do task_done: finished nunca vê o frame fora dos dois
+                self._decoded.put((seq, timestamp, frame, decoded, decoder.last_timing['total_ms']))
+            except Exception as e:
+                # Um frame com erro é descartado; o worker segue decodificando os próximos
+                print(f"❌ Erro na decodificação do frame {seq}: {e}")
+                self._release(frame)
+            finally:
+                self.ring.task_done()
+
+    def _result_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                item = self._decoded.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                self._handle_result(*item)
+            finally:
+                self._decoded.task_done()
+
+    def _handle_result(self, seq, timestamp, frame, decoded, decode_ms):
+        latency_ms = (time.time() - timestamp) * 1000
+        self.decoded_frames += 1
+        self._latency_total += latency_ms
+        self._decode_total += decode_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+
+        # Consultas (HTTP/banco) rodam aqui, fora dos workers de decodificação
+        if self.tracker:
+            entered, left = self.tracker.update(seq, decoded)
+        else:
+            entered, left = [(obj.data.decode('utf-8'), obj) for obj in decoded], []
+
+        self._notify(self.on_detection, entered)
+        self._notify(self.on_leave, [(data,) for data in left])
+
+        # Workers terminam fora de ordem: frame mais antigo que o já exibido não volta à tela
+        if seq < self._last_display_seq:
+            self._release(frame)
+            return
+        self._last_display_seq = seq
+
+        result = PipelineResult(seq, timestamp, frame, decoded, decode_ms, latency_ms)
+        try:
+            self._display.put_nowait(result)
+        except queue.Full:
+            try:
+                self._release(self._display.get_nowait().frame)
+            except queue.Empty:
+                pass
+            self._display.put_nowait(result)
+
+    def _release(self, frame):
+        if self.release_frame:
+            self.release_frame(frame)
+
+    def _notify(self, callback, events):
+        if not callback:
+            return
+        for args in events:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"❌ Erro ao processar QR code: {e}")
+
+    def get_result(self, timeout: float = 1.0) -> Optional[PipelineResult]:
+        """Próximo frame decodificado para exibição (thread principal, por causa do cv2.imshow)"""
+        try:
+            return self._display.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def release(self, result: PipelineResult):
+        """Devolve o frame de um resultado já exibido (sem release_frame, não faz nada)"""
+        self._release(result.frame)
+
+    @property
+    def finished(self) -> bool:
+        """Fonte gravada terminou e todos os frames já passaram pelo pipeline"""
+        return (self.capture_done and self.ring.idle()
+                and self._decoded.unfinished_tasks == 0 and self._display.empty())
+
+    def stats(self) -> Dict[str, Any]:
+        """Vazão e latência do pipeline"""
+        elapsed = time.time() - self._started_at if self._started_at else 0
+        return {
+            'workers': self.workers,
+            'captured': self.captured,
+            'decoded': self.decoded_frames,
+            'dropped': self.ring.dropped,
+            'decode_fps': self.decoded_frames / elapsed if elapsed else 0.0,
+            'avg_decode_ms': self._decode_total / self.decoded_frames if self.decoded_frames else None,
+            'avg_latency_ms': self._latency_total / self.decoded_frames if self.decoded_frames else None,
+            'max_latency_ms': self.max_latency_ms
+        }
@@ -9,10 +9,13 @@ from pyzbar.pyzbar import decode
 import time
 import sys
 
+from frame_source import ReplayFrameSource
+
 class OpenCVOnlyQRReader:
     """Leitor que usa apenas OpenCV - funciona sempre"""
 
     def __init__(self, camera_id=0):
+        # camera_id: índice da webcam ou caminho de diretório de imagens/vídeo gravado
         self.camera_id = camera_id
         self.cap = None
         self.qr_codes_detectados = set()
@@ -21,7 +24,10 @@ class OpenCVOnlyQRReader:
         """Inicializar câmera OpenCV"""
         print(f"📷 Inicializando câmera OpenCV {self.camera_id}...")
 
-        self.cap = cv2.VideoCapture(self.camera_id)
+        if isinstance(self.camera_id, str):
+            self.cap = ReplayFrameSource(self.camera_id)
+        else:
+            self.cap = cv2.VideoCapture(self.camera_id)
 
         if not self.cap.isOpened():
             print(f"❌ Não foi possível abrir câmera {self.camera_id}")
@@ -95,6 +101,9 @@ class OpenCVOnlyQRReader:
                 ret, frame = self.cap.read()
 
                 if not ret or frame is None:
+                    if getattr(self.cap, 'exhausted', False):
+                        print("🏁 Fim dos frames gravados")
+                        break
                     print("⚠️ Frame vazio, tentando novamente...")
                     time.sleep(0.1)
                     continue
@@ -167,6 +176,8 @@ def main():
     camera_id = 0
     if len(sys.argv) > 1 and sys.argv[1].isdigit():
         camera_id = int(sys.argv[1])
+    elif len(sys.argv) > 1:
+        camera_id = sys.argv[1]  # Diretório de imagens ou vídeo gravado
 
     print(f"📷 Usando câmera ID: {camera_id}")
 
@@ -5,24 +5,33 @@ Conecta ao banco via HTTP (não SQLite direto)
 Permite comunicação em tempo real com o PC
 """
 
-from picamera2 import Picamera2
-from pyzbar import pyzbar
 import cv2
 import requests
 import json
+import os
 import time
 import sys
 from datetime import datetime
 
+from frame_source import ReplayFrameSource
+from qr_decoder import draw_roi
+from qr_pipeline import QRPipeline
+from qr_tracker import create_tracker
+from tag_cache import TagCache
+
 class QRReaderWithAPI:
     """Leitor de QR codes que se conecta à API do PC"""
 
-    def __init__(self, pc_ip="192.168.0.100", pc_port=5000):
+    def __init__(self, pc_ip="192.168.0.100", pc_port=5000, frame_source=None):
         self.pc_ip = pc_ip
         self.pc_port = pc_port
         self.base_url = f"http://{pc_ip}:{pc_port}"
         self.qr_codes_detectados = set()
         self.picam2 = None
+        self.pipeline = None
+        # Diretório de imagens ou vídeo gravado no lugar da câmera CSI
+        self.frame_source = frame_source
+        self.tag_cache = TagCache(self.base_url)
 
     def testar_conexao_api(self):
         """Testar conexão com a API do PC"""
@@ -41,24 +50,8 @@ class QRReaderWithAPI:
             return False
 
     def consultar_item_por_tag(self, tag):
-        """Consultar item via API do PC"""
-        try:
-            # Usar endpoint de itens com pesquisa
-            response = requests.get(f"{self.base_url}/itens", timeout=5)
-
-            if response.status_code == 200:
-                itens = response.json()
-
-                # Procurar item pela tag
-                for item in itens:
-                    if item.get('tag') == tag:
-                        return item
-
-            return None
-
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Erro ao consultar API: {e}")
-            return None
+        """Consultar item pelo cache local de tags (API do PC só para tags fora do catálogo)"""
+        return self.tag_cache.get(tag)
 
     def consultar_localizacao(self, qr_data):
         """Consultar localização baseada no conteúdo do QR"""
@@ -83,17 +76,7 @@ class QRReaderWithAPI:
             except:
                 pass
 
-        # Formato: TAG0001, TAG0002, etc.
-        if qr_data.startswith('TAG') and len(qr_data) >= 7:
-            item = self.consultar_item_por_tag(qr_data)
-            if item:
-                return {
-                    'tipo': 'item',
-                    'item': item,
-                    'descricao': f"Item: {item['nome']} (Tag: {item['tag']})"
-                }
-
-        # Outros formatos - tentar como tag diretamente
+        # Formato: TAG0001, TAG0002, etc. (outros formatos também são tentados como tag)
         item = self.consultar_item_por_tag(qr_data)
         if item:
             return {
@@ -137,6 +120,24 @@ class QRReaderWithAPI:
             # Não mostrar erro - é opcional
             pass
 
+    def processar_qr(self, data, obj):
+        """Etapa de resultados do pipeline: consulta e mostra cada QR code que entra em vista"""
+        novo = data not in self.qr_codes_detectados
+        self.qr_codes_detectados.add(data)
+
+        # Sem rastreamento o mesmo código chega a cada frame: só processar a primeira leitura
+        if not novo and self.pipeline.tracker is None:
+            return
+
+        # Consultar informações via API
+        info = self.consultar_localizacao(data)
+
+        # Mostrar informações detalhadas
+        self.mostrar_informacoes_qr(data, info)
+
+        # Enviar status para PC (opcional)
+        self.enviar_status_para_pc(data, info)
+
     def mostrar_informacoes_qr(self, qr_data, info):
         """Mostrar informações detalhadas do QR code"""
         print(f"\n🎯 QR CODE DETECTADO: {qr_data}")
@@ -167,6 +168,13 @@ class QRReaderWithAPI:
         print("📷 Inicializando câmera CSI...")
 
         try:
+            if self.frame_source:
+                # Frames gravados no lugar da câmera (testes/benchmark sem hardware)
+                self.picam2 = ReplayFrameSource(self.frame_source)
+                print(f"✅ Reproduzindo frames gravados: {self.frame_source}")
+                return True
+
+            from picamera2 import Picamera2
             self.picam2 = Picamera2(camera_num=0)
             self.picam2.configure(self.picam2.create_preview_configuration(
                 main={"format": 'XRGB8888', "size": (1920, 1080)}
@@ -192,39 +200,35 @@ class QRReaderWithAPI:
             print("💡 Certifique-se de que o backend Flask está rodando no PC")
             return
 
+        # Carregar catálogo de tags antes de começar a ler
+        if self.tag_cache.warm():
+            print(f"📦 Cache de tags carregado: {self.tag_cache.stats()['items']} itens")
+
         if not self.initialize_camera():
             return
 
+        # Captura, decodificação e consultas em threads separadas; aqui só a exibição
+        self.pipeline = QRPipeline(
+            self.picam2.capture_array,
+            on_detection=self.processar_qr,
+            tracker=create_tracker(),
+            on_leave=lambda data: print(f"👋 QR code saiu de vista: {data}")
+        )
+        self.pipeline.start()
+
         try:
             while True:
-                # Capturar frame
-                frame = self.picam2.capture_array()
-
-                # Processamento de imagem (igual ao código do usuário)
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-                enhanced = clahe.apply(gray)
-
-                # Detectar QR codes
-                decoded_objects = pyzbar.decode(enhanced)
-
-                # Processar detecções
-                for obj in decoded_objects:
+                result = self.pipeline.get_result()
+                if result is None:
+                    if self.pipeline.finished:
+                        print("🏁 Fim dos frames gravados")
+                        break
+                    continue
+                frame = result.frame
+
+                for obj in result.decoded:
                     data = obj.data.decode('utf-8')
 
-                    # Só processar se não foi detectado recentemente
-                    if data not in self.qr_codes_detectados:
-                        self.qr_codes_detectados.add(data)
-
-                        # Consultar informações via API
-                        info = self.consultar_localizacao(data)
-
-                        # Mostrar informações detalhadas
-                        self.mostrar_informacoes_qr(data, info)
-
-                        # Enviar status para PC (opcional)
-                        self.enviar_status_para_pc(data, info)
-
                     # Desenhar retângulo (sempre)
                     (x, y, w, h) = obj.rect
                     cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
@@ -233,6 +237,9 @@ class QRReaderWithAPI:
                 # Mostrar estatísticas na tela (sem testar API a cada frame)
                 stats_text = f"QR Codes detectados: {len(self.qr_codes_detectados)}"
                 cv2.putText(frame, stats_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+                timing_text = f"Decode: {result.decode_ms:.1f} ms  Latencia: {result.latency_ms:.0f} ms"
+                cv2.putText(frame, timing_text, (10, 65), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+                draw_roi(frame)
 
                 # Mostrar frame
                 cv2.imshow("Leitor de QR Code com API do PC", frame)
@@ -245,12 +252,18 @@ class QRReaderWithAPI:
             print("\n🛑 Interrompido pelo usuário")
 
         finally:
+            self.pipeline.stop()
             if self.picam2:
                 self.picam2.stop()
             cv2.destroyAllWindows()
 
             # Resumo final
+            stats = self.pipeline.stats()
             print(f"\n📊 RESUMO FINAL:")
+            if stats['decoded']:
+                print(f"   Decodificação: {stats['decode_fps']:.1f} frames/s com {stats['workers']} workers, "
+                      f"{stats['avg_decode_ms']:.1f} ms/frame, latência média {stats['avg_latency_ms']:.0f} ms "
+                      f"({stats['dropped']} frames descartados)")
             print(f"   Total de QR codes únicos detectados: {len(self.qr_codes_detectados)}")
             if self.qr_codes_detectados:
                 print("   QR codes detectados:")
@@ -272,10 +285,13 @@ def main():
     if len(sys.argv) >= 3:
         pc_port = int(sys.argv[2])
 
+    # Frames gravados no lugar da câmera: QR_FRAME_SOURCE=<diretório ou vídeo>
+    frame_source = os.environ.get('QR_FRAME_SOURCE')
+
     print(f"🔗 Conectando ao PC: {pc_ip}:{pc_port}")
 
     # Executar leitor
-    reader = QRReaderWithAPI(pc_ip=pc_ip, pc_port=pc_port)
+    reader = QRReaderWithAPI(pc_ip=pc_ip, pc_port=pc_port, frame_source=frame_source)
     reader.run()
 
 if __name__ == "__main__":
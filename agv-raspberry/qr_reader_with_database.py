@@ -4,21 +4,27 @@ Leitor de QR Codes com Integração ao Banco de Dados
 Lê QR codes e consulta informações no banco de dados do AGV
 """
 
-from picamera2 import Picamera2
-from pyzbar import pyzbar
 import cv2
 import sqlite3
 import os
 import sys
 from datetime import datetime
 
+from frame_source import ReplayFrameSource
+from qr_decoder import draw_roi
+from qr_pipeline import QRPipeline
+from qr_tracker import create_tracker
+
 class QRReaderWithDatabase:
     """Leitor de QR codes integrado com banco de dados"""
 
-    def __init__(self, db_path="../agv-web/backend/agv_system.db"):
+    def __init__(self, db_path="../agv-web/backend/agv_system.db", frame_source=None):
         self.db_path = db_path
         self.qr_codes_detectados = set()
         self.picam2 = None
+        self.pipeline = None
+        # Diretório de imagens ou vídeo gravado no lugar da câmera CSI
+        self.frame_source = frame_source
 
     def conectar_banco(self):
         """Conectar ao banco de dados"""
@@ -110,6 +116,21 @@ class QRReaderWithDatabase:
             'descricao': f"QR Code não identificado: {qr_data}"
         }
 
+    def processar_qr(self, data, obj):
+        """Etapa de resultados do pipeline: consulta e mostra cada QR code que entra em vista"""
+        novo = data not in self.qr_codes_detectados
+        self.qr_codes_detectados.add(data)
+
+        # Sem rastreamento o mesmo código chega a cada frame: só processar a primeira leitura
+        if not novo and self.pipeline.tracker is None:
+            return
+
+        # Consultar informações no banco
+        info = self.consultar_localizacao(data)
+
+        # Mostrar informações detalhadas
+        self.mostrar_informacoes_qr(data, info)
+
     def mostrar_informacoes_qr(self, qr_data, info):
         """Mostrar informações detalhadas do QR code"""
         print(f"\n🎯 QR CODE DETECTADO: {qr_data}")
@@ -140,6 +161,13 @@ class QRReaderWithDatabase:
         print("📷 Inicializando câmera CSI...")
 
         try:
+            if self.frame_source:
+                # Frames gravados no lugar da câmera (testes/benchmark sem hardware)
+                self.picam2 = ReplayFrameSource(self.frame_source)
+                print(f"✅ Reproduzindo frames gravados: {self.frame_source}")
+                return True
+
+            from picamera2 import Picamera2
             self.picam2 = Picamera2(camera_num=0)
             self.picam2.configure(self.picam2.create_preview_configuration(
                 main={"format": 'XRGB8888', "size": (1920, 1080)}
@@ -161,33 +189,28 @@ class QRReaderWithDatabase:
         if not self.initialize_camera():
             return
 
+        # Captura, decodificação e consultas em threads separadas; aqui só a exibição
+        self.pipeline = QRPipeline(
+            self.picam2.capture_array,
+            on_detection=self.processar_qr,
+            tracker=create_tracker(),
+            on_leave=lambda data: print(f"👋 QR code saiu de vista: {data}")
+        )
+        self.pipeline.start()
+
         try:
             while True:
-                # Capturar frame
-                frame = self.picam2.capture_array()
-
-                # Processamento de imagem (igual ao código do usuário)
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-                enhanced = clahe.apply(gray)
-
-                # Detectar QR codes
-                decoded_objects = pyzbar.decode(enhanced)
-
-                # Processar detecções
-                for obj in decoded_objects:
+                result = self.pipeline.get_result()
+                if result is None:
+                    if self.pipeline.finished:
+                        print("🏁 Fim dos frames gravados")
+                        break
+                    continue
+                frame = result.frame
+
+                for obj in result.decoded:
                     data = obj.data.decode('utf-8')
 
-                    # Só processar se não foi detectado recentemente
-                    if data not in self.qr_codes_detectados:
-                        self.qr_codes_detectados.add(data)
-
-                        # Consultar informações no banco
-                        info = self.consultar_localizacao(data)
-
-                        # Mostrar informações detalhadas
-                        self.mostrar_informacoes_qr(data, info)
-
                     # Desenhar retângulo (sempre)
                     (x, y, w, h) = obj.rect
                     cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
@@ -196,6 +219,9 @@ class QRReaderWithDatabase:
                 # Mostrar estatísticas na tela
                 stats_text = f"QR Codes detectados: {len(self.qr_codes_detectados)}"
                 cv2.putText(frame, stats_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+                timing_text = f"Decode: {result.decode_ms:.1f} ms  Latencia: {result.latency_ms:.0f} ms"
+                cv2.putText(frame, timing_text, (10, 65), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+                draw_roi(frame)
 
                 # Mostrar frame
                 cv2.imshow("Leitor de QR Code com Banco de Dados", frame)
@@ -208,12 +234,18 @@ class QRReaderWithDatabase:
             print("\n🛑 Interrompido pelo usuário")
 
         finally:
+            self.pipeline.stop()
             if self.picam2:
                 self.picam2.stop()
             cv2.destroyAllWindows()
 
             # Resumo final
+            stats = self.pipeline.stats()
             print(f"\n📊 RESUMO FINAL:")
+            if stats['decoded']:
+                print(f"   Decodificação: {stats['decode_fps']:.1f} frames/s com {stats['workers']} workers, "
+                      f"{stats['avg_decode_ms']:.1f} ms/frame, latência média {stats['avg_latency_ms']:.0f} ms "
+                      f"({stats['dropped']} frames descartados)")
             print(f"   Total de QR codes únicos detectados: {len(self.qr_codes_detectados)}")
             if self.qr_codes_detectados:
                 print("   QR codes detectados:")
@@ -232,8 +264,11 @@ def main():
         print("💡 Execute o backend Flask primeiro para criar o banco")
         return
 
+    # Frames gravados no lugar da câmera: QR_FRAME_SOURCE=<diretório ou vídeo>
+    frame_source = os.environ.get('QR_FRAME_SOURCE')
+
     # Executar leitor
-    reader = QRReaderWithDatabase(db_path)
+    reader = QRReaderWithDatabase(db_path, frame_source=frame_source)
     reader.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Rastreamento temporal de QR codes
+Depois que um código é lido, só a janela ao redor da última posição dele é
+decodificada nos frames seguintes; a área de detecção inteira é varrida
+periodicamente (ou quando não há nada em vista) para achar códigos novos.
+Gera eventos de entrada/saída do campo de visão.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import VISION_CONFIG
+
+
+def create_tracker() -> Optional['QRTracker']:
+    """Rastreador conforme VISION_CONFIG (None se desabilitado)"""
+    if VISION_CONFIG['qr_code'].get('tracking', {}).get('enabled', False):
+        return QRTracker()
+    return None
+
+
+class QRTracker:
+    """Mantém os QR codes em vista e decide quando varrer a área inteira"""
+
+    def __init__(self, full_scan_interval: int = None, max_misses: int = None,
+                 search_margin: float = None):
+        tracking_config = VISION_CONFIG['qr_code'].get('tracking', {})
+        self.full_scan_interval = full_scan_interval or tracking_config.get('full_scan_interval', 5)
+        self.max_misses = max_misses or tracking_config.get('max_misses', 5)
+        # Folga da janela de busca, em fração do tamanho do código (movimento entre frames)
+        self.search_margin = search_margin or tracking_config.get('search_margin', 0.5)
+
+        self.tracks: Dict[str, Dict[str, Any]] = {}
+        self._last_seq = -1
+        self._lock = threading.Lock()
+
+    def needs_full_scan(self, seq: int) -> bool:
+        """Varredura completa quando nada está em vista ou a cada full_scan_interval frames"""
+        with self._lock:
+            return not self.tracks or seq % self.full_scan_interval == 0
+
+    def search_regions(self) -> List[Tuple[int, int, int, int]]:
+        """Janelas (x, y, w, h) onde os códigos em vista devem estar no próximo frame"""
+        with self._lock:
+            regions = []
+            for track in self.tracks.values():
+                left, top, width, height = track['rect']
+                margin = int(self.search_margin * max(width, height))
+                regions.append((left - margin, top - margin, width + 2 * margin, height + 2 * margin))
+            return regions
+
+    def update(self, seq: int, decoded: List[Any]) -> Tuple[List[Tuple[str, Any]], List[str]]:
+        """
+        Atualiza os códigos em vista com o resultado de um frame.
+        Retorna (entraram [(data, obj)], saíram [data]).
+        """
+        with self._lock:
+            # Frame mais antigo que o último processado (workers fora de ordem): ignorar
+            if seq < self._last_seq:
+                return [], []
+            self._last_seq = seq
+
+            now = time.time()
+            found = {obj.data.decode('utf-8'): obj for obj in decoded}
+
+            entered = []
+            for data, obj in found.items():
+                track = self.tracks.get(data)
+                if track is None:
+                    track = self.tracks[data] = {'data': data, 'first_seen': now}
+                    entered.append((data, obj))
+                track['rect'] = tuple(obj.rect)
+                track['last_seen'] = now
+                track['misses'] = 0
+
+            # Todo código em vista foi procurado neste frame (janela ou varredura completa)
+            left = []
+            for data, track in list(self.tracks.items()):
+                if data in found:
+                    continue
+                track['misses'] += 1
+                if track['misses'] >= self.max_misses:
+                    del self.tracks[data]
+                    left.append(data)
+
+            return entered, left
+
+    def active_tracks(self) -> List[Dict[str, Any]]:
+        """Códigos em vista (para desenhar na tela)"""
+        with self._lock:
+            return [dict(track) for track in self.tracks.values()]
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Tabela de rotas pré-calculada entre as posições de estante e a base
+Para cada posição (corredor/sub_corredor/posicao_x) guarda o campo de distâncias
+e de próxima célula da grade inteira até ela; a distância entre duas posições vira
+uma consulta O(1) e o caminho é seguido sem nova busca. Os arrays ficam em disco
+(.npy) e são abertos com memory-map, no Raspberry e no backend (route_costs.py).
+
+Só as posições novas ou movidas são recalculadas; se a grade (mapa, layout ou
+margem de segurança) mudar, a tabela inteira é refeita.
+
+Uso: python route_table.py [--db caminho_do_banco | --api http://pc:5000] [--out diretório]
+  sem --db/--api, usa todas as posições do layout de NAVIGATION_CONFIG
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import NAVIGATION_CONFIG
+from path_planner import AStarPlanner, PathPlanner, Point
+
+ROUTE_TABLE_DIR = os.getenv('ROUTE_TABLE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'route_table'))
+
+INDEX_FILE = 'index.json'
+DISTANCES_FILE = 'distances.npy'    # [posição, posição] em cm
+FIELDS_FILE = 'fields.npy'          # [posição, célula] distância até a posição em cm
+NEXT_HOP_FILE = 'next_hop.npy'      # [posição, célula] próxima célula rumo à posição
+
+BASE_KEY = 'base'
+
+
+def slot_key(corredor, sub_corredor, posicao_x) -> str:
+    """Chave de uma posição de estante na tabela (mesma do backend)"""
+    return f"{int(corredor)}-{int(sub_corredor)}-{int(posicao_x or 1)}"
+
+
+def grid_fingerprint(planner: PathPlanner) -> str:
+    """Identifica a grade inflada: qualquer mudança de mapa/layout/margem invalida a tabela"""
+    digest = hashlib.sha1(np.packbits(planner.grid.cells).tobytes())
+    digest.update(f"{planner.grid.resolution}:{planner.grid.width}x{planner.grid.height}".encode())
+    return digest.hexdigest()
+
+
+class RouteTable:
+    """Distâncias e próximos passos entre posições, lidos de arrays memory-mapped"""
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or ROUTE_TABLE_DIR
+        self.index: Dict[str, int] = {}
+        self.meta: Dict = {}
+        self.distances = self.fields = self.next_hop = None
+
+    @classmethod
+    def load(cls, directory: str = None) -> Optional['RouteTable']:
+        """Abre a tabela em disco (None se ainda não foi gerada)"""
+        table = cls(directory)
+        index_path = os.path.join(table.directory, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return None
+
+        with open(index_path) as f:
+            table.meta = json.load(f)
+        table.index = {slot['key']: row for row, slot in enumerate(table.meta['slots'])}
+        table.distances = np.load(os.path.join(table.directory, DISTANCES_FILE), mmap_mode='r')
+        table.fields = np.load(os.path.join(table.directory, FIELDS_FILE), mmap_mode='r')
+        table.next_hop = np.load(os.path.join(table.directory, NEXT_HOP_FILE), mmap_mode='r')
+        return table
+
+    def distance(self, origin: str, destination: str) -> Optional[float]:
+        """Distância em cm entre duas posições (chaves de slot_key ou 'base'); None se desconhecida"""
+        row_origin = self.index.get(origin)
+        row_destination = self.index.get(destination)
+        if row_origin is None or row_destination is None:
+            return None
+        value = float(self.distances[row_origin, row_destination])
+        return value if np.isfinite(value) else None
+
+    def distance_from(self, position_cm: Point, destination: str) -> Optional[float]:
+        """Distância em cm de um ponto qualquer do mapa até uma posição da tabela"""
+        row = self.index.get(destination)
+        if row is None:
+            return None
+        value = float(self.fields[row, self._cell(position_cm)])
+        return value if np.isfinite(value) else None
+
+    def path(self, position_cm: Point, destination: str) -> Optional[List[Point]]:
+        """Caminho (pontos em cm nas mudanças de direção) seguindo a tabela, sem busca"""
+        row = self.index.get(destination)
+        if row is None:
+            return None
+
+        width = self.meta['width']
+        resolution = self.meta['resolution']
+        cell = self._cell(position_cm)
+        if not np.isfinite(self.fields[row, cell]):
+            return None
+
+        hops = self.next_hop[row]
+        cells = [cell]
+        while hops[cell] >= 0:
+            cell = int(hops[cell])
+            cells.append(cell)
+
+        points = [((c % width + 0.5) * resolution, (c // width + 0.5) * resolution) for c in cells]
+        return AStarPlanner._corners(points)
+
+    def _cell(self, position_cm: Point) -> int:
+        resolution = self.meta['resolution']
+        col = min(max(int(position_cm[0] // resolution), 0), self.meta['width'] - 1)
+        row = min(max(int(position_cm[1] // resolution), 0), self.meta['height'] - 1)
+        return row * self.meta['width'] + col
+
+
+def build_route_table(slots: Dict[str, Point], directory: str = None,
+                      planner: PathPlanner = None) -> Tuple[RouteTable, int]:
+    """
+    Gera/atualiza a tabela para as posições {chave: (x, y) em cm} (a base é incluída).
+    Reaproveita as linhas de posições que não mudaram se a grade é a mesma.
+    Retorna (tabela, quantidade de posições recalculadas).
+    """
+    directory = directory or ROUTE_TABLE_DIR
+    planner = planner or PathPlanner()
+    fingerprint = grid_fingerprint(planner)
+
+    slots = dict(slots)
+    slots[BASE_KEY] = planner.layout.base
+    cells = {key: planner.grid.to_cell(*position) for key, position in slots.items()}
+
+    previous = RouteTable.load(directory)
+    reusable = {}
+    if previous and previous.meta.get('grid') == fingerprint:
+        for slot in previous.meta['slots']:
+            if slot['key'] in slots and tuple(slot['cell']) == cells[slot['key']]:
+                reusable[slot['key']] = previous.index[slot['key']]
+
+    keys = sorted(slots)
+    cell_count = planner.grid.width * planner.grid.height
+    fields = np.empty((len(keys), cell_count), dtype=np.float32)
+    next_hop = np.empty((len(keys), cell_count), dtype=np.int32)
+
+    computed = 0
+    for row, key in enumerate(keys):
+        if key in reusable:
+            fields[row] = previous.fields[reusable[key]]
+            next_hop[row] = previous.next_hop[reusable[key]]
+        else:
+            field, hops = planner.astar.distance_field(slots[key])
+            fields[row] = field.ravel()
+            next_hop[row] = hops.ravel()
+            computed += 1
+
+    # Distância entre posições: o campo de cada destino lido na célula de cada origem
+    origin_cells = [col + line * planner.grid.width for col, line in (cells[key] for key in keys)]
+    distances = np.ascontiguousarray(fields[:, origin_cells].T)
+
+    meta = {
+        'version': 1,
+        'grid': fingerprint,
+        'resolution': planner.grid.resolution,
+        'width': planner.grid.width,
+        'height': planner.grid.height,
+        'layout': planner.layout.layout,
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'slots': [{'key': key, 'position': list(slots[key]), 'cell': list(cells[key])} for key in keys]
+    }
+
+    # Libera os memory-maps antigos antes de sobrescrever os arquivos
+    previous = None
+    os.makedirs(directory, exist_ok=True)
+    for name, array in ((FIELDS_FILE, fields), (NEXT_HOP_FILE, next_hop), (DISTANCES_FILE, distances)):
+        temporary = os.path.join(directory, name + '.tmp')
+        with open(temporary, 'wb') as f:
+            np.save(f, array)
+        os.replace(temporary, os.path.join(directory, name))
+
+    # O índice é gravado por último: quem lê a tabela só vê a versão nova completa
+    temporary = os.path.join(directory, INDEX_FILE + '.tmp')
+    with open(temporary, 'w') as f:
+        json.dump(meta, f, default=list)
+    os.replace(temporary, os.path.join(directory, INDEX_FILE))
+
+    return RouteTable.load(directory), computed
+
+
+def layout_slots(planner: PathPlanner) -> Dict[str, Point]:
+    """Todas as posições de estante do layout"""
+    config = planner.layout.layout
+    sub_corredores = config['aisle_length'] // config['sub_aisle_length']
+    por_sub = config['sub_aisle_length'] // config['slot_spacing']
+    return {slot_key(c, s, p): planner.layout.slot_position(c, s, p)
+            for c in range(1, config['aisles'] + 1)
+            for s in range(1, sub_corredores + 1)
+            for p in range(1, por_sub + 1)}
+
+
+def item_slots(items, planner: PathPlanner) -> Dict[str, Point]:
+    """Posições ocupadas pelos itens (linhas da tabela itens ou JSON de /itens)"""
+    slots = {}
+    for item in items:
+        corredor = item['corredor'] or 1
+        sub_corredor = item['sub_corredor'] or 1
+        posicao_x = item['posicao_x'] or 1
+        slots[slot_key(corredor, sub_corredor, posicao_x)] = \
+            planner.layout.slot_position(corredor, sub_corredor, posicao_x)
+    return slots
+
+
+def main():
+    args = sys.argv[1:]
+    db_path = api_url = None
+    directory = ROUTE_TABLE_DIR
+    while args:
+        arg = args.pop(0)
+        if arg == '--db':
+            db_path = args.pop(0)
+        elif arg == '--api':
+            api_url = args.pop(0)
+        elif arg == '--out':
+            directory = args.pop(0)
+
+    planner = PathPlanner()
+    if db_path:
+        import sqlite3
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        slots = item_slots(conn.execute('SELECT corredor, sub_corredor, posicao_x FROM itens').fetchall(), planner)
+        conn.close()
+    elif api_url:
+        import requests
+        response = requests.get(f"{api_url}/itens", timeout=10)
+        response.raise_for_status()
+        slots = item_slots(response.json(), planner)
+    else:
+        slots = layout_slots(planner)
+
+    print(f"🗺️ Tabela de rotas: {len(slots)} posições + base, grade "
+          f"{planner.grid.width}x{planner.grid.height} ({NAVIGATION_CONFIG['grid_resolution']} cm)")
+    start = time.perf_counter()
+    table, computed = build_route_table(slots, directory, planner)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {computed} posições recalculadas, {len(slots) + 1 - computed} reaproveitadas "
+          f"em {elapsed:.2f}s -> {directory}")
+
+    # Consulta de exemplo
+    keys = [key for key in table.index if key != BASE_KEY]
+    if keys:
+        start = time.perf_counter()
+        for key in keys:
+            table.distance(BASE_KEY, key)
+        per_lookup = (time.perf_counter() - start) / len(keys) * 1e6
+        print(f"📏 Base -> {keys[-1]}: {table.distance(BASE_KEY, keys[-1]):.0f} cm "
+              f"({per_lookup:.1f} µs por consulta)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Cache local tag -> item para os leitores de QR code
+Baixa o catálogo (/itens) uma vez na inicialização e depois só o revalida com
+ETag (304 quando nada mudou), em segundo plano; a leitura de um QR code não
+faz acesso à rede. Tags desconhecidas ficam em cache negativo por um tempo.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+import requests
+
+
+class TagCache:
+    """Índice tag -> item com revalidação por ETag, limite LRU e cache negativo"""
+
+    def __init__(self, base_url: str, ttl: float = 60.0, negative_ttl: float = 30.0,
+                 max_entries: int = 10000, timeout: float = 5.0):
+        self.base_url = base_url
+        self.ttl = ttl                    # Intervalo para revalidar o catálogo
+        self.negative_ttl = negative_ttl  # Tempo que uma tag desconhecida fica sem nova consulta
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._unknown: "OrderedDict[str, float]" = OrderedDict()
+        self._etag: Optional[str] = None
+        self._refreshed_at = 0.0
+        self._next_refresh = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+
+        self.hits = 0
+        self.misses = 0
+
+    def warm(self) -> bool:
+        """Carrega o catálogo completo (chamar na inicialização)"""
+        return self.refresh()
+
+    def refresh(self) -> bool:
+        """Revalida o catálogo com If-None-Match; só baixa a lista se ela mudou"""
+        headers = {'If-None-Match': self._etag} if self._etag else {}
+
+        try:
+            response = self._session.get(f"{self.base_url}/itens", headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Falha ao atualizar cache de tags: {e}")
+            return False
+        finally:
+            # Em caso de falha também espera o TTL (não martelar um backend fora do ar)
+            self._next_refresh = time.time() + self.ttl
+            self._refreshing = False
+
+        if response.status_code == 304:
+            self._refreshed_at = time.time()
+            return True
+
+        if response.status_code != 200:
+            return False
+
+        items = OrderedDict((item['tag'], item) for item in response.json() if item.get('tag'))
+        while len(items) > self.max_entries:
+            items.popitem(last=False)
+
+        with self._lock:
+            self._items = items
+            # Tag que passou a existir não deve continuar no cache negativo
+            for tag in items:
+                self._unknown.pop(tag, None)
+            self._etag = response.headers.get('ETag')
+            self._refreshed_at = time.time()
+
+        return True
+
+    def get(self, tag: str) -> Optional[Dict[str, Any]]:
+        """Retorna o item da tag (ou None); consulta a rede só para tags fora do catálogo"""
+        now = time.time()
+        if now >= self._next_refresh:
+            self._refresh_in_background()
+
+        with self._lock:
+            item = self._items.get(tag)
+            if item is not None:
+                self._items.move_to_end(tag)
+                self.hits += 1
+                return item
+
+            expires = self._unknown.get(tag)
+            if expires is not None and expires > now:
+                self.hits += 1
+                return None
+
+        self.misses += 1
+        return self._fetch(tag)
+
+    def _fetch(self, tag: str) -> Optional[Dict[str, Any]]:
+        """Consulta uma tag que não está no catálogo local"""
+        try:
+            response = self._session.get(f"{self.base_url}/itens/tag/{tag}", timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Erro ao consultar API: {e}")
+            return None
+
+        with self._lock:
+            if response.status_code == 200:
+                item = response.json()
+                self._items[tag] = item
+                if len(self._items) > self.max_entries:
+                    self._items.popitem(last=False)
+                return item
+
+            if response.status_code == 404:
+                self._unknown[tag] = time.time() + self.negative_ttl
+                if len(self._unknown) > self.max_entries:
+                    self._unknown.popitem(last=False)
+
+        return None
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name='tag-cache-refresh', daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas do cache"""
+        return {
+            'items': len(self._items),
+            'unknown': len(self._unknown),
+            'hits': self.hits,
+            'misses': self.misses,
+            'etag': self._etag,
+            'age': time.time() - self._refreshed_at if self._refreshed_at else None
+        }
@@ -39,6 +39,28 @@ def main():
             print("✅ Sistema estéreo: OK")
         else:
             print("⚠️ Sistema estéreo: Incompleto")
+        dual_camera.release_frames(frame1, frame2)
+        dual_camera.release_frames(stereo1, stereo2)
+
+        # Captura paralela sincronizada
+        print("\n⏱️ Testando captura sincronizada (5 segundos)...")
+        dual_camera.start_streaming()
+        fim = time.time() + 5
+        while dual_camera.streaming and time.time() < fim:
+            par = dual_camera.get_pair()
+            if par:
+                dual_camera.release_frames(par.frame1, par.frame2)
+        dual_camera.stop_streaming()
+
+        stats = dual_camera.stats()
+        if stats['pairs']:
+            print(f"✅ FPS câmeras: {stats['camera_fps'][0]:.1f} / {stats['camera_fps'][1]:.1f}, "
+                  f"pares: {stats['pair_fps']:.1f}/s")
+            print(f"   Skew médio {stats['avg_skew_ms']:.1f} ms (máx {stats['max_skew_ms']:.1f} ms), "
+                  f"latência média {stats['avg_latency_ms']:.1f} ms, "
+                  f"{stats['unmatched_frames']} frames sem par")
+        else:
+            print("⚠️ Captura sincronizada: nenhum par formado")
 
         print("\n🎉 Teste concluído!")
 
@@ -3,6 +3,8 @@ from werkzeug.utils import secure_filename
 import os
 import uuid
 from database import get_db_connection
+from response_cache import cached_response
+from pagination import paginated_response, keyset_condition
 
 armazem_bp = Blueprint('armazem', __name__)
 
@@ -13,6 +15,7 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 @armazem_bp.route("/armazem/categorias", methods=["GET"])
+@cached_response('categorias')
 def listar_categorias():
     """Lista todas as categorias disponíveis"""
     conn = get_db_connection()
@@ -77,18 +80,24 @@ def upload_imagem():
     return jsonify({"error": "Tipo de arquivo não permitido"}), 400
 
 @armazem_bp.route("/armazem/itens", methods=["GET"])
+@cached_response('itens')
 def listar_itens_armazem():
-    """Lista todos os itens do armazém com localização"""
-    conn = get_db_connection()
-    itens = conn.execute('''
-        SELECT id, nome, tag, categoria, imagem, disponivel, 
-               posicao_x, posicao_y, corredor, sub_corredor
-        FROM itens 
-        ORDER BY corredor, sub_corredor, posicao_x, posicao_y
-    ''').fetchall()
-    conn.close()
-    
-    return jsonify([dict(item) for item in itens])
+    """Lista os itens do armazém com localização, paginados na ordem das posições"""
+    # Ordem coberta pelo índice idx_itens_localizacao (+ id como desempate)
+    chave = ('corredor', 'sub_corredor', 'posicao_x', 'id')
+
+    def pagina(conn, depois, limite):
+        filtro, params = keyset_condition(chave, depois) if depois else ('1', [])
+        return conn.execute(f'''
+            SELECT id, nome, tag, categoria, imagem, disponivel,
+                   posicao_x, posicao_y, corredor, sub_corredor
+            FROM itens
+            WHERE {filtro}
+            ORDER BY corredor, sub_corredor, posicao_x, id
+            LIMIT ?
+        ''', params + [limite]).fetchall()
+
+    return paginated_response(pagina, chave)
 
 @armazem_bp.route("/armazem/itens", methods=["POST"])
 def criar_item_armazem():
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from database import verificar_usuario
+from pagination import paginated_response, keyset_condition
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -38,18 +39,18 @@ def login():
 
 @auth_bp.route("/usuarios", methods=["GET"])
 def listar_usuarios():
-    """Lista todos os usuários (apenas para gerentes)"""
-    from database import get_db_connection
-    
-    conn = get_db_connection()
-    usuarios = conn.execute('''
-        SELECT id, nome, username, perfil, ativo, created_at
-        FROM usuarios 
-        ORDER BY nome
-    ''').fetchall()
-    conn.close()
-    
-    return jsonify([dict(usuario) for usuario in usuarios])
+    """Lista os usuários (apenas para gerentes), paginado por nome"""
+    def pagina(conn, depois, limite):
+        filtro, params = keyset_condition(('nome', 'id'), depois) if depois else ('1', [])
+        return conn.execute(f'''
+            SELECT id, nome, username, perfil, ativo, created_at
+            FROM usuarios
+            WHERE {filtro}
+            ORDER BY nome, id
+            LIMIT ?
+        ''', params + [limite]).fetchall()
+
+    return paginated_response(pagina, ('nome', 'id'))
 
 @auth_bp.route("/usuarios", methods=["POST"])
 def criar_usuario():
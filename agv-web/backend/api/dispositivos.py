@@ -1,9 +1,11 @@
 from flask import Blueprint, jsonify, request
 from database import get_db_connection
+from response_cache import cached_response
 
 dispositivos_bp = Blueprint('dispositivos', __name__)
 
 @dispositivos_bp.route("/dispositivos", methods=["GET"])
+@cached_response('dispositivos')
 def listar_dispositivos():
     """Lista todos os dispositivos"""
     conn = get_db_connection()
@@ -17,6 +19,7 @@ def listar_dispositivos():
     return jsonify([dict(dispositivo) for dispositivo in dispositivos])
 
 @dispositivos_bp.route("/dispositivos/disponiveis", methods=["GET"])
+@cached_response('dispositivos')
 def listar_dispositivos_disponiveis():
     """Lista apenas dispositivos disponíveis"""
     conn = get_db_connection()
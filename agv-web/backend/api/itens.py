@@ -1,9 +1,12 @@
 from flask import Blueprint, jsonify, request
 from database import get_db_connection
+from item_search import search_items, search_limit
+from response_cache import cached_response
 
 itens_bp = Blueprint('itens', __name__)
 
 @itens_bp.route("/itens", methods=["GET"])
+@cached_response('itens')
 def listar_itens():
     """Lista todos os itens disponíveis"""
     conn = get_db_connection()
@@ -15,21 +18,17 @@ def listar_itens():
     ''').fetchall()
     conn.close()
 
+    # ETag vem do cache: o leitor de QR do Raspberry revalida o catálogo e recebe 304 se nada mudou
     return jsonify([dict(item) for item in itens])
 
 @itens_bp.route("/itens/pesquisar", methods=["GET"])
 def pesquisar_itens():
-    """Pesquisa itens por nome ou tag"""
+    """Pesquisa itens por nome ou tag (trechos do texto, ordenados por relevância)"""
     termo = request.args.get('q', '').strip()
+    limite = search_limit(request.args.get('limite'))
 
     conn = get_db_connection()
-    itens = conn.execute('''
-        SELECT id, nome, tag, categoria, imagem, disponivel, posicao_x, posicao_y, corredor, sub_corredor
-        FROM itens
-        WHERE disponivel = 1
-        AND (nome LIKE ? OR tag LIKE ?)
-        ORDER BY categoria, nome
-    ''', (f'%{termo}%', f'%{termo}%')).fetchall()
+    itens = search_items(conn, termo, ('nome', 'tag'), limite)
     conn.close()
 
     return jsonify([dict(item) for item in itens])
@@ -68,15 +67,10 @@ def buscar_itens_por_localizacao(corredor, sub_corredor):
 def buscar_item_geral():
     """Busca geral de itens por qualquer critério"""
     termo = request.args.get('q', '').strip()
+    limite = search_limit(request.args.get('limite'))
 
     conn = get_db_connection()
-    itens = conn.execute('''
-        SELECT id, nome, tag, categoria, imagem, disponivel, posicao_x, posicao_y, corredor, sub_corredor
-        FROM itens
-        WHERE disponivel = 1
-        AND (nome LIKE ? OR tag LIKE ? OR categoria LIKE ? OR corredor LIKE ? OR sub_corredor LIKE ?)
-        ORDER BY categoria, nome
-    ''', (f'%{termo}%', f'%{termo}%', f'%{termo}%', f'%{termo}%', f'%{termo}%')).fetchall()
+    itens = search_items(conn, termo, ('nome', 'tag', 'categoria', 'corredor', 'sub_corredor'), limite)
     conn.close()
 
     return jsonify([dict(item) for item in itens])
\ No newline at end of file
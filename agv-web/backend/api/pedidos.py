@@ -1,112 +1,95 @@
 from flask import Blueprint, jsonify, request
 from database import get_db_connection
+from pagination import paginated_response, keyset_condition
+from order_summary import ORDER_COLUMNS, ORDER_JOINS, order_dict
+from order_creation import create_orders, BULK_MAX_ORDERS
 
 pedidos_bp = Blueprint('pedidos', __name__)
 
 @pedidos_bp.route("/pedidos", methods=["POST"])
 def criar_pedido():
     """Cria um novo pedido"""
-    data = request.json
-    usuario_id = data.get('usuario_id')  # Agora recebe ID do usuário
-    itens_ids = data.get('itens', [])
-    dispositivo_id = data.get('dispositivo_id')
-    
-    if not usuario_id or not itens_ids or not dispositivo_id:
-        return jsonify({"error": "Usuario_id, itens e dispositivo são obrigatórios"}), 400
-    
-    if len(itens_ids) > 4:
-        return jsonify({"error": "Máximo 4 itens por pedido"}), 400
-    
     conn = get_db_connection()
-    
-    # Verificar se usuário existe
-    usuario = conn.execute('SELECT id, nome FROM usuarios WHERE id = ?', (usuario_id,)).fetchone()
-    if not usuario:
+    try:
+        resultado, = create_orders(conn, [request.json])
+    finally:
         conn.close()
-        return jsonify({"error": "Usuário não encontrado"}), 400
-    
-    # Verificar se dispositivo está disponível
-    dispositivo = conn.execute('''
-        SELECT status FROM dispositivos WHERE id = ?
-    ''', (dispositivo_id,)).fetchone()
-    
-    if not dispositivo or dispositivo['status'] != 'disponivel':
-        conn.close()
-        return jsonify({"error": "Dispositivo não disponível"}), 400
-    
-    # Marcar dispositivo como ocupado
-    conn.execute('''
-        UPDATE dispositivos SET status = 'ocupado' WHERE id = ?
-    ''', (dispositivo_id,))
-    
-    # Criar pedido
-    cursor = conn.execute('''
-        INSERT INTO pedidos (usuario_id, status, dispositivo_id) 
-        VALUES (?, 'pendente', ?)
-    ''', (usuario_id, dispositivo_id))
-    
-    pedido_id = cursor.lastrowid
-    
-    # Adicionar itens ao pedido
-    for item_id in itens_ids:
-        conn.execute('''
-            INSERT INTO pedido_itens (pedido_id, item_id)
-            VALUES (?, ?)
-        ''', (pedido_id, item_id))
-    
-    conn.commit()
-    conn.close()
-    
+
+    if 'error' in resultado:
+        return jsonify({"error": resultado['error']}), 400
+
     return jsonify({
         "success": True,
-        "pedido_id": pedido_id,
-        "message": f"Pedido criado com sucesso para {usuario['nome']}!"
+        "pedido_id": resultado['pedido_id'],
+        "message": f"Pedido criado com sucesso para {resultado['usuario_nome']}!"
+    })
+
+@pedidos_bp.route("/pedidos/lote", methods=["POST"])
+def criar_pedidos_lote():
+    """Cria vários pedidos em uma transação (importação do ERP); recusas são informadas por pedido"""
+    pedidos = (request.json or {}).get('pedidos')
+    if not isinstance(pedidos, list) or not pedidos:
+        return jsonify({"error": "Lista de pedidos é obrigatória"}), 400
+    if len(pedidos) > BULK_MAX_ORDERS:
+        return jsonify({"error": f"Máximo {BULK_MAX_ORDERS} pedidos por lote"}), 400
+
+    conn = get_db_connection()
+    try:
+        resultados = create_orders(conn, pedidos)
+    finally:
+        conn.close()
+
+    criados = sum(1 for resultado in resultados if 'pedido_id' in resultado)
+    return jsonify({
+        "success": criados > 0,
+        "criados": criados,
+        "recusados": len(resultados) - criados,
+        "pedidos": [dict(resultado, indice=indice) for indice, resultado in enumerate(resultados)]
     })
 
 @pedidos_bp.route("/pedidos", methods=["GET"])
 def listar_pedidos():
-    """Lista todos os pedidos com filtros opcionais"""
+    """Lista os pedidos (mais recentes primeiro) com filtros opcionais, paginados"""
     dispositivo_id = request.args.get('dispositivo_id')
     status_filter = request.args.get('status')
     
-    query = '''
-        SELECT p.id, u.nome as usuario_nome, u.username, p.status, p.created_at,
-               d.nome as dispositivo_nome, d.codigo as dispositivo_codigo,
-               GROUP_CONCAT(i.nome) as itens,
-               GROUP_CONCAT(i.corredor) as corredores,
-               GROUP_CONCAT(i.sub_corredor) as sub_corredores,
-               GROUP_CONCAT(i.posicao_x) as posicoes_x
-        FROM pedidos p
-        LEFT JOIN usuarios u ON p.usuario_id = u.id
-        LEFT JOIN dispositivos d ON p.dispositivo_id = d.id
-        LEFT JOIN pedido_itens pi ON p.id = pi.pedido_id
-        LEFT JOIN itens i ON pi.item_id = i.id
-    '''
-    
     conditions = []
     params = []
     
     if dispositivo_id:
-        conditions.append('p.dispositivo_id = ?')
+        conditions.append('dispositivo_id = ?')
         params.append(dispositivo_id)
     
     if status_filter:
         # Se múltiplos status (separados por vírgula)
         status_list = status_filter.split(',')
         placeholders = ','.join(['?' for _ in status_list])
-        conditions.append(f'p.status IN ({placeholders})')
+        conditions.append(f'status IN ({placeholders})')
         params.extend(status_list)
-    
-    if conditions:
-        query += ' WHERE ' + ' AND '.join(conditions)
-    
-    query += ' GROUP BY p.id ORDER BY p.created_at DESC'
-    
-    conn = get_db_connection()
-    pedidos = conn.execute(query, params).fetchall()
-    conn.close()
-    
-    return jsonify([dict(pedido) for pedido in pedidos])
+
+    def pagina(conn, depois, limite):
+        filtros, valores = list(conditions), list(params)
+        if depois:
+            filtro, valores_cursor = keyset_condition(('created_at', 'id'), depois, descending=True)
+            filtros.append(filtro)
+            valores += valores_cursor
+        where = ' WHERE ' + ' AND '.join(filtros) if filtros else ''
+
+        # A página é escolhida só na tabela pedidos (pelo índice); os itens vêm prontos do resumo
+        linhas = conn.execute(f'''
+            SELECT {ORDER_COLUMNS}
+            FROM (
+                SELECT id, usuario_id, dispositivo_id, status, created_at
+                FROM pedidos{where}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ) p
+            {ORDER_JOINS}
+            ORDER BY p.created_at DESC, p.id DESC
+        ''', valores + [limite]).fetchall()
+        return [order_dict(linha) for linha in linhas]
+
+    return paginated_response(pagina, ('created_at', 'id'))
 
 @pedidos_bp.route("/pedidos/<int:pedido_id>/cancelar", methods=["PUT"])
 def cancelar_pedido(pedido_id):
@@ -145,7 +128,8 @@ def atualizar_status_pedido(pedido_id):
     if not novo_status:
         return jsonify({"error": "Status é obrigatório"}), 400
     
-    status_validos = ['pendente', 'em_andamento', 'coletando', 'concluido', 'cancelado']
+    # 'falha': o AGV não conseguiu executar o pedido; fica visível até o operador decidir
+    status_validos = ['pendente', 'em_andamento', 'coletando', 'concluido', 'cancelado', 'falha']
     if novo_status not in status_validos:
         return jsonify({"error": "Status inválido"}), 400
     
@@ -174,27 +158,18 @@ def atualizar_status_pedido(pedido_id):
 def pedido_ativo():
     """Retorna o pedido atualmente ativo (em andamento)"""
     conn = get_db_connection()
-    pedido = conn.execute('''
-        SELECT p.id, u.nome as usuario_nome, u.username, p.status, p.created_at,
-               d.nome as dispositivo_nome, d.codigo as dispositivo_codigo,
-               GROUP_CONCAT(i.nome) as itens,
-               GROUP_CONCAT(i.corredor) as corredores,
-               GROUP_CONCAT(i.sub_corredor) as sub_corredores,
-               GROUP_CONCAT(i.posicao_x) as posicoes_x
+    pedido = conn.execute(f'''
+        SELECT {ORDER_COLUMNS}
         FROM pedidos p
-        LEFT JOIN usuarios u ON p.usuario_id = u.id
-        LEFT JOIN dispositivos d ON p.dispositivo_id = d.id
-        LEFT JOIN pedido_itens pi ON p.id = pi.pedido_id
-        LEFT JOIN itens i ON pi.item_id = i.id
+        {ORDER_JOINS}
         WHERE p.status IN ('em_andamento', 'coletando')
-        GROUP BY p.id
         ORDER BY p.created_at DESC
         LIMIT 1
     ''').fetchone()
     conn.close()
     
     if pedido:
-        return jsonify(dict(pedido))
+        return jsonify(order_dict(pedido))
     else:
         return jsonify(None)
 
@@ -9,6 +9,13 @@ import logging
 import json
 from datetime import datetime
 from database import get_db_connection
+from dispatch import (
+    claim_next_order, acknowledge_command, renew_lease, wait_for_order,
+    COMMAND_LEASE_SECONDS, LONG_POLL_MAX_SECONDS
+)
+from route_costs import route_costs
+from route_optimizer import plan_pick_route
+from order_summary import ORDER_COLUMNS, ORDER_JOINS, order_dict
 
 logger = logging.getLogger(__name__)
 
@@ -147,15 +154,21 @@ def receive_command_acknowledgment():
 
         logger.info(f"Confirmação de comando recebida: {command_id} - Success: {success}")
 
-        # Atualizar status do pedido se necessário
-        if command_id and success:
-            # TODO: Implementar atualização de status do pedido
-            pass
+        # Confirmar o lease do pedido (ou devolvê-lo à fila em caso de falha)
+        pedido_id = None
+        if command_id:
+            conn = get_db_connection()
+            pedido_id = acknowledge_command(conn, command_id, success)
+            conn.close()
+
+            if pedido_id is None:
+                logger.warning(f"Comando {command_id} sem pedido reservado (lease expirado?)")
 
         # Broadcast confirmação via WebSocket
         from app import socketio
         socketio.emit('command_acknowledgment', {
             'command_id': command_id,
+            'order_id': pedido_id,
             'success': success,
             'result': result,
             'timestamp': datetime.now().isoformat()
@@ -173,93 +186,156 @@ def receive_command_acknowledgment():
             'error': str(e)
         }), 500
 
-@raspberry_bp.route('/agv/next_command', methods=['GET'])
-def get_next_command():
-    """Retorna próximo comando para o AGV"""
+@raspberry_bp.route('/agv/command_lease', methods=['POST'])
+def renew_command_lease():
+    """Renova o lease de um comando que o AGV ainda está executando"""
+    data = request.get_json(silent=True) or {}
+    command_id = data.get('command_id')
+    if not command_id:
+        return jsonify({
+            'success': False,
+            'error': 'command_id é obrigatório'
+        }), 400
+
+    conn = get_db_connection()
     try:
-        agv_ip = request.remote_addr
-        logger.info(f"Solicitando próximo comando para AGV: {agv_ip}")
+        pedido_id = renew_lease(conn, command_id)
+    finally:
+        conn.close()
 
-        # Encontrar pedidos pendentes
-        conn = get_db_connection()
+    if pedido_id is None:
+        # Lease já expirou (pedido devolvido à fila) ou comando confirmado
+        return jsonify({
+            'success': False,
+            'error': f'Comando {command_id} sem lease ativo'
+        }), 404
 
-        # Buscar pedido pendente mais antigo
-        pending_order = conn.execute('''
-            SELECT p.id, p.usuario_id, p.dispositivo_id,
-                   u.nome as usuario_nome, u.username,
-                   d.nome as dispositivo_nome, d.codigo as dispositivo_codigo,
-                   GROUP_CONCAT(i.id) as item_ids,
-                   GROUP_CONCAT(i.nome) as item_names,
-                   GROUP_CONCAT(i.corredor) as corredores,
-                   GROUP_CONCAT(i.sub_corredor) as sub_corredores,
-                   GROUP_CONCAT(i.posicao_x) as posicoes_x,
-                   COUNT(pi.id) as total_itens
-            FROM pedidos p
-            LEFT JOIN usuarios u ON p.usuario_id = u.id
-            LEFT JOIN dispositivos d ON p.dispositivo_id = d.id
-            LEFT JOIN pedido_itens pi ON p.id = pi.pedido_id
-            LEFT JOIN itens i ON pi.item_id = i.id
-            WHERE p.status = 'pendente'
-            GROUP BY p.id
-            ORDER BY p.created_at ASC
-            LIMIT 1
-        ''').fetchone()
-
-        if pending_order:
-            # Atualizar status para em_andamento
-            conn.execute(
-                'UPDATE pedidos SET status = ? WHERE id = ?',
-                ('em_andamento', pending_order['id'])
-            )
-            conn.commit()
-
-            # Preparar dados do comando
-            command_data = {
-                'id': f"cmd_{pending_order['id']}_{datetime.now().timestamp()}",
-                'type': 'pickup_order',
-                'order_id': pending_order['id'],
-                'user': {
-                    'id': pending_order['usuario_id'],
-                    'name': pending_order['usuario_nome'],
-                    'username': pending_order['usuario_username']
-                },
-                'device': {
-                    'id': pending_order['dispositivo_id'],
-                    'name': pending_order['dispositivo_nome'],
-                    'code': pending_order['dispositivo_codigo']
-                },
-                'items': []
+    return jsonify({
+        'success': True,
+        'order_id': pedido_id,
+        'lease_seconds': COMMAND_LEASE_SECONDS
+    })
+
+def build_pickup_command(conn, pedido_id, command_id):
+    """Monta o comando pickup_order de um pedido já reservado para o AGV"""
+    pending_order = order_dict(conn.execute(f'''
+        SELECT {ORDER_COLUMNS}
+        FROM pedidos p
+        {ORDER_JOINS}
+        WHERE p.id = ?
+    ''', (pedido_id,)).fetchone())
+
+    # Preparar dados do comando
+    command_data = {
+        'id': command_id,
+        'type': 'pickup_order',
+        'order_id': pending_order['id'],
+        'lease_seconds': COMMAND_LEASE_SECONDS,
+        'user': {
+            'id': pending_order['usuario_id'],
+            'name': pending_order['usuario_nome'],
+            'username': pending_order['username']
+        },
+        'device': {
+            'id': pending_order['dispositivo_id'],
+            'name': pending_order['dispositivo_nome'],
+            'code': pending_order['dispositivo_codigo']
+        },
+        'items': []
+    }
+
+    # Adicionar itens
+    for item in pending_order['itens']:
+        command_data['items'].append({
+            'id': item['id'],
+            'name': item['nome'] or 'Unknown',
+            'location': {
+                'corredor': int(item['corredor'] or 1),
+                'sub_corredor': int(item['sub_corredor'] or 1),
+                'posicao_x': int(item['posicao_x'] or 1)
             }
+        })
 
-            # Adicionar itens
-            if pending_order['item_ids']:
-                item_ids = pending_order['item_ids'].split(',')
-                item_names = pending_order['item_names'].split(',')
-                corredores = pending_order['corredores'].split(',')
-                sub_corredores = pending_order['sub_corredores'].split(',')
-                posicoes_x = pending_order['posicoes_x'].split(',')
-
-                for i, item_id in enumerate(item_ids):
-                    command_data['items'].append({
-                        'id': int(item_id),
-                        'name': item_names[i] if i < len(item_names) else 'Unknown',
-                        'location': {
-                            'corredor': int(corredores[i]) if i < len(corredores) else 1,
-                            'sub_corredor': int(sub_corredores[i]) if i < len(sub_corredores) else 1,
-                            'posicao_x': int(posicoes_x[i]) if i < len(posicoes_x) else 1
-                        }
-                    })
+    # Sequenciar a coleta pela menor rota (base -> itens -> base)
+    order, distance_cm, exact = plan_pick_route([item['location'] for item in command_data['items']])
+    command_data['items'] = [command_data['items'][i] for i in order]
+    command_data['route'] = {
+        'visit_order': [item['id'] for item in command_data['items']],
+        'distance_cm': round(distance_cm, 1),
+        'method': 'exact' if exact else 'heuristic',
+        'source': 'table' if route_costs.available else 'estimate',
+        'layout': route_costs.layout_source
+    }
+
+    return command_data
+
+def resolve_device_id(dispositivo_id=None, codigo=None):
+    """Converte o código do dispositivo (ex: AGV001) em id; retorna (id, erro)"""
+    if dispositivo_id is not None or not codigo:
+        return dispositivo_id, None
+
+    conn = get_db_connection()
+    dispositivo = conn.execute(
+        'SELECT id FROM dispositivos WHERE codigo = ?', (codigo,)
+    ).fetchone()
+    conn.close()
+
+    if not dispositivo:
+        return None, f'Dispositivo {codigo} não encontrado'
+    return dispositivo['id'], None
+
+def claim_command(dispositivo_id=None, wait=0):
+    """Reserva o próximo pedido (esperando até `wait` segundos) e retorna o comando ou None"""
+    if wait > 0:
+        claim = wait_for_order(get_db_connection, dispositivo_id, timeout=wait)
+    else:
+        conn = get_db_connection()
+        claim = claim_next_order(conn, dispositivo_id)
+        conn.close()
 
-            conn.close()
+    if not claim:
+        return None
+
+    pedido_id, command_id = claim
+    conn = get_db_connection()
+    try:
+        command_data = build_pickup_command(conn, pedido_id, command_id)
+    finally:
+        conn.close()
 
-            logger.info(f"Comando preparado para pedido {pending_order['id']}")
+    logger.info(f"Comando {command_id} reservado para pedido {pedido_id}")
+    return command_data
 
+@raspberry_bp.route('/agv/next_command', methods=['GET'])
+def get_next_command():
+    """
+    Retorna próximo comando para o AGV.
+    Com ?wait=N a requisição fica aberta (long-polling) até surgir um comando
+    ou passarem N segundos (máximo LONG_POLL_MAX_SECONDS).
+    """
+    try:
+        agv_ip = request.remote_addr
+        wait = min(max(request.args.get('wait', 0, type=float), 0), LONG_POLL_MAX_SECONDS)
+        logger.info(f"Solicitando próximo comando para AGV: {agv_ip}")
+
+        dispositivo_id, error = resolve_device_id(
+            request.args.get('dispositivo_id', type=int),
+            request.args.get('codigo')
+        )
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 404
+
+        command_data = claim_command(dispositivo_id, wait)
+
+        if command_data:
             return jsonify({
                 'success': True,
                 'command': command_data
             })
         else:
-            conn.close()
             return jsonify({
                 'success': True,
                 'command': None,
@@ -283,36 +359,26 @@ def sync_orders():
         conn = get_db_connection()
 
         # Buscar pedidos ativos
-        active_orders = conn.execute('''
-            SELECT p.id, p.status, p.created_at,
-                   u.nome as usuario_nome, u.username,
-                   GROUP_CONCAT(i.nome) as itens,
-                   GROUP_CONCAT(i.corredor) as corredores,
-                   GROUP_CONCAT(i.sub_corredor) as sub_corredores,
-                   GROUP_CONCAT(i.posicao_x) as posicoes_x
+        active_orders = conn.execute(f'''
+            SELECT {ORDER_COLUMNS}
             FROM pedidos p
-            LEFT JOIN usuarios u ON p.usuario_id = u.id
-            LEFT JOIN pedido_itens pi ON p.id = pi.pedido_id
-            LEFT JOIN itens i ON pi.item_id = i.id
+            {ORDER_JOINS}
             WHERE p.status IN ('pendente', 'em_andamento', 'coletando')
-            GROUP BY p.id
             ORDER BY p.created_at DESC
         ''').fetchall()
 
         conn.close()
 
         orders_data = []
-        for order in active_orders:
+        for order in map(order_dict, active_orders):
             orders_data.append({
                 'id': order['id'],
                 'status': order['status'],
                 'created_at': order['created_at'],
                 'usuario_nome': order['usuario_nome'],
-                'usuario_username': order['usuario_username'],
-                'itens': order['itens'].split(',') if order['itens'] else [],
-                'corredores': order['corredores'].split(',') if order['corredores'] else [],
-                'sub_corredores': order['sub_corredores'].split(',') if order['sub_corredores'] else [],
-                'posicoes_x': order['posicoes_x'].split(',') if order['posicoes_x'] else []
+                'usuario_username': order['username'],
+                'itens': order['itens'],
+                'total_itens': order['total_itens']
             })
 
         return jsonify({
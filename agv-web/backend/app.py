@@ -3,18 +3,21 @@ from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import os
 import threading
-import time
 from api.status import status_bp
 from api.auth import auth_bp
 from api.itens import itens_bp
 from api.pedidos import pedidos_bp
 from api.dispositivos import dispositivos_bp
 from api.armazem import armazem_bp
-from api.raspberry import raspberry_bp
-from database import init_db, get_db_connection
+from api.raspberry import raspberry_bp, claim_command, resolve_device_id
+from database import init_db, get_db_connection, add_commit_listener
+from status_tracker import StatusTracker
+from dispatch import command_notifier, LONG_POLL_RECHECK_SECONDS
+from response_cache import table_versions
 
 app = Flask(__name__)
-CORS(app)
+# Expose the next-page cursor of paginated listings to the web client
+CORS(app, expose_headers=['X-Next-Cursor', 'Link'])
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 STATIC_FOLDER = 'static'
@@ -24,6 +27,19 @@ os.makedirs(IMAGES_FOLDER, exist_ok=True)
 # Global variable to store connected clients
 connected_clients = set()
 
+# In-memory snapshot of devices/active orders, refreshed after database writes
+STATUS_CHECK_INTERVAL = 0.5
+status_tracker = StatusTracker(resync_interval=30)
+add_commit_listener(status_tracker.mark_dirty)
+
+# AGVs connected to the /agv namespace waiting for a command: sid -> dispositivo_id
+waiting_agvs = {}
+waiting_agvs_lock = threading.Lock()
+add_commit_listener(command_notifier.notify)
+
+# Catalog responses are cached per table version; re-read versions after writes
+add_commit_listener(table_versions.mark_dirty)
+
 @app.route('/static/images/<filename>')
 def serve_image(filename):
     return send_from_directory(IMAGES_FOLDER, filename)
@@ -45,6 +61,12 @@ def handle_connect():
     connected_clients.add(request.sid)
     print(f"Client connected: {request.sid}")
     emit('status', {'message': 'Connected to AGV System'})
+    emit('system_status', status_tracker.snapshot())
+
+@socketio.on('request_status_resync')
+def handle_status_resync():
+    """Send the full snapshot again (client missed a delta version)"""
+    emit('system_status', status_tracker.snapshot())
 
 @socketio.on('disconnect')
 def handle_disconnect():
@@ -68,62 +90,74 @@ def handle_leave_room(data):
         leave_room(room)
         emit('room_left', {'room': room})
 
+# AGV command channel (push alternative to polling /agv/next_command)
+@socketio.on('request_command', namespace='/agv')
+def handle_agv_request_command(data=None):
+    """AGV is idle and wants its next command; it is pushed as soon as one exists"""
+    data = data or {}
+    dispositivo_id, error = resolve_device_id(data.get('dispositivo_id'), data.get('codigo'))
+    if error:
+        emit('command_error', {'error': error})
+        return
+
+    with waiting_agvs_lock:
+        waiting_agvs[request.sid] = dispositivo_id
+    command_notifier.notify()
+
+@socketio.on('disconnect', namespace='/agv')
+def handle_agv_disconnect():
+    """Forget AGVs that left while waiting"""
+    with waiting_agvs_lock:
+        waiting_agvs.pop(request.sid, None)
+
+def dispatch_waiting_agvs():
+    """Push commands to AGVs waiting on the /agv namespace"""
+    while True:
+        generation = command_notifier.generation()
+        try:
+            with waiting_agvs_lock:
+                waiting = list(waiting_agvs.items())
+
+            for sid, dispositivo_id in waiting:
+                command_data = claim_command(dispositivo_id)
+                if command_data:
+                    with waiting_agvs_lock:
+                        waiting_agvs.pop(sid, None)
+                    socketio.emit('command', command_data, to=sid, namespace='/agv')
+
+        except Exception as e:
+            print(f"Error dispatching AGV commands: {e}")
+
+        # Wakes up on any database write; periodic recheck catches expired leases
+        command_notifier.wait(generation, LONG_POLL_RECHECK_SECONDS)
+
 def broadcast_agv_status():
-    """Broadcast AGV status updates to all connected clients"""
+    """Broadcast AGV status deltas to all connected clients"""
     while True:
         try:
-            conn = get_db_connection()
-
-            # Get all devices with their current status
-            devices = conn.execute('''
-                SELECT id, nome, codigo, status, bateria, localizacao
-                FROM dispositivos
-            ''').fetchall()
-
-            # Get active orders with detailed item information
-            active_orders = conn.execute('''
-                SELECT p.id, p.status, p.created_at, p.dispositivo_id,
-                       u.nome as usuario_nome, u.username,
-                       d.nome as dispositivo_nome, d.codigo as dispositivo_codigo,
-                       GROUP_CONCAT(i.nome) as itens,
-                       GROUP_CONCAT(i.corredor) as corredores,
-                       GROUP_CONCAT(i.sub_corredor) as sub_corredores,
-                       GROUP_CONCAT(i.posicao_x) as posicoes_x,
-                       COUNT(pi.id) as total_itens
-                FROM pedidos p
-                LEFT JOIN usuarios u ON p.usuario_id = u.id
-                LEFT JOIN dispositivos d ON p.dispositivo_id = d.id
-                LEFT JOIN pedido_itens pi ON p.id = pi.pedido_id
-                LEFT JOIN itens i ON pi.item_id = i.id
-                WHERE p.status IN ('pendente', 'em_andamento', 'coletando')
-                GROUP BY p.id
-                ORDER BY p.created_at DESC
-            ''').fetchall()
-
-            conn.close()
-
-            # Prepare status data
-            status_data = {
-                'timestamp': time.time(),
-                'devices': [dict(device) for device in devices],
-                'active_orders': [dict(order) for order in active_orders],
-                'total_clients': len(connected_clients)
-            }
-
-            # Broadcast to all connected clients
-            socketio.emit('system_status', status_data)
+            if status_tracker.needs_refresh() or status_tracker.total_clients != len(connected_clients):
+                conn = get_db_connection()
+                try:
+                    delta = status_tracker.refresh(conn, total_clients=len(connected_clients))
+                finally:
+                    conn.close()
+
+                # Only emit when something actually changed
+                if delta:
+                    socketio.emit('system_status_delta', delta)
 
         except Exception as e:
             print(f"Error broadcasting status: {e}")
 
-        # Broadcast every 2 seconds
-        socketio.sleep(2)
+        # Cheap check: the database is only queried after a write or on periodic resync
+        socketio.sleep(STATUS_CHECK_INTERVAL)
 
 # Start background thread for status broadcasting
 def start_status_broadcast():
-    """Start the background thread for status broadcasting"""
+    """Start the background threads for status broadcasting and command push"""
     thread = threading.Thread(target=broadcast_agv_status, daemon=True)
     thread.start()
+    threading.Thread(target=dispatch_waiting_agvs, daemon=True).start()
 
 # Start the status broadcast thread when the app starts
 start_status_broadcast()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark da camada de banco de dados
+Compara conexão nova por requisição (modo antigo) com o pool WAL e mede a
+criação de pedidos (pedidos/s) com clientes concorrentes: item a item sem
+transação (modo antigo), transação única por pedido e lotes de /pedidos/lote
+
+Uso: python benchmark_db.py [threads] [requisicoes_por_thread]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import database
+from order_summary import ORDER_COLUMNS, ORDER_JOINS
+from order_creation import create_orders
+
+QUERY_LEITURA = f'''
+    SELECT {ORDER_COLUMNS}
+    FROM pedidos p
+    {ORDER_JOINS}
+    WHERE p.status IN ('pendente', 'em_andamento', 'coletando')
+    ORDER BY p.created_at DESC
+'''
+
+ITENS_PEDIDO = (1, 2, 3)
+TAMANHO_LOTE = 50  # Pedidos por chamada no cenário de importação em lote
+
+def conexao_antiga():
+    """Conexão como era feita antes do pool: nova a cada chamada, sem PRAGMAs"""
+    conn = sqlite3.connect(database.DATABASE)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def requisicao(obter_conexao, escrita):
+    """Simula um handler: leitura do painel ou criação de pedido"""
+    conn = obter_conexao()
+    try:
+        if escrita:
+            cursor = conn.execute(
+                "INSERT INTO pedidos (usuario_id, status, dispositivo_id) VALUES (1, 'pendente', 1)"
+            )
+            conn.executemany(
+                'INSERT INTO pedido_itens (pedido_id, item_id) VALUES (?, ?)',
+                [(cursor.lastrowid, item_id) for item_id in ITENS_PEDIDO]
+            )
+            conn.commit()
+        else:
+            conn.execute(QUERY_LEITURA).fetchall()
+    finally:
+        conn.close()
+
+def executar(nome, obter_conexao, threads, por_thread, fracao_escrita=0.2):
+    """Executa a carga em várias threads e retorna requisições por segundo"""
+    erros = []
+
+    def trabalhador(semente):
+        rng = random.Random(semente)
+        for _ in range(por_thread):
+            try:
+                requisicao(obter_conexao, rng.random() < fracao_escrita)
+            except sqlite3.OperationalError as e:
+                erros.append(e)
+
+    workers = [threading.Thread(target=trabalhador, args=(i,)) for i in range(threads)]
+    inicio = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    duracao = time.perf_counter() - inicio
+
+    total = threads * por_thread
+    print(f"{nome:<24} {total / duracao:>10.0f} req/s   ({total} req em {duracao:.2f}s, {len(erros)} erros)")
+    return total / duracao
+
+def preparar_banco(diretorio, nome, journal_mode):
+    """Cria um banco de teste com o schema do sistema"""
+    database.DATABASE = os.path.join(diretorio, nome)
+    database.init_db()
+    conn = sqlite3.connect(database.DATABASE)
+    conn.execute(f'PRAGMA journal_mode = {journal_mode}')
+    conn.close()
+
+def criar_pedido_antigo(conn, pedidos):
+    """Criação como era feita antes: leitura e escrita sem lock, um INSERT por item"""
+    for pedido in pedidos:
+        dispositivo = conn.execute(
+            'SELECT status FROM dispositivos WHERE id = ?', (pedido['dispositivo_id'],)
+        ).fetchone()
+        if not dispositivo or dispositivo['status'] != 'disponivel':
+            continue
+        conn.execute("UPDATE dispositivos SET status = 'ocupado' WHERE id = ?", (pedido['dispositivo_id'],))
+        cursor = conn.execute(
+            "INSERT INTO pedidos (usuario_id, status, dispositivo_id) VALUES (?, 'pendente', ?)",
+            (pedido['usuario_id'], pedido['dispositivo_id'])
+        )
+        for item_id in pedido['itens']:
+            conn.execute('INSERT INTO pedido_itens (pedido_id, item_id) VALUES (?, ?)', (cursor.lastrowid, item_id))
+        conn.commit()
+
+def preparar_dispositivos(total):
+    """Cadastra `total` dispositivos disponíveis e retorna seus ids"""
+    conn = database.get_db_connection()
+    conn.executemany(
+        "INSERT INTO dispositivos (nome, codigo) VALUES (?, ?)",
+        [(f'AGV bench {n}', f'BENCH{n:06d}') for n in range(total)]
+    )
+    conn.commit()
+    ids = [row['id'] for row in conn.execute("SELECT id FROM dispositivos WHERE codigo LIKE 'BENCH%' ORDER BY id")]
+    conn.close()
+    return ids
+
+def executar_criacao(diretorio, nome, criar, threads, por_thread, lote, disputado=False):
+    """
+    Cria pedidos em várias threads e retorna pedidos/s. Com disputado=True todas as
+    threads tentam os mesmos dispositivos: conta quantos foram reservados mais de uma vez
+    """
+    preparar_banco(diretorio, f'criacao_{nome}_{disputado}.db'.replace(' ', '_'), 'WAL')
+    dispositivos = preparar_dispositivos(por_thread if disputado else threads * por_thread)
+    erros = []
+
+    def trabalhador(indice):
+        meus = dispositivos if disputado else dispositivos[indice * por_thread:(indice + 1) * por_thread]
+        pedidos = [{'usuario_id': 1, 'dispositivo_id': d, 'itens': list(ITENS_PEDIDO)} for d in meus]
+        for inicio in range(0, len(pedidos), lote):
+            conn = database.get_db_connection()
+            try:
+                criar(conn, pedidos[inicio:inicio + lote])
+            except sqlite3.OperationalError as e:
+                erros.append(e)
+            finally:
+                conn.close()
+
+    workers = [threading.Thread(target=trabalhador, args=(i,)) for i in range(threads)]
+    inicio = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    duracao = time.perf_counter() - inicio
+
+    conn = database.get_db_connection()
+    criados = conn.execute('SELECT COUNT(*) FROM pedidos').fetchone()[0]
+    duplicados = conn.execute(
+        'SELECT COUNT(*) FROM (SELECT dispositivo_id FROM pedidos GROUP BY dispositivo_id HAVING COUNT(*) > 1)'
+    ).fetchone()[0]
+    conn.close()
+    database.close_all_connections()
+
+    if disputado:
+        print(f"{nome:<24} {criados:>6} pedidos para {len(dispositivos)} dispositivos, "
+              f"{duplicados} reservados mais de uma vez ({len(erros)} erros)")
+    else:
+        print(f"{nome:<24} {criados / duracao:>10.0f} pedidos/s ({criados} pedidos em {duracao:.2f}s, {len(erros)} erros)")
+    return criados / duracao
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    por_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    print(f"🧪 Benchmark do banco: {threads} threads x {por_thread} requisições (20% escrita)")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        preparar_banco(diretorio, 'antigo.db', 'DELETE')
+        antes = executar('Conexão por requisição', conexao_antiga, threads, por_thread)
+
+        preparar_banco(diretorio, 'pool.db', 'WAL')
+        depois = executar('Pool WAL', database.get_db_connection, threads, por_thread)
+        database.close_all_connections()
+        print(f"📈 Ganho: {depois / antes:.1f}x")
+
+        pedidos_thread = max(por_thread // 5, TAMANHO_LOTE)
+        print(f"\n🧪 Criação de pedidos: {threads} threads x {pedidos_thread} pedidos ({len(ITENS_PEDIDO)} itens cada)")
+        antigo = executar_criacao(diretorio, 'Item a item', criar_pedido_antigo, threads, pedidos_thread, 1)
+        executar_criacao(diretorio, 'Transação única', create_orders, threads, pedidos_thread, 1)
+        lote = executar_criacao(diretorio, f'Lote de {TAMANHO_LOTE}', create_orders, threads, pedidos_thread, TAMANHO_LOTE)
+        print(f"📈 Ganho do lote: {lote / antigo:.1f}x")
+
+        print("\n🧪 Mesmos dispositivos disputados por todas as threads")
+        executar_criacao(diretorio, 'Item a item', criar_pedido_antigo, threads, pedidos_thread, 1, disputado=True)
+        executar_criacao(diretorio, 'Transação única', create_orders, threads, pedidos_thread, 1, disputado=True)
+
+if __name__ == "__main__":
+    main()
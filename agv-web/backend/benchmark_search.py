@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark da busca de itens (/itens/pesquisar e /itens/buscar)
+Compara o LIKE '%termo%' antigo com o índice FTS5 trigram em um catálogo sintético
+
+Uso: python benchmark_search.py [itens] [repeticoes]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import database
+from item_search import search_items
+
+QUERY_LIKE = '''
+    SELECT id, nome, tag, categoria, imagem, disponivel, posicao_x, posicao_y, corredor, sub_corredor
+    FROM itens
+    WHERE disponivel = 1
+    AND (nome LIKE ? OR tag LIKE ?)
+    ORDER BY categoria, nome
+'''
+
+PRODUTOS = ['Parafuso', 'Porca', 'Arruela', 'Cabo USB', 'Resistor', 'LED', 'Capacitor', 'Rebite',
+            'Chave Phillips', 'Alicate', 'Fita Isolante', 'Conector', 'Fusível', 'Relé', 'Sensor']
+VARIANTES = ['M3', 'M4', 'M5', 'M6', 'Inox', 'Zincado', '10k', '220R', 'Azul', 'Vermelho', '12V', '24V']
+CATEGORIAS = ['Fixação', 'Eletrônicos', 'Ferramentas', 'Diversos']
+
+# Termos digitados na caixa de busca: comuns, raros, trecho no meio da palavra, tag e inexistente
+TERMOS = ['Parafuso', 'sor', 'Capacitor 10k', 'Inox 1234', 'fita', '000042', 'Zincado M6', 'xyzw']
+
+def popular_catalogo(conn, total):
+    """Insere itens sintéticos (os triggers mantêm o índice de busca)"""
+    rng = random.Random(42)
+    itens = []
+    for n in range(total):
+        nome = f"{rng.choice(PRODUTOS)} {rng.choice(VARIANTES)} {n}"
+        itens.append((nome, f"{n:08d}", rng.choice(CATEGORIAS), int(rng.random() > 0.05),
+                      n % 10 + 1, n % 7 + 1, str(n % 4 + 1), str(n % 3 + 1)))
+    conn.executemany('''
+        INSERT INTO itens (nome, tag, categoria, disponivel, posicao_x, posicao_y, corredor, sub_corredor)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', itens)
+    conn.commit()
+
+def medir(funcao, repeticoes):
+    """Tempo por chamada em ms (mediana) e quantidade de resultados"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return tempos[len(tempos) // 2], len(resultado)
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print(f"🧪 Benchmark da busca: {total} itens, mediana de {repeticoes} repetições")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        database.DATABASE = os.path.join(diretorio, 'busca.db')
+        database.init_db()
+
+        conn = database.get_db_connection()
+        inicio = time.perf_counter()
+        popular_catalogo(conn, total)
+        print(f"📦 Catálogo criado em {time.perf_counter() - inicio:.1f}s (inserção + índice)")
+
+        print(f"{'termo':<16} {'LIKE':>10} {'FTS5':>10} {'ganho':>8}   resultados")
+        for termo in TERMOS:
+            like, encontrados = medir(
+                lambda: conn.execute(QUERY_LIKE, (f'%{termo}%', f'%{termo}%')).fetchall(), repeticoes)
+            fts, retornados = medir(lambda: search_items(conn, termo), repeticoes)
+            print(f"{termo:<16} {like:>8.2f}ms {fts:>8.2f}ms {like / fts:>7.0f}x   "
+                  f"{retornados} de {encontrados}")
+
+        conn.close()
+        database.close_all_connections()
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,306 @@
 import sqlite3
 import os
 import hashlib
+import logging
+import queue
+
+logger = logging.getLogger(__name__)
 
 DATABASE = 'agv_system.db'
 
+# Configuração do pool de conexões
+POOL_MAX_IDLE = 16  # Máximo de conexões ociosas mantidas abertas
+BUSY_TIMEOUT_MS = 5000  # Tempo de espera por lock antes de "database is locked"
+
+# PRAGMAs aplicados uma única vez, quando a conexão é criada
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous = NORMAL',  # Seguro com WAL e bem mais rápido que FULL
+    'PRAGMA cache_size = -16000',  # ~16 MB de cache de páginas por conexão
+    'PRAGMA mmap_size = 67108864',  # Leitura via mmap (64 MB)
+    'PRAGMA temp_store = MEMORY',
+    f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}',
+)
+
+# Conexões ociosas por caminho de banco (LIFO para reaproveitar a mais "quente")
+_pools = {}
+
+# Funções chamadas após cada commit que alterou linhas (ex.: broadcast de status)
+_commit_listeners = []
+
 def hash_password(password):
     """Cria hash da senha"""
     return hashlib.sha256(password.encode()).hexdigest()
 
+def _migracao_localizacao_itens(cursor):
+    """Adiciona as colunas de localização (corredor/sub_corredor) à tabela itens"""
+    cursor.execute("PRAGMA table_info(itens)")
+    colunas = [coluna[1] for coluna in cursor.fetchall()]
+
+    # Bancos antigos podem já ter as colunas, criadas antes do controle de versão
+    if 'corredor' not in colunas:
+        cursor.execute("ALTER TABLE itens ADD COLUMN corredor TEXT DEFAULT '1'")
+    if 'sub_corredor' not in colunas:
+        cursor.execute("ALTER TABLE itens ADD COLUMN sub_corredor TEXT DEFAULT '1'")
+
+def _migracao_indices_consultas(cursor):
+    """Cria os índices usados pelas consultas mais frequentes"""
+    # Filtro por status (painel, próximo comando, pedido ativo) ordenado por data
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pedidos_status ON pedidos (status, created_at)')
+    # Pedidos de um dispositivo específico
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pedidos_dispositivo ON pedidos (dispositivo_id, status)')
+    # JOIN pedidos -> pedido_itens
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pedido_itens_pedido ON pedido_itens (pedido_id, item_id)')
+    # Verificação de posição ocupada no armazém
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_itens_localizacao ON itens (corredor, sub_corredor, posicao_x)')
+    # Listagem de itens disponíveis ordenada por categoria/nome
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_itens_disponivel ON itens (disponivel, categoria, nome)')
+
+def _migracao_fila_despacho(cursor):
+    """Adiciona controle de comando/lease aos pedidos para a fila de despacho"""
+    cursor.execute("PRAGMA table_info(pedidos)")
+    colunas = [coluna[1] for coluna in cursor.fetchall()]
+
+    if 'command_id' not in colunas:
+        cursor.execute('ALTER TABLE pedidos ADD COLUMN command_id TEXT')
+    if 'lease_expires_at' not in colunas:
+        cursor.execute('ALTER TABLE pedidos ADD COLUMN lease_expires_at REAL')
+
+    # Confirmação (command_ack) localiza o pedido pelo id do comando
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pedidos_command ON pedidos (command_id)')
+
+def _criar_indice_busca(cursor):
+    """Cria o índice FTS5 trigram e seus triggers; False se o SQLite não suportar"""
+    # Tabela "external content": guarda só o índice, o texto continua em itens
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS itens_busca USING fts5(
+                nome, tag, categoria, corredor, sub_corredor,
+                content='itens', content_rowid='id', tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite sem FTS5 ou anterior à 3.34 (sem trigram): a busca continua com LIKE
+        logger.warning(f"Índice de busca indisponível ({e}); busca de itens usando LIKE")
+        return False
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS itens_busca_insert AFTER INSERT ON itens BEGIN
+            INSERT INTO itens_busca (rowid, nome, tag, categoria, corredor, sub_corredor)
+            VALUES (new.id, new.nome, new.tag, new.categoria, new.corredor, new.sub_corredor);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS itens_busca_delete AFTER DELETE ON itens BEGIN
+            INSERT INTO itens_busca (itens_busca, rowid, nome, tag, categoria, corredor, sub_corredor)
+            VALUES ('delete', old.id, old.nome, old.tag, old.categoria, old.corredor, old.sub_corredor);
+        END
+    ''')
+    # Só as colunas indexadas: mudar disponibilidade/imagem não reescreve o índice
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS itens_busca_update
+        AFTER UPDATE OF nome, tag, categoria, corredor, sub_corredor ON itens BEGIN
+            INSERT INTO itens_busca (itens_busca, rowid, nome, tag, categoria, corredor, sub_corredor)
+            VALUES ('delete', old.id, old.nome, old.tag, old.categoria, old.corredor, old.sub_corredor);
+            INSERT INTO itens_busca (rowid, nome, tag, categoria, corredor, sub_corredor)
+            VALUES (new.id, new.nome, new.tag, new.categoria, new.corredor, new.sub_corredor);
+        END
+    ''')
+
+    # Indexar os itens já cadastrados
+    cursor.execute("INSERT INTO itens_busca (itens_busca) VALUES ('rebuild')")
+    return True
+
+def _migracao_busca_itens(cursor):
+    """Cria o índice de texto (FTS5 trigram) da busca de itens, mantido por triggers"""
+    # Sem suporte no SQLite a versão avança mesmo assim: ensure_search_index tenta de novo
+    _criar_indice_busca(cursor)
+
+def ensure_search_index(conn):
+    """
+    Garante o índice de busca fora do controle de versão: um banco migrado com um SQLite
+    sem FTS5/trigram ganha o índice na primeira inicialização após a atualização
+    """
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'itens_busca'"
+    ).fetchone()
+    if existe:
+        return True
+
+    if conn.in_transaction:
+        conn.commit()
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        criado = _criar_indice_busca(cursor)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    if criado:
+        logger.info("Índice de busca de itens criado")
+    return criado
+
+# Tabelas cujas listagens são servidas com cache/ETag (ver response_cache.py)
+TABELAS_VERSIONADAS = ('itens', 'categorias', 'dispositivos')
+
+def _migracao_versoes_tabelas(cursor):
+    """Cria o contador de versão por tabela, incrementado por triggers a cada escrita"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versoes_tabelas (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0,
+            atualizado_em REAL NOT NULL
+        )
+    ''')
+
+    # Momento atual em segundos Unix (Last-Modified)
+    agora = "(julianday('now') - 2440587.5) * 86400.0"
+    for tabela in TABELAS_VERSIONADAS:
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO versoes_tabelas (tabela, versao, atualizado_em)
+            VALUES ('{tabela}', 1, {agora})
+        ''')
+        for operacao in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS versao_{tabela}_{operacao.lower()}
+                AFTER {operacao} ON {tabela} BEGIN
+                    UPDATE versoes_tabelas SET versao = versao + 1, atualizado_em = {agora}
+                    WHERE tabela = '{tabela}';
+                END
+            ''')
+
+def _migracao_indices_paginacao(cursor):
+    """Cria os índices das chaves de paginação (keyset) das listagens"""
+    # Histórico de pedidos, mais recentes primeiro (o id entra implícito no índice)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pedidos_created ON pedidos (created_at)')
+    # Listagem de usuários por nome
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_usuarios_nome ON usuarios (nome)')
+
+def _sql_atualizar_resumo(origem):
+    """Recalcula pedidos_resumo dos pedidos (coluna pedido_id) retornados pela consulta `origem`"""
+    return f'''
+        INSERT OR REPLACE INTO pedidos_resumo (pedido_id, itens_json, total_itens)
+        SELECT alvo.pedido_id,
+               (SELECT json_group_array(json_object(
+                           'id', i.id, 'nome', i.nome, 'corredor', i.corredor,
+                           'sub_corredor', i.sub_corredor, 'posicao_x', i.posicao_x))
+                FROM (SELECT i.id, i.nome, i.corredor, i.sub_corredor, i.posicao_x
+                      FROM pedido_itens pi
+                      JOIN itens i ON i.id = pi.item_id
+                      WHERE pi.pedido_id = alvo.pedido_id
+                      ORDER BY pi.id) i),
+               (SELECT COUNT(*) FROM pedido_itens WHERE pedido_id = alvo.pedido_id)
+        FROM ({origem}) alvo
+        WHERE EXISTS (SELECT 1 FROM pedidos WHERE id = alvo.pedido_id);
+    '''
+
+def _migracao_resumo_pedidos(cursor):
+    """Cria o resumo materializado dos pedidos (itens em JSON), mantido por triggers"""
+    # Uma linha por pedido: os itens (na ordem em que foram adicionados) já montados em JSON,
+    # no lugar do JOIN pedido_itens/itens com GROUP_CONCAT de cada consulta
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pedidos_resumo (
+            pedido_id INTEGER PRIMARY KEY,
+            itens_json TEXT NOT NULL DEFAULT '[]',
+            total_itens INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (pedido_id) REFERENCES pedidos (id)
+        )
+    ''')
+    # Pedidos que contêm um item (item renomeado/movido)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pedido_itens_item ON pedido_itens (item_id)')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS pedidos_resumo_pedido_insert AFTER INSERT ON pedidos BEGIN
+            INSERT OR IGNORE INTO pedidos_resumo (pedido_id) VALUES (new.id);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS pedidos_resumo_pedido_delete AFTER DELETE ON pedidos BEGIN
+            DELETE FROM pedidos_resumo WHERE pedido_id = old.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS pedidos_resumo_item_insert AFTER INSERT ON pedido_itens BEGIN
+            {_sql_atualizar_resumo('SELECT new.pedido_id AS pedido_id')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS pedidos_resumo_item_delete AFTER DELETE ON pedido_itens BEGIN
+            {_sql_atualizar_resumo('SELECT old.pedido_id AS pedido_id')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS pedidos_resumo_item_update AFTER UPDATE ON pedido_itens BEGIN
+            {_sql_atualizar_resumo('SELECT old.pedido_id AS pedido_id UNION SELECT new.pedido_id')}
+        END
+    ''')
+    # Dados do item copiados para o resumo: só mudanças nessas colunas recalculam
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS pedidos_resumo_itens_update
+        AFTER UPDATE OF nome, corredor, sub_corredor, posicao_x ON itens BEGIN
+            {_sql_atualizar_resumo('SELECT DISTINCT pedido_id FROM pedido_itens WHERE item_id = new.id')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS pedidos_resumo_itens_delete AFTER DELETE ON itens BEGIN
+            {_sql_atualizar_resumo('SELECT DISTINCT pedido_id FROM pedido_itens WHERE item_id = old.id')}
+        END
+    ''')
+
+    # Resumo dos pedidos já existentes
+    cursor.execute(_sql_atualizar_resumo('SELECT id AS pedido_id FROM pedidos'))
+
+# Migrações versionadas: (versão, função). A versão aplicada fica em PRAGMA user_version.
+# Nunca altere uma migração já publicada; adicione uma nova ao final da lista.
+MIGRATIONS = [
+    (1, _migracao_localizacao_itens),
+    (2, _migracao_indices_consultas),
+    (3, _migracao_fila_despacho),
+    (4, _migracao_busca_itens),
+    (5, _migracao_versoes_tabelas),
+    (6, _migracao_indices_paginacao),
+    (7, _migracao_resumo_pedidos),
+]
+
+def get_schema_version(conn):
+    """Retorna a versão de schema registrada no banco"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def run_migrations(conn):
+    """Aplica, em ordem e cada uma em sua transação, as migrações pendentes"""
+    if conn.in_transaction:
+        conn.commit()
+
+    versao_atual = get_schema_version(conn)
+
+    for versao, migracao in MIGRATIONS:
+        if versao <= versao_atual:
+            continue
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            migracao(cursor)
+            cursor.execute(f'PRAGMA user_version = {int(versao)}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+        print(f"Migração {versao} aplicada: {migracao.__doc__}")
+        versao_atual = versao
+
+    return versao_atual
+
 def init_db():
     """Inicializa o banco de dados"""
     conn = sqlite3.connect(DATABASE)
     cursor = conn.cursor()
+
+    # WAL é persistente no arquivo: leitores não bloqueiam o escritor
+    cursor.execute('PRAGMA journal_mode = WAL')
     
     # Tabela de usuários
     cursor.execute('''
@@ -89,6 +378,10 @@ def init_db():
         )
     ''')
     
+    # Aplicar migrações de schema pendentes (colunas novas, índices, ...)
+    run_migrations(conn)
+    ensure_search_index(conn)
+    
     # Inserir usuários padrão
     cursor.execute('SELECT COUNT(*) FROM usuarios')
     if cursor.fetchone()[0] == 0:
@@ -122,19 +415,6 @@ def init_db():
             VALUES (?, ?, ?, ?, ?)
         ''', dispositivos_exemplo)
     
-    # Adicionar colunas de localização à tabela itens se não existirem
-    try:
-        cursor.execute("PRAGMA table_info(itens)")
-        colunas = [coluna[1] for coluna in cursor.fetchall()]
-        
-        if 'corredor' not in colunas:
-            cursor.execute('ALTER TABLE itens ADD COLUMN corredor TEXT DEFAULT "1"')
-        if 'sub_corredor' not in colunas:
-            cursor.execute('ALTER TABLE itens ADD COLUMN sub_corredor TEXT DEFAULT "1"')
-            
-    except sqlite3.OperationalError:
-        pass
-    
     # Atualizar itens existentes com localização
     cursor.execute('SELECT COUNT(*) FROM itens')
     if cursor.fetchone()[0] == 0:
@@ -178,12 +458,84 @@ def init_db():
     conn.close()
     print("Banco de dados inicializado!")
 
+class PooledConnection(sqlite3.Connection):
+    """Conexão SQLite cujo close() devolve a conexão ao pool em vez de fechá-la"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_path = None
+        self.in_use = False
+        self.changes_notified = 0
+
+    def commit(self):
+        """Confirma a transação e avisa os listeners se houve alteração"""
+        super().commit()
+        if self.total_changes != self.changes_notified:
+            self.changes_notified = self.total_changes
+            for listener in _commit_listeners:
+                listener()
+
+    def close(self):
+        """Devolve a conexão ao pool (descartando transação não confirmada)"""
+        if not self.in_use:
+            return
+        self.in_use = False
+
+        try:
+            if self.in_transaction:
+                self.rollback()
+            _pools.setdefault(self.pool_path, queue.LifoQueue()).put_nowait(self)
+            if _pools[self.pool_path].qsize() > POOL_MAX_IDLE:
+                _pools[self.pool_path].get_nowait().really_close()
+        except (sqlite3.Error, queue.Empty):
+            self.really_close()
+
+    def really_close(self):
+        """Fecha de fato a conexão com o banco"""
+        super().close()
+
+def _create_connection(path):
+    """Abre uma nova conexão já configurada com os PRAGMAs de desempenho"""
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        factory=PooledConnection,
+        check_same_thread=False  # A conexão circula entre threads via pool
+    )
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    conn.pool_path = path
+    return conn
+
 def get_db_connection():
-    """Retorna uma conexão com o banco"""
-    conn = sqlite3.connect(DATABASE)
+    """Retorna uma conexão com o banco (reaproveitada do pool quando possível)"""
+    pool = _pools.setdefault(DATABASE, queue.LifoQueue())
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _create_connection(DATABASE)
+
     conn.row_factory = sqlite3.Row
+    conn.in_use = True
     return conn
 
+def add_commit_listener(listener):
+    """Registra uma função a ser chamada após commits que alteraram o banco"""
+    _commit_listeners.append(listener)
+
+def remove_commit_listener(listener):
+    """Remove uma função registrada com add_commit_listener"""
+    _commit_listeners.remove(listener)
+
+def close_all_connections():
+    """Fecha todas as conexões ociosas do pool (uso em shutdown e testes)"""
+    for pool in _pools.values():
+        while True:
+            try:
+                pool.get_nowait().really_close()
+            except queue.Empty:
+                break
+
 def verificar_usuario(username, password): #Aqui é realizado a criptografia da senha e o retorno com as informações do usuário, se encotrado
     """Verifica credenciais do usuário"""
     conn = get_db_connection() #Coneção estabelecida com o Banco da dados
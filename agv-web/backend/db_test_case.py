@@ -0,0 +1,31 @@
+"""
+Base dos testes que usam o banco: cada teste roda em um banco SQLite novo, criado
+pelo init_db (migrações e dados de exemplo) em um diretório temporário
+"""
+
+import os
+import tempfile
+import unittest
+
+import database
+from response_cache import response_cache, table_versions
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Troca database.DATABASE por um banco temporário durante cada teste"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.database_original = database.DATABASE
+        database.DATABASE = os.path.join(self.tmpdir.name, 'teste.db')
+        database.init_db()
+
+        # Respostas em cache pertencem ao banco do teste anterior
+        response_cache.clear()
+        table_versions.mark_dirty()
+
+    def tearDown(self):
+        database.close_all_connections()
+        database.DATABASE = self.database_original
+        table_versions.mark_dirty()
+        self.tmpdir.cleanup()
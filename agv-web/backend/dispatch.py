@@ -0,0 +1,172 @@
+"""
+Fila de despacho de pedidos para os AGVs
+Garante que cada pedido pendente seja entregue a um único AGV (claim atômico),
+respeitando o dispositivo do pedido, com lease que expira se o AGV não confirmar
+"""
+
+import time
+import sqlite3
+import threading
+
+COMMAND_LEASE_SECONDS = 60  # Tempo para o AGV confirmar (command_ack) antes de voltar à fila
+LONG_POLL_MAX_SECONDS = 30  # Tempo máximo que uma requisição de long-polling fica aberta
+LONG_POLL_RECHECK_SECONDS = 5  # Reconsulta periódica (pega leases que expiraram)
+
+class CommandNotifier:
+    """Acorda quem está esperando por comandos quando o banco é alterado"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._generation = 0
+
+    def generation(self):
+        """Contador de notificações (leia antes de consultar a fila)"""
+        return self._generation
+
+    def notify(self):
+        """Sinaliza que pode haver comando novo na fila"""
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def wait(self, generation, timeout):
+        """Aguarda uma notificação posterior a `generation` ou o timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._generation != generation, timeout)
+
+# Instância global, notificada pelos commits do banco (ver app.py)
+command_notifier = CommandNotifier()
+
+def requeue_expired(conn, now=None):
+    """Devolve para 'pendente' os pedidos cujo lease expirou sem confirmação"""
+    now = time.time() if now is None else now
+    cursor = conn.execute('''
+        UPDATE pedidos
+        SET status = 'pendente', command_id = NULL, lease_expires_at = NULL
+        WHERE status = 'em_andamento'
+        AND lease_expires_at IS NOT NULL AND lease_expires_at < ?
+    ''', (now,))
+    return cursor.rowcount
+
+def claim_next_order(conn, dispositivo_id=None, lease_seconds=COMMAND_LEASE_SECONDS):
+    """
+    Reserva atomicamente o pedido pendente mais antigo e retorna (pedido_id, command_id).
+    Se dispositivo_id for informado, apenas pedidos desse dispositivo são considerados.
+    Retorna None se não houver pedido pendente.
+    """
+    now = time.time()
+
+    if conn.in_transaction:
+        conn.commit()
+
+    # BEGIN IMMEDIATE pega o lock de escrita antes da leitura: dois AGVs nunca
+    # enxergam o mesmo pedido como pendente
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        requeue_expired(conn, now)
+
+        if dispositivo_id is not None:
+            pedido = conn.execute('''
+                SELECT id FROM pedidos
+                WHERE dispositivo_id = ? AND status = 'pendente'
+                ORDER BY created_at ASC, id ASC
+                LIMIT 1
+            ''', (dispositivo_id,)).fetchone()
+        else:
+            pedido = conn.execute('''
+                SELECT id FROM pedidos
+                WHERE status = 'pendente'
+                ORDER BY created_at ASC, id ASC
+                LIMIT 1
+            ''').fetchone()
+
+        if not pedido:
+            conn.commit()
+            return None
+
+        pedido_id = pedido[0]
+        command_id = f"cmd_{pedido_id}_{now}"
+
+        conn.execute('''
+            UPDATE pedidos
+            SET status = 'em_andamento', command_id = ?, lease_expires_at = ?
+            WHERE id = ? AND status = 'pendente'
+        ''', (command_id, now + lease_seconds, pedido_id))
+        conn.commit()
+
+        return pedido_id, command_id
+
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+def acknowledge_command(conn, command_id, success=True):
+    """
+    Processa o command_ack do AGV: confirma o lease (pedido segue em andamento)
+    ou, em caso de falha, devolve o pedido para a fila. Retorna o id do pedido.
+    """
+    pedido = conn.execute(
+        "SELECT id FROM pedidos WHERE command_id = ? AND status = 'em_andamento'",
+        (command_id,)
+    ).fetchone()
+
+    if not pedido:
+        return None
+
+    if success:
+        conn.execute(
+            'UPDATE pedidos SET lease_expires_at = NULL WHERE id = ?',
+            (pedido[0],)
+        )
+    else:
+        conn.execute('''
+            UPDATE pedidos
+            SET status = 'pendente', command_id = NULL, lease_expires_at = NULL
+            WHERE id = ?
+        ''', (pedido[0],))
+    conn.commit()
+
+    return pedido[0]
+
+def renew_lease(conn, command_id, lease_seconds=COMMAND_LEASE_SECONDS):
+    """
+    Estende o lease de um comando em execução (o AGV chama periodicamente enquanto
+    trabalha). Se o AGV parar de renovar, o lease expira e o pedido volta à fila.
+    Retorna o id do pedido ou None se o comando não tem mais o pedido reservado.
+    """
+    cursor = conn.execute('''
+        UPDATE pedidos SET lease_expires_at = ?
+        WHERE command_id = ? AND status = 'em_andamento' AND lease_expires_at IS NOT NULL
+    ''', (time.time() + lease_seconds, command_id))
+    conn.commit()
+    if not cursor.rowcount:
+        return None
+    return conn.execute('SELECT id FROM pedidos WHERE command_id = ?', (command_id,)).fetchone()[0]
+
+def wait_for_order(get_connection, dispositivo_id=None, timeout=LONG_POLL_MAX_SECONDS,
+                   lease_seconds=COMMAND_LEASE_SECONDS):
+    """
+    Long-polling: tenta reservar um pedido e, se a fila estiver vazia, aguarda
+    notificação de escrita no banco até o timeout. A conexão não fica presa
+    durante a espera. Retorna (pedido_id, command_id) ou None.
+    """
+    deadline = time.time() + timeout
+
+    while True:
+        # Ler a geração antes de consultar evita perder notificação entre as duas etapas
+        generation = command_notifier.generation()
+
+        conn = get_connection()
+        try:
+            claim = claim_next_order(conn, dispositivo_id, lease_seconds)
+        finally:
+            conn.close()
+
+        if claim:
+            return claim
+
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+
+        command_notifier.wait(generation, min(remaining, LONG_POLL_RECHECK_SECONDS))
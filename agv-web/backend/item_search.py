@@ -0,0 +1,133 @@
+"""
+Busca de itens por texto
+Usa o índice FTS5 trigram (itens_busca, migração 4): qualquer trecho com 3 ou mais
+letras do nome/tag/... é encontrado sem varrer a tabela itens. Buscas só com palavras
+menores que um trigrama, ou bancos sem o índice, caem no LIKE.
+"""
+
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 200
+
+ITEM_FIELDS = 'i.id, i.nome, i.tag, i.categoria, i.imagem, i.disponivel, i.posicao_x, i.posicao_y, i.corredor, i.sub_corredor'
+
+TRIGRAM = 3
+
+def search_limit(value):
+    """Converte o parâmetro ?limite= em um limite válido"""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return SEARCH_DEFAULT_LIMIT
+    return min(max(limit, 1), SEARCH_MAX_LIMIT)
+
+def has_search_index(conn):
+    """Verifica se o banco tem o índice FTS (SQLite com FTS5 + trigram)"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'itens_busca'"
+    ).fetchone() is not None
+
+def _like_pattern(term, prefix_only=False):
+    """Padrão LIKE com %, _ e \\ do termo escapados"""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{escaped}%' if prefix_only else f'%{escaped}%'
+
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+def _match_expression(words, columns):
+    """
+    Expressão MATCH: todas as palavras nas colunas pedidas. Palavras com menos de 3
+    letras não formam um trigrama sozinhas; entram junto com o espaço vizinho, ou seja,
+    são encontradas no começo ou no fim de uma palavra do texto.
+    """
+    terms = [_phrase(word) if len(word) >= TRIGRAM else f'({_phrase(" " + word)} OR {_phrase(word + " ")})'
+             for word in words]
+    return '{' + ' '.join(columns) + '} : (' + ' AND '.join(terms) + ')'
+
+def search_items(conn, term, columns=('nome', 'tag'), limit=SEARCH_DEFAULT_LIMIT):
+    """
+    Itens disponíveis cujo texto contém todas as palavras do termo, em qualquer das colunas.
+    Ordem por faixas de relevância: nome começando pelo termo, termo no nome, termo nas
+    demais colunas; dentro da faixa, por nome.
+    """
+    words = term.split()
+    if not words:
+        return conn.execute(f'''
+            SELECT {ITEM_FIELDS}
+            FROM itens i
+            WHERE i.disponivel = 1
+            ORDER BY i.categoria, i.nome
+            LIMIT ?
+        ''', (limit,)).fetchall()
+
+    # Pelo menos uma palavra precisa formar um trigrama para o índice restringir algo
+    if any(len(word) >= TRIGRAM for word in words) and has_search_index(conn):
+        return _search_index(conn, words, columns, limit)
+
+    # Sem índice ou só termos curtos: LIKE em cada palavra
+    like_filter, params = _like_filter(words, columns)
+    params += [_like_pattern(words[0], prefix_only=True), limit]
+    return conn.execute(f'''
+        SELECT {ITEM_FIELDS}
+        FROM itens i
+        WHERE i.disponivel = 1 AND {like_filter}
+        ORDER BY i.nome LIKE ? ESCAPE '\\' DESC, i.categoria, i.nome
+        LIMIT ?
+    ''', params).fetchall()
+
+def _like_filter(words, columns):
+    """Filtro SQL: cada palavra aparece em alguma das colunas"""
+    like_filter = ' AND '.join(
+        '(' + ' OR '.join(f"i.{column} LIKE ? ESCAPE '\\'" for column in columns) + ')'
+        for _ in words
+    )
+    return like_filter, [_like_pattern(word) for word in words for _ in columns]
+
+def _search_index(conn, words, columns, limit):
+    """
+    Busca no índice FTS. Se há menos ocorrências que o limite, a primeira consulta já
+    traz todas e elas são ordenadas aqui. Senão, as faixas melhores são buscadas no
+    índice, cada uma parando no LIMIT, sem ordenar todas as ocorrências: termos comuns
+    (milhares de itens) custam o mesmo que termos raros. Ordenar tudo por bm25 custava
+    mais de 20 ms em 100k itens.
+    """
+    matches = _match_expression(words, columns)
+    found = _match_rows(conn, matches, [], limit)
+    if 'nome' not in columns:
+        return sorted(found, key=lambda row: row['nome'])
+
+    first = words[0].casefold()
+    if len(found) < limit:
+        return sorted(found, key=lambda row: (
+            not row['nome'].casefold().startswith(first),
+            not all(word.casefold() in row['nome'].casefold() for word in words),
+            row['nome']
+        ))
+
+    tiers = [_match_expression(words, ('nome',))]
+    if len(words[0]) >= TRIGRAM:
+        tiers.insert(0, f'({matches}) AND {{nome}} : ^{_phrase(words[0])}')
+
+    results = []
+    for expression in tiers:
+        rows = _match_rows(conn, expression, [row['id'] for row in results], limit - len(results))
+        results.extend(sorted(rows, key=lambda row: row['nome']))
+        if len(results) >= limit:
+            return results
+
+    # Completar com as demais ocorrências (já lidas na primeira consulta)
+    seen = {row['id'] for row in results}
+    rest = [row for row in found if row['id'] not in seen]
+    return results + sorted(rest, key=lambda row: row['nome'])[:limit - len(results)]
+
+def _match_rows(conn, expression, exclude_ids, limit):
+    """Itens disponíveis do índice, na ordem do índice (sem ordenação: para no LIMIT)"""
+    exclude = f" AND i.id NOT IN ({', '.join('?' * len(exclude_ids))})" if exclude_ids else ''
+    # CROSS JOIN fixa o índice FTS como tabela externa do laço
+    return conn.execute(f'''
+        SELECT {ITEM_FIELDS}
+        FROM itens_busca
+        CROSS JOIN itens i ON i.id = itens_busca.rowid
+        WHERE itens_busca MATCH ? AND i.disponivel = 1{exclude}
+        LIMIT ?
+    ''', [expression] + list(exclude_ids) + [limit]).fetchall()
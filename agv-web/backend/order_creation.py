@@ -0,0 +1,113 @@
+"""
+Criação de pedidos (individual e em lote)
+Validação e gravação acontecem em uma única transação BEGIN IMMEDIATE: o lock de
+escrita é pego antes de ler o status dos dispositivos, então duas requisições nunca
+reservam o mesmo dispositivo 'disponivel'. Usuários, dispositivos e itens de todos os
+pedidos são lidos com uma consulta cada, e os itens gravados com um único executemany.
+"""
+
+import sqlite3
+
+MAX_ITENS_POR_PEDIDO = 4
+BULK_MAX_ORDERS = 500  # Pedidos aceitos por chamada de /pedidos/lote
+
+def validate_order(data):
+    """Valida um pedido e converte os ids para int; retorna (pedido, erro)"""
+    if not isinstance(data, dict):
+        return None, "Pedido inválido"
+
+    usuario_id = data.get('usuario_id')
+    itens_ids = data.get('itens')
+    dispositivo_id = data.get('dispositivo_id')
+
+    if not usuario_id or not itens_ids or not dispositivo_id:
+        return None, "Usuario_id, itens e dispositivo são obrigatórios"
+    if not isinstance(itens_ids, list):
+        return None, "Itens devem ser uma lista de ids"
+    if len(itens_ids) > MAX_ITENS_POR_PEDIDO:
+        return None, f"Máximo {MAX_ITENS_POR_PEDIDO} itens por pedido"
+
+    try:
+        return {
+            'usuario_id': int(usuario_id),
+            'dispositivo_id': int(dispositivo_id),
+            'itens': [int(item_id) for item_id in itens_ids]
+        }, None
+    except (TypeError, ValueError):
+        return None, "Ids inválidos"
+
+def _placeholders(values):
+    return ','.join('?' * len(values))
+
+def create_orders(conn, orders):
+    """
+    Cria os pedidos em uma transação e retorna, na mesma ordem, um resultado por pedido:
+    {'pedido_id', 'usuario_nome'} se criado ou {'error'} se recusado. Pedidos recusados
+    não impedem os demais; cada dispositivo é reservado por no máximo um pedido.
+    """
+    results = [None] * len(orders)
+    orders = list(orders)
+    validos = []
+    for indice, data in enumerate(orders):
+        orders[indice], erro = validate_order(data)
+        if erro:
+            results[indice] = {'error': erro}
+        else:
+            validos.append(indice)
+
+    if not validos:
+        return results
+
+    usuarios_ids = list({orders[i]['usuario_id'] for i in validos})
+    dispositivos_ids = list({orders[i]['dispositivo_id'] for i in validos})
+    itens_ids = list({item_id for i in validos for item_id in orders[i]['itens']})
+
+    if conn.in_transaction:
+        conn.commit()
+
+    # Lock de escrita antes da leitura do status dos dispositivos
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        usuarios = dict(conn.execute(
+            f'SELECT id, nome FROM usuarios WHERE id IN ({_placeholders(usuarios_ids)})', usuarios_ids
+        ).fetchall())
+        disponiveis = {row[0] for row in conn.execute(
+            f"SELECT id FROM dispositivos WHERE status = 'disponivel' AND id IN ({_placeholders(dispositivos_ids)})",
+            dispositivos_ids
+        )}
+        itens_existentes = {row[0] for row in conn.execute(
+            f'SELECT id FROM itens WHERE id IN ({_placeholders(itens_ids)})', itens_ids
+        )}
+
+        itens_pedidos = []
+        for indice in validos:
+            data = orders[indice]
+            if data['usuario_id'] not in usuarios:
+                results[indice] = {'error': "Usuário não encontrado"}
+                continue
+            if data['dispositivo_id'] not in disponiveis:
+                results[indice] = {'error': "Dispositivo não disponível"}
+                continue
+            if any(item_id not in itens_existentes for item_id in data['itens']):
+                results[indice] = {'error': "Item não encontrado"}
+                continue
+
+            # Reservado: o próximo pedido do lote para este dispositivo é recusado
+            disponiveis.discard(data['dispositivo_id'])
+            pedido_id = conn.execute('''
+                INSERT INTO pedidos (usuario_id, status, dispositivo_id)
+                VALUES (?, 'pendente', ?)
+            ''', (data['usuario_id'], data['dispositivo_id'])).lastrowid
+            itens_pedidos += [(pedido_id, item_id) for item_id in data['itens']]
+            results[indice] = {'pedido_id': pedido_id, 'usuario_nome': usuarios[data['usuario_id']]}
+
+        reservados = [(orders[i]['dispositivo_id'],) for i in validos if 'pedido_id' in results[i]]
+        conn.executemany("UPDATE dispositivos SET status = 'ocupado' WHERE id = ?", reservados)
+        conn.executemany('INSERT INTO pedido_itens (pedido_id, item_id) VALUES (?, ?)', itens_pedidos)
+        conn.commit()
+
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    return results
@@ -0,0 +1,30 @@
+"""
+Leitura de pedidos pelo resumo materializado (tabela pedidos_resumo)
+Os itens de cada pedido ficam prontos em JSON, mantidos por triggers (migração 7),
+então as consultas são leituras indexadas por pedido, sem JOIN com pedido_itens/itens,
+GROUP BY nem GROUP_CONCAT — e nomes com vírgula não quebram mais a lista de itens.
+"""
+
+import json
+
+# Colunas e JOINs comuns das listagens de pedidos (alias p para pedidos)
+ORDER_COLUMNS = '''
+    p.id, p.usuario_id, p.dispositivo_id, p.status, p.created_at,
+    u.nome as usuario_nome, u.username,
+    d.nome as dispositivo_nome, d.codigo as dispositivo_codigo,
+    r.itens_json, r.total_itens
+'''
+
+ORDER_JOINS = '''
+    LEFT JOIN usuarios u ON p.usuario_id = u.id
+    LEFT JOIN dispositivos d ON p.dispositivo_id = d.id
+    LEFT JOIN pedidos_resumo r ON r.pedido_id = p.id
+'''
+
+def order_dict(row):
+    """Converte a linha em dict, trocando itens_json pela lista de itens
+    ({id, nome, corredor, sub_corredor, posicao_x}, na ordem em que foram adicionados)"""
+    order = dict(row)
+    order['itens'] = json.loads(order.pop('itens_json') or '[]')
+    order['total_itens'] = order['total_itens'] or 0
+    return order
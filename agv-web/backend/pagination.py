@@ -0,0 +1,131 @@
+"""
+Paginação por cursor (keyset) das listagens que crescem com o histórico
+A página seguinte começa depois da chave de ordenação da última linha (WHERE chave > cursor),
+então o custo de cada página não depende de quantas páginas vieram antes, ao contrário de
+OFFSET. O corpo continua sendo a lista JSON; o cursor da próxima página vai nos headers
+X-Next-Cursor e Link. Com ?formato=ndjson a listagem inteira é enviada em streaming, uma
+linha JSON por registro, lida do banco em lotes: memória constante por requisição.
+"""
+
+import base64
+import json
+from urllib.parse import urlencode
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+from database import get_db_connection
+
+PAGE_DEFAULT_SIZE = 100
+PAGE_MAX_SIZE = 500
+STREAM_BATCH_SIZE = 200  # Linhas lidas por consulta no modo NDJSON
+
+def page_size(value):
+    """Converte o parâmetro ?limite= em um tamanho de página válido"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return PAGE_DEFAULT_SIZE
+    return min(max(size, 1), PAGE_MAX_SIZE)
+
+def encode_cursor(values):
+    """Cursor opaco (base64 de JSON) com os valores da chave de ordenação"""
+    data = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+def decode_cursor(token):
+    """Valores da chave de ordenação do cursor (None sem cursor); ValueError se inválido"""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Cursor inválido') from e
+    if not isinstance(values, list):
+        raise ValueError('Cursor inválido')
+    return values
+
+def keyset_condition(columns, values, descending=False):
+    """
+    Condição SQL (e parâmetros) para as linhas depois do cursor na ordem de `columns`.
+    Sem NULL no cursor usa comparação de row values, que o SQLite resolve com o índice.
+    """
+    operator = '<' if descending else '>'
+    if all(value is not None for value in values):
+        return f"({', '.join(columns)}) {operator} ({', '.join('?' * len(columns))})", list(values)
+
+    # Com NULL (primeiro na ordem crescente, último na decrescente) a comparação é expandida
+    alternatives, params = [], []
+    for position, (column, value) in enumerate(zip(columns, values)):
+        prefix = [f'{previous} IS ?' for previous in columns[:position]]
+        if value is None:
+            if descending:
+                continue
+            after = f'{column} IS NOT NULL'
+            after_params = []
+        elif descending:
+            after = f'({column} < ? OR {column} IS NULL)'
+            after_params = [value]
+        else:
+            after = f'{column} > ?'
+            after_params = [value]
+        alternatives.append('(' + ' AND '.join(prefix + [after]) + ')')
+        params += list(values[:position]) + after_params
+
+    return '(' + (' OR '.join(alternatives) or '0') + ')', params
+
+def _cursor_values(row, cursor_columns):
+    return [row[column] for column in cursor_columns]
+
+def paginated_response(fetch_page, cursor_columns):
+    """
+    Resposta paginada de uma listagem. fetch_page(conn, after, limit) devolve as linhas
+    na ordem da listagem, começando depois de `after` (valores de cursor_columns, ou None)
+    """
+    try:
+        after = decode_cursor(request.args.get('cursor'))
+        if after is not None and len(after) != len(cursor_columns):
+            raise ValueError('Cursor inválido')
+    except ValueError:
+        return jsonify({"error": "Cursor inválido"}), 400
+
+    if request.args.get('formato') == 'ndjson':
+        return Response(
+            stream_with_context(_stream_rows(fetch_page, cursor_columns, after)),
+            mimetype='application/x-ndjson'
+        )
+
+    limit = page_size(request.args.get('limite'))
+    conn = get_db_connection()
+    try:
+        # Uma linha a mais indica se existe próxima página
+        rows = fetch_page(conn, after, limit + 1)
+    finally:
+        conn.close()
+
+    response = jsonify([dict(row) for row in rows[:limit]])
+    if len(rows) > limit:
+        cursor = encode_cursor(_cursor_values(rows[limit - 1], cursor_columns))
+        args = request.args.to_dict()
+        args['cursor'] = cursor
+        response.headers['X-Next-Cursor'] = cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
+
+def _stream_rows(fetch_page, cursor_columns, after):
+    """
+    Gera o NDJSON lote a lote; a conexão volta ao pool entre os lotes, sem segurar uma
+    transação de leitura aberta durante o envio (o checkpoint do WAL não fica bloqueado)
+    """
+    while True:
+        conn = get_db_connection()
+        try:
+            rows = fetch_page(conn, after, STREAM_BATCH_SIZE)
+        finally:
+            conn.close()
+
+        for row in rows:
+            yield current_app.json.dumps(dict(row)) + '\n'
+
+        if len(rows) < STREAM_BATCH_SIZE:
+            return
+        after = _cursor_values(rows[-1], cursor_columns)
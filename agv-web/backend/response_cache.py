@@ -0,0 +1,134 @@
+"""
+Cache de respostas das listagens de catálogo (/itens, /armazem/itens, /armazem/categorias, /dispositivos)
+Cada tabela tem um contador de versão no banco (versoes_tabelas, incrementado por triggers).
+A resposta JSON já serializada fica em memória por (endpoint, parâmetros, versões): uma
+nova requisição sem escrita no meio não consulta o banco nem serializa de novo, e quem
+manda If-None-Match/If-Modified-Since recebe 304.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, request
+
+from database import get_db_connection
+
+CACHE_MAX_ENTRIES = 64  # Respostas guardadas (endpoint + parâmetros)
+VERSIONS_RESYNC_SECONDS = 2  # Releitura das versões mesmo sem commit conhecido (outro processo)
+CACHED_HEADERS = ('X-Next-Cursor', 'Link')  # Headers da resposta guardados junto com o corpo
+
+class TableVersions:
+    """Versões das tabelas, relidas do banco só quando houve escrita"""
+
+    def __init__(self, resync_interval=VERSIONS_RESYNC_SECONDS):
+        self.resync_interval = resync_interval
+        self._versions = {}
+        self._dirty = True
+        self._last_refresh = 0
+        self._lock = threading.Lock()
+
+    def mark_dirty(self):
+        """Sinaliza que houve commit no banco (registrado como commit listener no app.py)"""
+        self._dirty = True
+
+    def get(self, tables):
+        """Tupla (versão, atualizado_em) de cada tabela; None se o banco não tem o contador"""
+        if self._dirty or time.time() - self._last_refresh >= self.resync_interval:
+            self._refresh()
+        try:
+            return tuple(self._versions[table] for table in tables)
+        except KeyError:
+            return None
+
+    def _refresh(self):
+        with self._lock:
+            # Limpa antes de ler: um commit durante a leitura marca de novo
+            self._dirty = False
+            self._last_refresh = time.time()
+            conn = get_db_connection()
+            try:
+                rows = conn.execute('SELECT tabela, versao, atualizado_em FROM versoes_tabelas').fetchall()
+                self._versions = {row['tabela']: (row['versao'], row['atualizado_em']) for row in rows}
+            except sqlite3.OperationalError:
+                # Banco ainda sem a migração 5: sem cache
+                self._versions = {}
+            finally:
+                conn.close()
+
+class ResponseCache:
+    """Corpos JSON serializados (e headers de paginação) por (endpoint, parâmetros), válidos para uma versão das tabelas"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, versions):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != versions:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, versions, entry):
+        with self._lock:
+            self._entries[key] = (versions, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+# Instâncias globais compartilhadas pelos blueprints
+table_versions = TableVersions()
+response_cache = ResponseCache()
+
+def cached_response(*tables):
+    """
+    Decorator para listagens GET que só dependem de `tables`: responde do cache enquanto
+    as versões não mudam, com ETag/Last-Modified derivados das versões (304 quando batem)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = table_versions.get(tables)
+            if versions is None:
+                return view(*args, **kwargs)
+
+            key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+            cached = response_cache.get(key, versions)
+            if cached is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                # Streaming (NDJSON) não é guardado: o corpo não cabe no cache por definição
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                headers = [(name, value) for name, value in response.headers
+                           if name in CACHED_HEADERS]
+                cached = (response.get_data(), headers)
+                response_cache.put(key, versions, cached)
+
+            body, headers = cached
+            response = current_app.response_class(body, mimetype='application/json')
+            response.headers.extend(headers)
+            # A versão inclui o horário da escrita: um banco recriado não repete ETags antigas
+            response.set_etag(hashlib.sha1(repr((key, versions)).encode()).hexdigest()[:20])
+            response.last_modified = datetime.fromtimestamp(max(v[1] for v in versions), timezone.utc)
+            response.cache_control.no_cache = True  # Pode guardar, mas revalida sempre
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
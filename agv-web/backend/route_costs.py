@@ -0,0 +1,152 @@
+"""
+Custos de rota entre posições do armazém para o planejamento de pedidos
+Lê a tabela de distâncias gerada no Raspberry (agv-raspberry/route_table.py) com
+memory-map: cada consulta é O(1) e a tabela é recarregada quando o arquivo muda.
+O diretório da tabela vem de ROUTE_TABLE_DIR (o backend roda no PC, não no Raspberry:
+copie ou sincronize o route_table/ gerado lá). Posições fora da tabela recebem uma
+estimativa pelo layout gravado no index.json.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Sem a variável não há tabela: todas as distâncias saem da estimativa
+ROUTE_TABLE_DIR = os.getenv('ROUTE_TABLE_DIR')
+
+BASE_KEY = 'base'
+
+# Layout de reserva, usado só enquanto nenhum index.json foi carregado. Não acompanha o
+# NAVIGATION_CONFIG do Raspberry: rotas calculadas com ele saem com layout='fallback'
+FALLBACK_LAYOUT = {
+    'base': (50, 50),
+    'aisle_origin': (150, 100),
+    'aisles': 4,
+    'aisle_spacing': 200,
+    'lane_width': 100,
+    'aisle_length': 800,
+    'sub_aisle_length': 250,
+    'slot_spacing': 50
+}
+
+# Estado carregado do disco, trocado de uma vez: leitores nunca misturam índice e matriz
+_Table = namedtuple('_Table', 'mtime index distances layout layout_source')
+
+def location_key(location):
+    """Chave de uma posição ({corredor, sub_corredor, posicao_x} ou 'base'), igual à do Raspberry"""
+    if location == BASE_KEY:
+        return BASE_KEY
+    return f"{int(location.get('corredor') or 1)}-{int(location.get('sub_corredor') or 1)}-{int(location.get('posicao_x') or 1)}"
+
+class RouteCosts:
+    """Distâncias (cm) entre posições de estante e a base"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or ROUTE_TABLE_DIR
+        self._table = _Table(None, {}, None, FALLBACK_LAYOUT, 'fallback')
+        self._lock = threading.Lock()
+        if not self.directory:
+            logger.warning("ROUTE_TABLE_DIR não definido: rotas estimadas pelo layout de reserva")
+
+    def _refresh(self):
+        """Recarrega a tabela se o índice em disco mudou (um stat por consulta de pedido)"""
+        table = self._table
+        if not self.directory:
+            return table
+
+        index_path = os.path.join(self.directory, 'index.json')
+        try:
+            mtime = os.stat(index_path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == table.mtime:
+            return table
+
+        with self._lock:
+            table = self._table
+            if mtime == table.mtime:
+                return table
+            if mtime is None:
+                # Tabela removida: mantém o último layout lido do index.json
+                table = _Table(None, {}, None, table.layout, table.layout_source)
+            else:
+                with open(index_path) as f:
+                    meta = json.load(f)
+                distances = np.load(os.path.join(self.directory, 'distances.npy'), mmap_mode='r')
+                index = {slot['key']: row for row, slot in enumerate(meta['slots'])}
+                if 'layout' in meta:
+                    layout, layout_source = meta['layout'], 'table'
+                else:
+                    layout, layout_source = table.layout, table.layout_source
+                table = _Table(mtime, index, distances, layout, layout_source)
+            self._table = table
+            return table
+
+    @property
+    def available(self):
+        return self._refresh().distances is not None
+
+    @property
+    def layout(self):
+        return self._refresh().layout
+
+    @property
+    def layout_source(self):
+        """'table' se o layout veio do index.json, 'fallback' se é o layout de reserva"""
+        return self._refresh().layout_source
+
+    def distance(self, origin, destination):
+        """Distância em cm entre duas posições (dict de localização ou 'base')"""
+        table = self._refresh()
+        origin_key, destination_key = location_key(origin), location_key(destination)
+        if origin_key == destination_key:
+            return 0.0
+
+        row_origin = table.index.get(origin_key)
+        row_destination = table.index.get(destination_key)
+        if row_origin is not None and row_destination is not None:
+            value = float(table.distances[row_origin, row_destination])
+            if np.isfinite(value):
+                return value
+        return self._estimate(table.layout, origin, destination)
+
+    def position(self, location):
+        """Ponto (cm) da posição no layout"""
+        return self._position(self.layout, location)
+
+    def estimate(self, origin, destination):
+        """Distância estimada pelo layout, sem consultar a tabela"""
+        return self._estimate(self.layout, origin, destination)
+
+    @staticmethod
+    def _position(layout, location):
+        if location_key(location) == BASE_KEY:
+            return tuple(layout['base'])
+        origin_x, origin_y = layout['aisle_origin']
+        x = origin_x + (int(location.get('corredor') or 1) - 1) * layout['aisle_spacing']
+        y = (origin_y + (int(location.get('sub_corredor') or 1) - 1) * layout['sub_aisle_length']
+             + int(location.get('posicao_x') or 1) * layout['slot_spacing'])
+        return x, min(y, origin_y + layout['aisle_length'])
+
+    @classmethod
+    def _estimate(cls, layout, origin, destination):
+        """
+        Estimativa sem a tabela: no mesmo corredor, reto; em corredores diferentes, saindo
+        pela ponta (superior ou inferior) mais vantajosa das estantes
+        """
+        (x1, y1), (x2, y2) = cls._position(layout, origin), cls._position(layout, destination)
+        if x1 == x2:
+            return abs(y1 - y2)
+
+        top = layout['aisle_origin'][1] - layout['lane_width'] / 2
+        bottom = layout['aisle_origin'][1] + layout['aisle_length'] + layout['lane_width'] / 2
+        return abs(x1 - x2) + min(abs(y1 - top) + abs(y2 - top), abs(y1 - bottom) + abs(y2 - bottom))
+
+# Instância global (arquivos memory-mapped compartilhados pelas requisições)
+route_costs = RouteCosts()
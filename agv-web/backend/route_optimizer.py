@@ -0,0 +1,94 @@
+"""
+Ordem de coleta dos itens de um pedido
+Escolhe a sequência de visitas (saindo e voltando à base) que minimiza a distância
+percorrida, com as distâncias de route_costs. Pedidos pequenos (o limite de
+criar_pedido é 4 itens) usam programação dinâmica exata; lotes maiores usam
+vizinho mais próximo refinado com 2-opt.
+"""
+
+from itertools import combinations
+
+from route_costs import route_costs, BASE_KEY
+
+# Até aqui a DP exata (O(n² · 2ⁿ)) é instantânea; acima, heurística
+EXACT_MAX_ITEMS = 8
+
+def plan_pick_route(locations, costs=None):
+    """
+    Ordena as visitas às localizações (dicts com corredor/sub_corredor/posicao_x).
+    Retorna (ordem como índices de `locations`, distância total em cm, exata?).
+    """
+    costs = costs or route_costs
+    count = len(locations)
+    if count == 0:
+        return [], 0.0, True
+
+    # Matriz de distâncias: índice 0 é a base, 1..n as localizações
+    points = [BASE_KEY] + list(locations)
+    matrix = [[costs.distance(a, b) for b in points] for a in points]
+
+    if count <= EXACT_MAX_ITEMS:
+        order = _held_karp(matrix, count)
+        exact = True
+    else:
+        order = _two_opt(matrix, _nearest_neighbor(matrix, count))
+        exact = False
+
+    return [stop - 1 for stop in order], _tour_length(matrix, order), exact
+
+def _tour_length(matrix, order):
+    tour = [0] + order + [0]
+    return sum(matrix[a][b] for a, b in zip(tour, tour[1:]))
+
+def _held_karp(matrix, count):
+    """DP de Held-Karp: melhor caminho base -> todos os pontos -> base"""
+    # best[(conjunto, último)] = (custo, penúltimo); conjunto como bitmask dos pontos 1..n
+    best = {}
+    for stop in range(1, count + 1):
+        best[(1 << stop, stop)] = (matrix[0][stop], 0)
+
+    for size in range(2, count + 1):
+        for subset in combinations(range(1, count + 1), size):
+            mask = sum(1 << stop for stop in subset)
+            for last in subset:
+                previous_mask = mask & ~(1 << last)
+                best[(mask, last)] = min(
+                    (best[(previous_mask, previous)][0] + matrix[previous][last], previous)
+                    for previous in subset if previous != last
+                )
+
+    full = sum(1 << stop for stop in range(1, count + 1))
+    _, last = min((best[(full, stop)][0] + matrix[stop][0], stop) for stop in range(1, count + 1))
+
+    order = []
+    mask = full
+    while last:
+        order.append(last)
+        mask, last = mask & ~(1 << last), best[(mask, last)][1]
+    return order[::-1]
+
+def _nearest_neighbor(matrix, count):
+    order = []
+    remaining = set(range(1, count + 1))
+    current = 0
+    while remaining:
+        current = min(remaining, key=lambda stop: (matrix[current][stop], stop))
+        remaining.remove(current)
+        order.append(current)
+    return order
+
+def _two_opt(matrix, order):
+    """Inverte trechos da rota enquanto isso encurtar o percurso"""
+    # A tabela pode ter pequenas assimetrias (células arredondadas): compara o percurso inteiro
+    best_length = _tour_length(matrix, order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(order) - 1):
+            for j in range(i + 1, len(order)):
+                candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                length = _tour_length(matrix, candidate)
+                if length < best_length - 1e-6:
+                    order, best_length = candidate, length
+                    improved = True
+    return order
@@ -0,0 +1,99 @@
+"""
+Rastreamento de mudanças do status do sistema
+Mantém em memória o último snapshot de dispositivos e pedidos ativos e
+calcula diferenças versionadas para enviar aos clientes via WebSocket
+"""
+
+import threading
+import time
+
+from order_summary import ORDER_COLUMNS, ORDER_JOINS, order_dict
+
+QUERY_DISPOSITIVOS = '''
+    SELECT id, nome, codigo, status, bateria, localizacao
+    FROM dispositivos
+    ORDER BY id
+'''
+
+QUERY_PEDIDOS_ATIVOS = f'''
+    SELECT {ORDER_COLUMNS}
+    FROM pedidos p
+    {ORDER_JOINS}
+    WHERE p.status IN ('pendente', 'em_andamento', 'coletando')
+    ORDER BY p.created_at DESC
+'''
+
+def _diff(anterior, atual):
+    """Compara dois dicionários {id: linha} e retorna added/changed/removed"""
+    return {
+        'added': [linha for chave, linha in atual.items() if chave not in anterior],
+        'changed': [linha for chave, linha in atual.items()
+                    if chave in anterior and anterior[chave] != linha],
+        'removed': [chave for chave in anterior if chave not in atual]
+    }
+
+def _vazio(diff):
+    return not (diff['added'] or diff['changed'] or diff['removed'])
+
+class StatusTracker:
+    """Snapshot versionado de dispositivos e pedidos ativos"""
+
+    def __init__(self, resync_interval=30):
+        self.resync_interval = resync_interval  # Releitura completa mesmo sem escrita conhecida
+        self.version = 0
+        self.devices = {}
+        self.active_orders = {}
+        self.total_clients = 0
+        self._dirty = True
+        self._last_refresh = 0
+        self._lock = threading.Lock()
+
+    def mark_dirty(self):
+        """Sinaliza que houve escrita no banco e o snapshot precisa ser relido"""
+        self._dirty = True
+
+    def needs_refresh(self):
+        """Indica se vale a pena consultar o banco agora"""
+        return self._dirty or time.time() - self._last_refresh >= self.resync_interval
+
+    def refresh(self, conn, total_clients=None):
+        """Relê o banco e retorna o delta versionado (ou None se nada mudou)"""
+        with self._lock:
+            self._dirty = False
+            self._last_refresh = time.time()
+
+            devices = {row['id']: dict(row) for row in conn.execute(QUERY_DISPOSITIVOS)}
+            active_orders = {row['id']: order_dict(row) for row in conn.execute(QUERY_PEDIDOS_ATIVOS)}
+
+            devices_diff = _diff(self.devices, devices)
+            orders_diff = _diff(self.active_orders, active_orders)
+            clients_changed = total_clients is not None and total_clients != self.total_clients
+
+            if _vazio(devices_diff) and _vazio(orders_diff) and not clients_changed:
+                return None
+
+            self.devices = devices
+            self.active_orders = active_orders
+            if total_clients is not None:
+                self.total_clients = total_clients
+            self.version += 1
+
+            return {
+                'version': self.version,
+                'base_version': self.version - 1,
+                'timestamp': time.time(),
+                'devices': devices_diff,
+                'active_orders': orders_diff,
+                'total_clients': self.total_clients
+            }
+
+    def snapshot(self):
+        """Retorna o estado completo no mesmo formato do antigo evento system_status"""
+        with self._lock:
+            return {
+                'version': self.version,
+                'timestamp': time.time(),
+                'devices': list(self.devices.values()),
+                'active_orders': list(self.active_orders.values()),
+                'total_clients': self.total_clients
+            }
@@ -0,0 +1,110 @@
+import unittest
+import re
+import database
+from db_test_case import DatabaseTestCase
+from order_summary import ORDER_COLUMNS, ORDER_JOINS
+
+
+# Consultas críticas (mesmo formato das usadas nos blueprints e no broadcast do app.py)
+CONSULTAS_CRITICAS = {
+    'broadcast_agv_status': f'''
+        SELECT {ORDER_COLUMNS}
+        FROM pedidos p
+        {ORDER_JOINS}
+        WHERE p.status IN ('pendente', 'em_andamento', 'coletando')
+        ORDER BY p.created_at DESC
+    ''',
+    'build_pickup_command': f'''
+        SELECT {ORDER_COLUMNS}
+        FROM pedidos p
+        {ORDER_JOINS}
+        WHERE p.id = ?
+    ''',
+    'pedido_ativo': f'''
+        SELECT {ORDER_COLUMNS}
+        FROM pedidos p
+        {ORDER_JOINS}
+        WHERE p.status IN ('em_andamento', 'coletando')
+        ORDER BY p.created_at DESC
+        LIMIT 1
+    ''',
+    'listar_pedidos_por_dispositivo': f'''
+        SELECT {ORDER_COLUMNS}
+        FROM pedidos p
+        {ORDER_JOINS}
+        WHERE p.dispositivo_id = ? AND p.status IN (?, ?)
+        ORDER BY p.created_at DESC
+    ''',
+    'resumo_pedidos_do_item': '''
+        SELECT DISTINCT pedido_id FROM pedido_itens WHERE item_id = ?
+    ''',
+    'remover_item_pedido': '''
+        SELECT pi.id, i.nome, i.id as item_id
+        FROM pedido_itens pi
+        JOIN itens i ON pi.item_id = i.id
+        WHERE pi.pedido_id = ?
+        ORDER BY pi.id
+    ''',
+    'acknowledge_command': '''
+        SELECT id FROM pedidos WHERE command_id = ? AND status = 'em_andamento'
+    ''',
+    'criar_item_armazem_posicao': '''
+        SELECT id FROM itens
+        WHERE corredor = ? AND sub_corredor = ? AND posicao_x = ?
+    ''',
+    'listar_itens': '''
+        SELECT id, nome, tag, categoria
+        FROM itens
+        WHERE disponivel = 1
+        ORDER BY categoria, nome
+    ''',
+}
+
+# "SCAN tabela" = leitura completa, com ou sem índice (percorrer um índice inteiro também
+# lê todas as linhas); "TABLE"/"AS" aparecem no formato de versões antigas do SQLite
+SCAN_COMPLETO = re.compile(r'^SCAN (TABLE )?\w+( AS \w+)?( USING (COVERING )?INDEX \w+)?$')
+
+
+class TestDatabase(DatabaseTestCase):
+
+    def test_consultas_criticas_usam_indices(self):
+        """Teste: nenhuma consulta crítica faz leitura completa de tabela"""
+        conn = database.get_db_connection()
+        try:
+            for nome, query in CONSULTAS_CRITICAS.items():
+                params = [1] * query.count('?')
+                plano = [linha['detail'] for linha in conn.execute('EXPLAIN QUERY PLAN ' + query, params)]
+                scans = [passo for passo in plano if SCAN_COMPLETO.match(passo)]
+                self.assertEqual(scans, [], f"{nome} faz full scan: {plano}")
+        finally:
+            conn.close()
+
+    def test_migracoes_aplicadas_uma_vez(self):
+        """Teste: init_db repetido não reaplica migrações"""
+        conn = database.get_db_connection()
+        try:
+            self.assertEqual(database.get_schema_version(conn), database.MIGRATIONS[-1][0])
+            self.assertEqual(database.run_migrations(conn), database.MIGRATIONS[-1][0])
+        finally:
+            conn.close()
+
+        database.init_db()
+
+    def test_pool_reaproveita_conexao(self):
+        """Teste: close() devolve a conexão ao pool sem transação pendente"""
+        conn = database.get_db_connection()
+        conn.execute("UPDATE dispositivos SET status = 'ocupado'")
+        conn.close()
+
+        reaproveitada = database.get_db_connection()
+        try:
+            self.assertIs(reaproveitada, conn)
+            self.assertFalse(reaproveitada.in_transaction)
+            status = reaproveitada.execute('SELECT status FROM dispositivos').fetchone()['status']
+            self.assertEqual(status, 'disponivel')
+        finally:
+            reaproveitada.close()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
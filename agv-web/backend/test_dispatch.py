@@ -0,0 +1,162 @@
+import unittest
+import threading
+import time
+import database
+from db_test_case import DatabaseTestCase
+from dispatch import (
+    claim_next_order, acknowledge_command, renew_lease, requeue_expired,
+    wait_for_order, command_notifier
+)
+
+
+class TestDispatch(DatabaseTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Mesmo registro do app.py: commits acordam o long-polling de wait_for_order
+        database.add_commit_listener(command_notifier.notify)
+
+    @classmethod
+    def tearDownClass(cls):
+        database.remove_commit_listener(command_notifier.notify)
+
+    def setUp(self):
+        super().setUp()
+
+        conn = database.get_db_connection()
+        conn.executemany(
+            'INSERT INTO dispositivos (nome, codigo) VALUES (?, ?)',
+            [(f'AGV-{n:03d}', f'AGV{n:03d}') for n in range(2, 5)]
+        )
+        conn.commit()
+        conn.close()
+
+    def criar_pedidos(self, quantidade, dispositivo_id=1):
+        conn = database.get_db_connection()
+        conn.executemany(
+            "INSERT INTO pedidos (usuario_id, status, dispositivo_id) VALUES (1, 'pendente', ?)",
+            [(dispositivo_id,)] * quantidade
+        )
+        conn.commit()
+        conn.close()
+
+    def test_sem_despacho_duplicado(self):
+        """Teste: N AGVs consultando em paralelo nunca recebem o mesmo pedido"""
+        total_pedidos = 200
+        total_agvs = 8
+        self.criar_pedidos(total_pedidos)
+
+        recebidos = []
+        lock = threading.Lock()
+        barreira = threading.Barrier(total_agvs)
+
+        def agv():
+            barreira.wait()
+            while True:
+                conn = database.get_db_connection()
+                try:
+                    claim = claim_next_order(conn)
+                finally:
+                    conn.close()
+                if claim is None:
+                    break
+                with lock:
+                    recebidos.append(claim[0])
+
+        threads = [threading.Thread(target=agv) for _ in range(total_agvs)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(recebidos), total_pedidos)
+        self.assertEqual(len(set(recebidos)), total_pedidos)
+
+    def test_respeita_dispositivo(self):
+        """Teste: AGV só recebe pedidos atribuídos a ele"""
+        self.criar_pedidos(1, dispositivo_id=1)
+        self.criar_pedidos(1, dispositivo_id=2)
+
+        conn = database.get_db_connection()
+        try:
+            pedido_id, _ = claim_next_order(conn, dispositivo_id=2)
+            dispositivo = conn.execute('SELECT dispositivo_id FROM pedidos WHERE id = ?', (pedido_id,)).fetchone()
+            self.assertEqual(dispositivo['dispositivo_id'], 2)
+            self.assertIsNone(claim_next_order(conn, dispositivo_id=2))
+        finally:
+            conn.close()
+
+    def test_lease_expirado_volta_para_fila(self):
+        """Teste: sem command_ack o pedido volta a ficar pendente"""
+        self.criar_pedidos(1)
+
+        conn = database.get_db_connection()
+        try:
+            pedido_id, command_antigo = claim_next_order(conn, lease_seconds=-1)
+            pedido_novamente, command_novo = claim_next_order(conn)
+            self.assertEqual(pedido_novamente, pedido_id)
+            self.assertNotEqual(command_novo, command_antigo)
+
+            # Confirmação atrasada do comando antigo não vale mais
+            self.assertIsNone(acknowledge_command(conn, command_antigo))
+        finally:
+            conn.close()
+
+    def test_ack_confirma_lease(self):
+        """Teste: command_ack com sucesso mantém o pedido em andamento"""
+        self.criar_pedidos(1)
+
+        conn = database.get_db_connection()
+        try:
+            pedido_id, command_id = claim_next_order(conn, lease_seconds=-1)
+            self.assertEqual(acknowledge_command(conn, command_id), pedido_id)
+            self.assertEqual(requeue_expired(conn), 0)
+            conn.commit()
+
+            status = conn.execute('SELECT status FROM pedidos WHERE id = ?', (pedido_id,)).fetchone()['status']
+            self.assertEqual(status, 'em_andamento')
+        finally:
+            conn.close()
+
+    def test_renovacao_mantem_lease_ate_parar(self):
+        """Teste: lease renovado não expira; sem renovação o pedido volta à fila"""
+        self.criar_pedidos(1)
+
+        conn = database.get_db_connection()
+        try:
+            pedido_id, command_id = claim_next_order(conn, lease_seconds=-1)
+            self.assertEqual(renew_lease(conn, command_id), pedido_id)
+            self.assertEqual(requeue_expired(conn), 0)
+
+            self.assertEqual(renew_lease(conn, command_id, lease_seconds=-1), pedido_id)
+            self.assertEqual(requeue_expired(conn), 1)
+            conn.commit()
+            self.assertIsNone(renew_lease(conn, command_id))
+        finally:
+            conn.close()
+
+    def test_long_polling_acorda_com_pedido_novo(self):
+        """Teste: AGV em long-polling recebe o pedido assim que ele é criado"""
+        resultado = {}
+
+        def agv():
+            inicio = time.time()
+            resultado['claim'] = wait_for_order(database.get_db_connection, timeout=10)
+            resultado['espera'] = time.time() - inicio
+
+        thread = threading.Thread(target=agv)
+        thread.start()
+        time.sleep(0.2)
+        self.criar_pedidos(1)
+        thread.join()
+
+        self.assertIsNotNone(resultado['claim'])
+        self.assertLess(resultado['espera'], 2)
+
+    def test_long_polling_timeout(self):
+        """Teste: sem pedidos, o long-polling retorna None após o timeout"""
+        self.assertIsNone(wait_for_order(database.get_db_connection, timeout=0.2))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
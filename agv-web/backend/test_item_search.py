@@ -0,0 +1,73 @@
+import unittest
+import database
+from db_test_case import DatabaseTestCase
+from item_search import search_items, has_search_index
+
+
+class TestItemSearch(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.conn = database.get_db_connection()
+
+    def tearDown(self):
+        self.conn.close()
+        super().tearDown()
+
+    def nomes(self, termo, colunas=('nome', 'tag'), limite=50):
+        return [item['nome'] for item in search_items(self.conn, termo, colunas, limite)]
+
+    def test_indice_criado_pela_migracao(self):
+        self.assertTrue(has_search_index(self.conn))
+        # Itens de exemplo já indexados: trecho no meio do nome, sem diferenciar maiúsculas
+        self.assertEqual(self.nomes('SIST'), ['Resistor'])
+        self.assertEqual(self.nomes('9012'), ['Arruela'])
+
+    def test_indice_recriado_na_inicializacao(self):
+        """Teste: banco já na versão 4 sem o índice (SQLite sem FTS5 na migração) ganha o índice no init_db"""
+        for trigger in ('itens_busca_insert', 'itens_busca_delete', 'itens_busca_update'):
+            self.conn.execute(f'DROP TRIGGER {trigger}')
+        self.conn.execute('DROP TABLE itens_busca')
+        self.conn.commit()
+        self.assertFalse(has_search_index(self.conn))
+
+        database.init_db()
+        self.assertTrue(has_search_index(self.conn))
+        self.assertEqual(self.nomes('SIST'), ['Resistor'])
+
+    def test_triggers_mantem_indice(self):
+        """Teste: inserção, alteração e remoção de itens refletem na busca"""
+        self.conn.execute('''
+            INSERT INTO itens (nome, tag, categoria, corredor, sub_corredor)
+            VALUES ('Capacitor 10uF', 'CAP10', 'Eletrônicos', '2', '1')
+        ''')
+        self.conn.commit()
+        self.assertEqual(self.nomes('capac'), ['Capacitor 10uF'])
+
+        self.conn.execute("UPDATE itens SET nome = 'Indutor 10uH' WHERE tag = 'CAP10'")
+        self.conn.commit()
+        self.assertEqual(self.nomes('capac'), [])
+        self.assertEqual(self.nomes('indutor'), ['Indutor 10uH'])
+
+        self.conn.execute("DELETE FROM itens WHERE tag = 'CAP10'")
+        self.conn.commit()
+        self.assertEqual(self.nomes('indutor'), [])
+
+    def test_ordem_e_limite(self):
+        """Teste: nome começando pelo termo vem antes, palavras curtas e limite respeitados"""
+        self.conn.executemany('''
+            INSERT INTO itens (nome, tag, categoria, corredor, sub_corredor) VALUES (?, ?, 'Fixação', '1', '1')
+        ''', [('Arruela Lisa M6', 'A6'), ('Parafuso M6', 'P6'), ('Porca M6 Parafuso', 'PM6'), ('Parafuso M8', 'P8')])
+        self.conn.commit()
+
+        self.assertEqual(self.nomes('parafuso'), ['Parafuso', 'Parafuso M6', 'Parafuso M8', 'Porca M6 Parafuso'])
+        self.assertEqual(self.nomes('parafuso M6'), ['Parafuso M6', 'Porca M6 Parafuso'])
+        self.assertEqual(len(self.nomes('parafuso', limite=2)), 2)
+        # Só palavras curtas: busca por LIKE
+        self.assertEqual(self.nomes('M8'), ['Parafuso M8'])
+        # Busca geral inclui categoria
+        self.assertIn('Cabo USB', self.nomes('eletr', ('nome', 'tag', 'categoria', 'corredor', 'sub_corredor')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import threading
+import database
+from db_test_case import DatabaseTestCase
+from app import app
+from order_creation import create_orders
+
+
+class TestOrderCreation(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.app = app.test_client()
+        self.app.testing = True
+
+    def test_lote_informa_recusas_por_pedido(self):
+        """Teste: lote cria os pedidos válidos e recusa dispositivo repetido, usuário e item inexistentes"""
+        conn = database.get_db_connection()
+        conn.execute("INSERT INTO dispositivos (id, nome, codigo) VALUES (2, 'AGV-002', 'AGV002')")
+        conn.commit()
+        conn.close()
+
+        response = self.app.post('/pedidos/lote', json={'pedidos': [
+            {'usuario_id': 1, 'dispositivo_id': 1, 'itens': [1, 2]},
+            {'usuario_id': 2, 'dispositivo_id': 1, 'itens': [3]},
+            {'usuario_id': 999, 'dispositivo_id': 2, 'itens': [3]},
+            {'usuario_id': 2, 'dispositivo_id': '2', 'itens': [99999]},
+            {'usuario_id': 2, 'dispositivo_id': 2, 'itens': [1, 2, 3, 4, 5]},
+            {'usuario_id': 2, 'dispositivo_id': 2, 'itens': ['3']},
+        ]})
+        data = response.get_json()
+
+        self.assertEqual((data['criados'], data['recusados']), (2, 4))
+        erros = [pedido.get('error') for pedido in data['pedidos']]
+        self.assertEqual(erros, [None, "Dispositivo não disponível", "Usuário não encontrado",
+                                 "Item não encontrado", "Máximo 4 itens por pedido", None])
+
+        conn = database.get_db_connection()
+        itens = conn.execute('SELECT COUNT(*) FROM pedido_itens').fetchone()[0]
+        ocupados = conn.execute("SELECT COUNT(*) FROM dispositivos WHERE status = 'ocupado'").fetchone()[0]
+        conn.close()
+        self.assertEqual((itens, ocupados), (3, 2))
+
+        self.assertEqual(self.app.post('/pedidos', json={'usuario_id': 1, 'dispositivo_id': 1, 'itens': [1]}).status_code, 400)
+
+    def test_dispositivo_disputado_reservado_uma_vez(self):
+        """Teste: requisições concorrentes para o mesmo dispositivo criam um único pedido"""
+        resultados = []
+
+        def criar():
+            conn = database.get_db_connection()
+            try:
+                resultados.extend(create_orders(conn, [{'usuario_id': 1, 'dispositivo_id': 1, 'itens': [1]}]))
+            finally:
+                conn.close()
+
+        threads = [threading.Thread(target=criar) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(1 for resultado in resultados if 'pedido_id' in resultado), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import database
+from db_test_case import DatabaseTestCase
+from app import app
+
+
+class TestOrderSummary(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.app = app.test_client()
+        self.app.testing = True
+
+    def criar_pedido(self, itens):
+        conn = database.get_db_connection()
+        pedido_id = conn.execute(
+            "INSERT INTO pedidos (usuario_id, status, dispositivo_id) VALUES (1, 'em_andamento', 1)"
+        ).lastrowid
+        conn.executemany('INSERT INTO pedido_itens (pedido_id, item_id) VALUES (?, ?)',
+                         [(pedido_id, item_id) for item_id in itens])
+        conn.commit()
+        conn.close()
+        return pedido_id
+
+    def test_resumo_acompanha_itens(self):
+        """Teste: triggers mantêm o resumo ao renomear, remover item e excluir pedido"""
+        pedido_id = self.criar_pedido([3, 1])
+
+        conn = database.get_db_connection()
+        # Vírgula no nome quebrava a lista montada com GROUP_CONCAT
+        conn.execute("UPDATE itens SET nome = 'Porca, sextavada' WHERE id = 1")
+        conn.commit()
+        conn.close()
+
+        pedido = self.app.get('/pedidos/ativo').get_json()
+        self.assertEqual([item['id'] for item in pedido['itens']], [3, 1])
+        self.assertEqual(pedido['itens'][1]['nome'], 'Porca, sextavada')
+        self.assertEqual(pedido['total_itens'], 2)
+
+        conn = database.get_db_connection()
+        conn.execute('DELETE FROM pedido_itens WHERE pedido_id = ? AND item_id = 3', (pedido_id,))
+        conn.commit()
+        resumo = conn.execute('SELECT total_itens FROM pedidos_resumo WHERE pedido_id = ?', (pedido_id,)).fetchone()
+        self.assertEqual(resumo['total_itens'], 1)
+
+        conn.execute('DELETE FROM pedido_itens WHERE pedido_id = ?', (pedido_id,))
+        conn.execute('DELETE FROM pedidos WHERE id = ?', (pedido_id,))
+        conn.commit()
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM pedidos_resumo').fetchone()[0], 0)
+        conn.close()
+
+    def test_listagem_com_itens_estruturados(self):
+        """Teste: /pedidos devolve a lista de itens com localização"""
+        self.criar_pedido([2])
+        pedido, = self.app.get('/pedidos').get_json()
+        item, = pedido['itens']
+        self.assertEqual(set(item), {'id', 'nome', 'corredor', 'sub_corredor', 'posicao_x'})
+        self.assertNotIn('corredores', pedido)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import json
+import database
+from db_test_case import DatabaseTestCase
+from app import app
+
+
+class TestPagination(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.app = app.test_client()
+        self.app.testing = True
+
+    def percorrer(self, url):
+        """Segue X-Next-Cursor até a última página"""
+        linhas, paginas = [], 0
+        while url:
+            response = self.app.get(url)
+            self.assertEqual(response.status_code, 200)
+            linhas += response.get_json()
+            paginas += 1
+            cursor = response.headers.get('X-Next-Cursor')
+            url = f"{url.split('cursor=')[0].rstrip('&')}&cursor={cursor}" if cursor else None
+        return linhas, paginas
+
+    def test_pedidos_paginados(self):
+        """Teste: páginas cobrem todos os pedidos, sem repetição, mais recentes primeiro"""
+        conn = database.get_db_connection()
+        # Mesmo created_at para vários pedidos: o id desempata
+        conn.executemany(
+            "INSERT INTO pedidos (usuario_id, status, dispositivo_id, created_at) VALUES (1, ?, 1, ?)",
+            [('pendente' if n % 3 else 'concluido', f'2024-01-{n % 28 + 1:02d} 10:00:00') for n in range(250)]
+        )
+        conn.commit()
+        conn.close()
+
+        pedidos, paginas = self.percorrer('/pedidos?limite=100')
+        self.assertEqual(paginas, 3)
+        self.assertEqual(len({pedido['id'] for pedido in pedidos}), 250)
+        chaves = [(pedido['created_at'], pedido['id']) for pedido in pedidos]
+        self.assertEqual(chaves, sorted(chaves, reverse=True))
+
+        pendentes, _ = self.percorrer('/pedidos?status=pendente&limite=50')
+        self.assertEqual(len(pendentes), len([n for n in range(250) if n % 3]))
+
+        # NDJSON: tudo em uma resposta, um registro por linha
+        response = self.app.get('/pedidos?formato=ndjson')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        linhas = [json.loads(linha) for linha in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([linha['id'] for linha in linhas], [pedido['id'] for pedido in pedidos])
+
+    def test_itens_com_posicao_nula(self):
+        """Teste: cursor com posicao_x NULL não pula nem repete itens"""
+        conn = database.get_db_connection()
+        conn.executemany(
+            "INSERT INTO itens (nome, tag, categoria, corredor, sub_corredor, posicao_x) VALUES (?, ?, 'Diversos', '2', '1', ?)",
+            [(f'Item {n}', f'T{n}', None if n % 2 else n) for n in range(30)]
+        )
+        conn.commit()
+        conn.close()
+
+        itens, _ = self.percorrer('/armazem/itens?limite=7')
+        self.assertEqual(len({item['id'] for item in itens}), 36)
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.app.get('/usuarios?cursor=abc').status_code, 400)
+        self.assertEqual(self.app.get('/usuarios').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import database
+from db_test_case import DatabaseTestCase
+from app import app
+from response_cache import response_cache
+
+
+class TestResponseCache(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.app = app.test_client()
+        self.app.testing = True
+
+    def test_repeticao_vem_do_cache_e_revalida(self):
+        """Teste: segunda listagem não refaz a consulta; ETag e Last-Modified dão 304"""
+        primeira = self.app.get('/itens')
+        hits = response_cache.hits
+        segunda = self.app.get('/itens')
+
+        self.assertEqual(response_cache.hits, hits + 1)
+        self.assertEqual(segunda.data, primeira.data)
+        self.assertEqual(segunda.headers['ETag'], primeira.headers['ETag'])
+
+        revalidada = self.app.get('/itens', headers={'If-None-Match': primeira.headers['ETag']})
+        self.assertEqual(revalidada.status_code, 304)
+        revalidada = self.app.get('/itens', headers={'If-Modified-Since': primeira.headers['Last-Modified']})
+        self.assertEqual(revalidada.status_code, 304)
+
+    def test_escrita_invalida_so_a_tabela_alterada(self):
+        """Teste: inserir um item muda o ETag de /itens, mas não o de /dispositivos"""
+        itens = self.app.get('/armazem/itens')
+        dispositivos = self.app.get('/dispositivos')
+
+        conn = database.get_db_connection()
+        conn.execute("INSERT INTO itens (nome, tag, categoria) VALUES ('Capacitor', 'CAP1', 'Eletrônicos')")
+        conn.commit()
+        conn.close()
+
+        novos_itens = self.app.get('/armazem/itens', headers={'If-None-Match': itens.headers['ETag']})
+        self.assertEqual(novos_itens.status_code, 200)
+        self.assertIn('Capacitor', [item['nome'] for item in novos_itens.get_json()])
+
+        mesmos_dispositivos = self.app.get('/dispositivos', headers={'If-None-Match': dispositivos.headers['ETag']})
+        self.assertEqual(mesmos_dispositivos.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import json
+import os
+import tempfile
+import numpy as np
+from route_costs import RouteCosts, location_key, BASE_KEY, FALLBACK_LAYOUT
+
+
+class TestRouteCosts(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def gravar_tabela(self, chaves, distancias, layout=None):
+        """Grava uma tabela no formato do route_table.py do Raspberry"""
+        np.save(os.path.join(self.tmpdir.name, 'distances.npy'), np.array(distancias, dtype=np.float32))
+        meta = {'slots': [{'key': chave} for chave in chaves]}
+        if layout:
+            meta['layout'] = layout
+        with open(os.path.join(self.tmpdir.name, 'index.json'), 'w') as f:
+            json.dump(meta, f)
+
+    def test_chave_da_localizacao(self):
+        self.assertEqual(location_key({'corredor': 2, 'sub_corredor': '3', 'posicao_x': None}), '2-3-1')
+        self.assertEqual(location_key(BASE_KEY), BASE_KEY)
+
+    def test_consulta_na_tabela(self):
+        self.gravar_tabela(['1-1-1', '2-1-1', 'base'], [[0, 300, 150], [300, 0, 350], [150, 350, 0]])
+        custos = RouteCosts(self.tmpdir.name)
+
+        self.assertTrue(custos.available)
+        self.assertEqual(custos.distance({'corredor': 1, 'sub_corredor': 1, 'posicao_x': 1}, BASE_KEY), 150)
+        self.assertEqual(custos.distance(BASE_KEY, {'corredor': 2, 'sub_corredor': 1, 'posicao_x': 1}), 350)
+
+    def test_recarrega_quando_tabela_muda(self):
+        self.gravar_tabela(['1-1-1', 'base'], [[0, 150], [150, 0]])
+        custos = RouteCosts(self.tmpdir.name)
+        local = {'corredor': 1, 'sub_corredor': 1, 'posicao_x': 1}
+        self.assertEqual(custos.distance(local, BASE_KEY), 150)
+
+        self.gravar_tabela(['1-1-1', 'base'], [[0, 180], [180, 0]])
+        os.utime(os.path.join(self.tmpdir.name, 'index.json'), (1, 1))
+        self.assertEqual(custos.distance(local, BASE_KEY), 180)
+
+    def test_estimativa_sem_tabela(self):
+        custos = RouteCosts(self.tmpdir.name)
+        self.assertFalse(custos.available)
+
+        a = {'corredor': 1, 'sub_corredor': 1, 'posicao_x': 1}
+        b = {'corredor': 1, 'sub_corredor': 2, 'posicao_x': 1}
+        c = {'corredor': 2, 'sub_corredor': 1, 'posicao_x': 1}
+        self.assertEqual(custos.distance(a, b), 250)
+        # Corredores diferentes: contorna as estantes, então custa mais que a distância em x
+        self.assertGreater(custos.distance(a, c), 200)
+        self.assertEqual(custos.distance(a, c), custos.distance(c, a))
+        self.assertEqual(custos.layout_source, 'fallback')
+
+    def test_estimativa_usa_layout_da_tabela(self):
+        """Teste: posições fora da tabela são estimadas pelo layout gravado no index.json"""
+        layout = dict(FALLBACK_LAYOUT, sub_aisle_length=400)
+        self.gravar_tabela(['base'], [[0]], layout)
+        custos = RouteCosts(self.tmpdir.name)
+
+        a = {'corredor': 1, 'sub_corredor': 1, 'posicao_x': 1}
+        b = {'corredor': 1, 'sub_corredor': 2, 'posicao_x': 1}
+        self.assertEqual(custos.distance(a, b), 400)
+        self.assertEqual(custos.layout_source, 'table')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import itertools
+import random
+import tempfile
+from route_costs import RouteCosts
+from route_optimizer import plan_pick_route, EXACT_MAX_ITEMS
+
+
+class TestRouteOptimizer(unittest.TestCase):
+
+    def setUp(self):
+        # Diretório vazio: distâncias pela estimativa do layout
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.custos = RouteCosts(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def local(self, corredor, sub_corredor, posicao_x):
+        return {'corredor': corredor, 'sub_corredor': sub_corredor, 'posicao_x': posicao_x}
+
+    def comprimento(self, locais, ordem):
+        pontos = ['base'] + [locais[i] for i in ordem] + ['base']
+        return sum(self.custos.distance(a, b) for a, b in zip(pontos, pontos[1:]))
+
+    def test_pedido_vazio(self):
+        self.assertEqual(plan_pick_route([], self.custos), ([], 0.0, True))
+
+    def test_ordem_exata_igual_forca_bruta(self):
+        aleatorio = random.Random(7)
+        for _ in range(20):
+            locais = [self.local(aleatorio.randint(1, 4), aleatorio.randint(1, 3), aleatorio.randint(1, 5))
+                      for _ in range(4)]
+            ordem, distancia, exata = plan_pick_route(locais, self.custos)
+
+            melhor = min(self.comprimento(locais, list(p)) for p in itertools.permutations(range(4)))
+            self.assertTrue(exata)
+            self.assertEqual(sorted(ordem), [0, 1, 2, 3])
+            self.assertAlmostEqual(distancia, melhor)
+            self.assertAlmostEqual(self.comprimento(locais, ordem), distancia)
+
+    def test_lote_grande_usa_heuristica(self):
+        aleatorio = random.Random(3)
+        locais = [self.local(aleatorio.randint(1, 4), aleatorio.randint(1, 3), aleatorio.randint(1, 5))
+                  for _ in range(EXACT_MAX_ITEMS + 4)]
+        ordem, distancia, exata = plan_pick_route(locais, self.custos)
+
+        self.assertFalse(exata)
+        self.assertEqual(sorted(ordem), list(range(len(locais))))
+        self.assertAlmostEqual(self.comprimento(locais, ordem), distancia)
+        # Nunca pior que visitar na ordem do pedido
+        self.assertLessEqual(distancia, self.comprimento(locais, list(range(len(locais)))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { fetchAll } from '../services/listService';
 
 export default function AdminUsuarios({ usuario }) {
   const [usuarios, setUsuarios] = useState([]);
@@ -20,8 +21,7 @@ export default function AdminUsuarios({ usuario }) {
 
   const carregarUsuarios = async () => {
     try {
-      const response = await fetch('http://localhost:5000/usuarios');
-      const data = await response.json();
+      const data = await fetchAll('http://localhost:5000/usuarios');
       setUsuarios(data);
     } catch (error) {
       setError('Erro ao carregar usuários');
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import socketService from '../services/socketService';
+import { fetchAll } from '../services/listService';
 
 export default function Analise({ usuario }) {
   const [analyticsData, setAnalyticsData] = useState({
@@ -35,16 +36,14 @@ export default function Analise({ usuario }) {
       setLoading(true);
 
       // Load orders data
-      const ordersResponse = await fetch('http://localhost:5000/pedidos');
-      const ordersData = await ordersResponse.json();
+      const ordersData = await fetchAll('http://localhost:5000/pedidos');
 
       // Load devices data
       const devicesResponse = await fetch('http://localhost:5000/dispositivos');
       const devicesData = await devicesResponse.json();
 
       // Load warehouse data
-      const warehouseResponse = await fetch('http://localhost:5000/armazem/itens');
-      const warehouseData = await warehouseResponse.json();
+      const warehouseData = await fetchAll('http://localhost:5000/armazem/itens');
 
       // Process analytics
       const processedData = processAnalyticsData(ordersData, devicesData, warehouseData);
@@ -174,6 +173,7 @@ export default function Analise({ usuario }) {
       case 'coletando': return 'text-yellow-600';
       case 'pendente': return 'text-gray-600';
       case 'cancelado': return 'text-red-600';
+      case 'falha': return 'text-orange-600';
       default: return 'text-gray-600';
     }
   };
@@ -184,7 +184,8 @@ export default function Analise({ usuario }) {
       'em_andamento': 'Em Andamento',
       'coletando': 'Coletando',
       'pendente': 'Pendente',
-      'cancelado': 'Cancelado'
+      'cancelado': 'Cancelado',
+      'falha': 'Falha'
     };
     return statusMap[status] || status;
   };
@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { fetchAll } from '../services/listService';
 
 export default function Armazem({ usuario }) {
   const [itens, setItens] = useState([]);
@@ -53,8 +54,7 @@ export default function Armazem({ usuario }) {
 
   const carregarItens = async () => {
     try {
-      const response = await fetch('http://localhost:5000/armazem/itens');
-      const data = await response.json();
+      const data = await fetchAll('http://localhost:5000/armazem/itens');
       setItens(data);
     } catch (error) {
       console.error('Erro ao carregar itens:', error);
@@ -85,16 +85,7 @@ export default function Controle({ usuario }) {
     // Get all item IDs that are part of active orders
     const itensEmPedidosAtivos = new Set();
     pedidosAtivos.forEach(pedido => {
-      if (pedido.itens) {
-        // Parse comma-separated item names and find their IDs
-        const itemNames = pedido.itens.split(',');
-        itemNames.forEach(itemName => {
-          const item = itens.find(i => i.nome.trim() === itemName.trim());
-          if (item) {
-            itensEmPedidosAtivos.add(item.id);
-          }
-        });
-      }
+      (pedido.itens || []).forEach(item => itensEmPedidosAtivos.add(item.id));
     });
 
     // Filter out items that are in active orders
@@ -114,13 +105,9 @@ export default function Controle({ usuario }) {
       const data = await response.json();
       // Filter search results to only show available items
       const itensFiltrados = data.filter(item => {
-        const itemEmPedidoAtivo = pedidosAtivos.some(pedido => {
-          if (pedido.itens) {
-            const itemNames = pedido.itens.split(',');
-            return itemNames.some(name => name.trim() === item.nome.trim());
-          }
-          return false;
-        });
+        const itemEmPedidoAtivo = pedidosAtivos.some(pedido =>
+          (pedido.itens || []).some(itemPedido => itemPedido.id === item.id)
+        );
         return !itemEmPedidoAtivo;
       });
       setItensDisponiveis(itensFiltrados);
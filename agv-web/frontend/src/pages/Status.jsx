@@ -149,30 +149,25 @@ export default function Status({ usuario }) {
     console.log('Gerando rota para pedido:', pedido); // Debug
 
     // Gerar rota baseada nos dados reais do pedido
-    if (!pedido.itens) {
+    if (!pedido.itens || pedido.itens.length === 0) {
       console.log('Pedido sem itens'); // Debug
       setRotaAtual([]);
       return;
     }
 
-    const itens = pedido.itens.split(',');
-    const corredores = pedido.corredores ? pedido.corredores.split(',') : [];
-    const subCorredores = pedido.sub_corredores ? pedido.sub_corredores.split(',') : [];
-    const posicoesX = pedido.posicoes_x ? pedido.posicoes_x.split(',') : [];
+    console.log('Itens do pedido:', pedido.itens); // Debug
 
-    console.log('Dados do pedido:', { itens, corredores, subCorredores, posicoesX }); // Debug
-
-    const rota = itens.map((item, index) => {
+    const rota = pedido.itens.map((item, index) => {
       // Para pedidos reais, todos os itens começam com status 'N' (não pego ainda)
       // O status será atualizado quando o AGV realmente coletar/processar os itens
       const status = 'N'; // Não pego ainda
 
       return {
         id: index + 1,
-        nome: item.trim(),
-        corredor: corredores[index] || '1',
-        subCorredor: subCorredores[index] || '1',
-        posicao: posicoesX[index] || '1',
+        nome: item.nome,
+        corredor: String(item.corredor || '1'),
+        subCorredor: String(item.sub_corredor || '1'),
+        posicao: String(item.posicao_x || '1'),
         status: status,
         coletado: false
       };
@@ -216,10 +211,12 @@ export default function Status({ usuario }) {
       status: 'em_andamento',
       dispositivo_nome: statusAgv?.nome || 'AGV Teste',
       dispositivo_codigo: statusAgv?.codigo || 'AGV001',
-      itens: 'Prego,Pilha,Resistor,Filamento',
-      corredores: '1,1,1,1',
-      sub_corredores: '1,1,2,3',
-      posicoes_x: '1,2,1,1'
+      itens: [
+        { id: 1, nome: 'Prego', corredor: '1', sub_corredor: '1', posicao_x: 1 },
+        { id: 2, nome: 'Pilha', corredor: '1', sub_corredor: '1', posicao_x: 2 },
+        { id: 3, nome: 'Resistor', corredor: '1', sub_corredor: '2', posicao_x: 1 },
+        { id: 4, nome: 'Filamento', corredor: '1', sub_corredor: '3', posicao_x: 1 }
+      ]
     };
 
     setPedidoAtual(pedidoTeste);
@@ -0,0 +1,16 @@
+// Listagens completas (/pedidos, /armazem/itens, /usuarios): a API pagina a resposta
+// JSON, então quem precisa de todos os registros pede o modo streaming NDJSON
+// (uma linha JSON por registro) em uma única requisição.
+export async function fetchAll(url) {
+  const separator = url.includes('?') ? '&' : '?';
+  const response = await fetch(`${url}${separator}formato=ndjson`);
+  if (!response.ok) {
+    throw new Error(`Erro HTTP ${response.status}`);
+  }
+
+  const text = await response.text();
+  return text
+    .split('\n')
+    .filter(line => line.trim())
+    .map(line => JSON.parse(line));
+}
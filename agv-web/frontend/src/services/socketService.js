@@ -5,6 +5,7 @@ class SocketService {
     this.socket = null;
     this.isConnected = false;
     this.eventListeners = new Map();
+    this.systemStatus = null;
   }
 
   connect() {
@@ -30,9 +31,30 @@ class SocketService {
       console.log('Connection status:', data);
     });
 
-    // Handle system status updates
+    // Full snapshot (sent on connect and on resync)
     this.socket.on('system_status', (data) => {
-      this.notifyListeners('system_status', data);
+      this.systemStatus = {
+        ...data,
+        devices: new Map((data.devices || []).map(device => [device.id, device])),
+        active_orders: new Map((data.active_orders || []).map(order => [order.id, order]))
+      };
+      this.notifyListeners('system_status', this.getSystemStatus());
+    });
+
+    // Incremental updates: only what changed since the previous version
+    this.socket.on('system_status_delta', (delta) => {
+      if (!this.systemStatus || delta.base_version !== this.systemStatus.version) {
+        this.socket.emit('request_status_resync');
+        return;
+      }
+
+      this.applyDelta(this.systemStatus.devices, delta.devices);
+      this.applyDelta(this.systemStatus.active_orders, delta.active_orders);
+      this.systemStatus.version = delta.version;
+      this.systemStatus.timestamp = delta.timestamp;
+      this.systemStatus.total_clients = delta.total_clients;
+
+      this.notifyListeners('system_status', this.getSystemStatus());
     });
 
     // Handle room events
@@ -50,6 +72,7 @@ class SocketService {
       this.socket.disconnect();
       this.socket = null;
       this.isConnected = false;
+      this.systemStatus = null;
     }
   }
 
@@ -65,12 +88,45 @@ class SocketService {
     }
   }
 
+  applyDelta(collection, diff) {
+    if (!diff) {
+      return;
+    }
+    (diff.removed || []).forEach(id => collection.delete(id));
+    (diff.added || []).forEach(row => collection.set(row.id, row));
+    (diff.changed || []).forEach(row => collection.set(row.id, row));
+  }
+
+  // Rebuild the system_status payload in the same shape the server used to send
+  getSystemStatus() {
+    if (!this.systemStatus) {
+      return null;
+    }
+
+    const activeOrders = Array.from(this.systemStatus.active_orders.values()).sort((a, b) =>
+      a.created_at === b.created_at ? b.id - a.id : (a.created_at < b.created_at ? 1 : -1)
+    );
+
+    return {
+      version: this.systemStatus.version,
+      timestamp: this.systemStatus.timestamp,
+      devices: Array.from(this.systemStatus.devices.values()).sort((a, b) => a.id - b.id),
+      active_orders: activeOrders,
+      total_clients: this.systemStatus.total_clients
+    };
+  }
+
   // Event listener management
   addEventListener(event, callback) {
     if (!this.eventListeners.has(event)) {
       this.eventListeners.set(event, new Set());
     }
     this.eventListeners.get(event).add(callback);
+
+    // Status only arrives when something changes, so replay the latest one
+    if (event === 'system_status' && this.systemStatus) {
+      callback(this.getSystemStatus());
+    }
   }
 
   removeEventListener(event, callback) {